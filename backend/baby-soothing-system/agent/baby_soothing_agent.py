@@ -1,29 +1,90 @@
 import asyncio
 import json
+import os
 import time
 import threading
+import signal
 import socket
+import sys
 from enum import Enum
 from typing import Optional
 
 from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import AgentSession, Agent, RoomInputOptions
-from livekit.plugins import (
-    anthropic,
-    elevenlabs,
-    silero,  # ✅ ADD: Silero TTS als Backup
-    noise_cancellation,
-    bey,     # ✅ ADD: Beyond Presence Avatar
-)
+# LiveKit Plugins werden erst in prewarm() geladen - nur die konfigurierten (siehe load_plugins)
+
+from cpu_meter import SessionCpuMeter
+from night_summary import NightSummary
+from startup_timeline import StartupTimeline
+from state_publisher import StatePublisher
+from playback_scheduler import SoothingScheduler
+from profiling import ProfileSession
+from tts_router import TTSRouter, LiveKitTTSBackend, CachedAudioBackend, ShushNoiseBackend
+from utterance_pool import UtterancePool, LiveKitLLMGenerator
 
 load_dotenv(".env.local")
 
+# Output-Only Modus: Agent reagiert nur auf TCP Events und hört nie zu.
+# Kein STT, keine Noise Cancellation, keine Subscription auf Room-Audio.
+# AGENT_OUTPUT_ONLY=0 stellt das alte Verhalten wieder her (z.B. für CPU-Vergleich).
+OUTPUT_ONLY = os.getenv("AGENT_OUTPUT_ONLY", "1") != "0"
+
+# Latenz-Budget pro Utterance bis zum ersten Audio-Frame der primären TTS
+TTS_LATENCY_BUDGET = float(os.getenv("TTS_LATENCY_BUDGET", "0.8"))
+
+# Pause zwischen wiederholten Utterances solange das Baby weint
+SOOTHING_CADENCE = float(os.getenv("SOOTHING_CADENCE", "3.0"))
+SOOTHING_MAX_DURATION = float(os.getenv("SOOTHING_MAX_DURATION", "600"))
+
+SOOTHING_TEXTS = [
+    "Shh, shh... everything is okay, little one. I'm here with you.",
+    "There, there... you're safe and loved. Calm down, sweet baby.",
+    "Shh, shh... it's alright, it's alright. Everything will be better soon.",
+    "Rest now, little angel. You are so loved and protected.",
+    "Shh, shh... breathe gently. Everything is peaceful and calm."
+]
+
+GREETING_TEXTS = [
+    "Hello, I'm Mom. I'm here to soothe your baby whenever they cry.",
+]
+
+# Lokaler Utterance-Pool (von Claude im Hintergrund vorgeneriert)
+UTTERANCE_POOL_PATH = os.getenv("UTTERANCE_POOL_PATH", "utterance_pool.json")
+UTTERANCE_POOL_REFRESH = float(os.getenv("UTTERANCE_POOL_REFRESH", "1800"))
+
+# Profiling auf Abruf: kill -USR1 <job-pid> (cProfile + langsame Callbacks), -USR2 (Stack-Sampler)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))
+
+# Nacht-Statistiken (inkrementell, überlebt Neustarts)
+NIGHT_SUMMARY_PATH = os.getenv("NIGHT_SUMMARY_PATH", "night_summary.json")
+
+# WebSocket-Gateway für das Frontend (leer = aus)
+STATE_GATEWAY = os.getenv("STATE_GATEWAY", "localhost:9998")
+
+# Avatar-Start: "background" (nach Session-Start, parallel), "on_cry" (beim ersten Schrei), "off"
+AVATAR_START = os.getenv("AVATAR_START", "background")
+AVATAR_ENABLED = AVATAR_START != "off" and bool(os.getenv("BEY_API_KEY"))
+
+def load_plugins() -> dict:
+    """Importiert nur die benötigten LiveKit Plugins (muss im Main-Thread laufen)"""
+    import importlib
+    names = ["anthropic", "elevenlabs"]
+    if not OUTPUT_ONLY:
+        names.append("noise_cancellation")
+    if AVATAR_ENABLED:
+        names.append("bey")  # Beyond Presence Avatar
+    return {name: importlib.import_module(f"livekit.plugins.{name}") for name in names}
+
 class AgentState(Enum):
     LISTENING = "listening"
     SOOTHING = "soothing" 
     COOLDOWN = "cooldown"
 
+# Längste akzeptierte Event-Zeile (Bytes); längere werden verworfen statt gepuffert
+MAX_EVENT_LINE = 65536
+
 class BabyCryEventListener:
     """Empfängt Events vom Baby-Cry-Detektor Service über TCP Socket"""
     
@@ -39,6 +100,15 @@ class BabyCryEventListener:
         self.on_cry_stopped = None
         self.on_status_update = None
         self.on_service_started = None
+        self.on_snapshot = None
+        
+        # Letzte gesehene Sequenznummer + Detektor-Instanz: nach einem Reconnect holt ein
+        # resync genau die verpassten Events nach (ein Round Trip statt auf status zu warten)
+        self.last_seq = 0
+        self.instance: Optional[str] = None
+        
+        # StageClock eines laufenden Profilings (None = aus)
+        self.stages = None
         
     def start_listening(self):
         """Startet das Lauschen auf Events"""
@@ -64,6 +134,9 @@ class BabyCryEventListener:
             self.client_socket.settimeout(None)
             self.client_socket.connect((self.host, self.port))
             print("✅ Verbindung zum Detektor-Service hergestellt")
+            if self.last_seq:
+                resync = {"type": "resync", "data": {"since": self.last_seq, "instance": self.instance}}
+                self.client_socket.sendall((json.dumps(resync) + "\n").encode("utf-8"))
             return True
         except (ConnectionRefusedError, socket.timeout) as e:
             print(f"⏳ Detektor-Service nicht verfügbar: {e}")
@@ -81,30 +154,53 @@ class BabyCryEventListener:
                     time.sleep(3)
                     continue
                 
-                socket_file = self.client_socket.makefile('r')
+                socket_file = self.client_socket.makefile('rb')
                 
                 while self.is_running:
                     try:
-                        line = socket_file.readline()
+                        line = socket_file.readline(MAX_EVENT_LINE)
                         if not line:
                             print("🔡 Verbindung zum Service unterbrochen")
                             break
+                        if len(line) >= MAX_EVENT_LINE and not line.endswith(b"\n"):
+                            # Übergroße Zeile: Rest bis zum Zeilenende verwerfen
+                            while line and not line.endswith(b"\n"):
+                                line = socket_file.readline(MAX_EVENT_LINE)
+                            print("⚠️ Übergroße Event-Zeile verworfen")
+                            continue
                         
                         line = line.strip()
                         if not line:
                             continue
                             
                         event = json.loads(line)
-                        self._handle_event(event)
+                        if not isinstance(event, dict) or not isinstance(event.get("data", {}), dict):
+                            print(f"⚠️ Ungültiges Event verworfen: {line[:80]!r}")
+                            continue
+                        seq = event.get("seq")
+                        if isinstance(seq, int) and event.get("type") != "replay":
+                            self.last_seq = seq
+                        stages = self.stages
+                        if stages:
+                            started = time.perf_counter()
+                            self._handle_event(event)
+                            stages.add("event_dispatch", time.perf_counter() - started)
+                        else:
+                            self._handle_event(event)
                         
-                    except json.JSONDecodeError as e:
+                    except ValueError as e:
+                        # Kaputtes JSON oder ungültiges UTF-8 - nur diese Zeile verwerfen
                         print(f"⚠️ JSON Decode Fehler: {e}")
                         continue
                     except socket.timeout:
                         continue
+                    except OSError as e:
+                        print(f"⚠️ Verbindungsfehler: {e}")
+                        break
                     except Exception as e:
+                        # Fehler in einem Callback trennt nicht die Verbindung
                         print(f"⚠️ Event Handling Fehler: {e}")
-                        break
+                        continue
             
             except Exception as e:
                 print(f"❌ TCP Listener Fehler: {e}")
@@ -124,12 +220,22 @@ class BabyCryEventListener:
     def _handle_event(self, event: dict):
         """Verarbeitet ein empfangenes Event"""
         event_type = event.get("type")
-        data = event.get("data", {})
+        data = event.get("data") or {}
         
         if event_type == "service_started":
             print("🎉 Detektor-Service gestartet")
             if self.on_service_started:
                 self.on_service_started(data)
+        elif event_type == "snapshot":
+            self.instance = data.get("instance")
+            if self.on_snapshot:
+                self.on_snapshot(data)
+        elif event_type == "replay":
+            # Nur Protokoll - den aktuellen Zustand hat der Snapshot schon gesetzt
+            events = data.get("events") or []
+            missed = ", ".join(sorted({e.get("type", "?") for e in events if isinstance(e, dict)}))
+            note = " (unvollständig)" if data.get("truncated") else ""
+            print(f"🔁 {len(events)} verpasste Events nachgeholt{note}{': ' + missed if missed else ''}")
         elif event_type == "cry_detected":
             if self.on_cry_detected:
                 self.on_cry_detected(data)
@@ -139,6 +245,13 @@ class BabyCryEventListener:
         elif event_type == "status":
             if self.on_status_update:
                 self.on_status_update(data)
+        elif event_type == "sound_detected":
+            # Weitere Alarm-Typen (Husten, Rauchmelder, ...) - nur melden, keine Beruhigung
+            print(f"🚨 Detektor meldet: {data.get('kind')} ({data.get('class')}, Prob: {data.get('probability', 0.0):.3f})")
+        elif event_type == "sound_stopped":
+            print(f"✅ Detektor: {data.get('kind')} vorbei")
+        elif event_type == "mode_changed":
+            print(f"🐢 Detektor-Modus: {data.get('previous')} -> {data.get('mode')} ({data.get('reason')})")
         elif event_type == "service_stopped":
             print("🔡 Detektor-Service wurde gestoppt")
 
@@ -185,9 +298,45 @@ class BabySoothingAssistant(Agent):
         self.event_listener.on_cry_detected = self._on_cry_detected
         self.event_listener.on_cry_stopped = self._on_cry_stopped
         self.event_listener.on_status_update = self._on_status_update
+        self.event_listener.on_snapshot = self._on_snapshot
         
         # Monitoring Task
         self.monitor_task: Optional[asyncio.Task] = None
+        
+        # CPU-Messung pro Session
+        self.cpu_meter: Optional[SessionCpuMeter] = None
+        
+        # TTS Router (ElevenLabs mit lokalem Fallback)
+        self.tts_router: Optional[TTSRouter] = None
+        
+        # Nacht-Statistiken aus Detektor- und Agent-Übergängen
+        self.night_summary = NightSummary(NIGHT_SUMMARY_PATH)
+        
+        # Zustands-Push an das Gateway (wird in entrypoint gesetzt)
+        self.state_publisher: Optional[StatePublisher] = None
+        self._published_state: Optional[AgentState] = None
+        
+        # Vorgenerierte Utterances (wird in entrypoint gesetzt)
+        self.utterance_pool: Optional[UtterancePool] = None
+        
+        # Session/Avatar-Bereitschaft (Detektor-Link läuft schon vorher)
+        self.session_ready = asyncio.Event()
+        self.avatar_ready = asyncio.Event()
+        self.avatar_starter = None  # Coroutine-Factory, gesetzt in entrypoint
+        self.avatar_task: Optional[asyncio.Task] = None
+        self.timeline: Optional[StartupTimeline] = None
+        
+        # Laufendes Profiling (start_profile, nur im Event Loop)
+        self.profiler: Optional[ProfileSession] = None
+        
+        # Playback Scheduler besitzt den Ausgabekanal
+        self._last_text: Optional[str] = None
+        self.scheduler = SoothingScheduler(
+            speak=self._speak_utterance,
+            pick_text=self._pick_soothing_text,
+            cadence=SOOTHING_CADENCE,
+            max_duration=SOOTHING_MAX_DURATION,
+        )
     
     def _on_service_started(self, data: dict):
         """Callback: Detektor-Service gestartet"""
@@ -198,73 +347,152 @@ class BabySoothingAssistant(Agent):
         """Callback: Baby-Schrei erkannt"""
         self.current_cry_probability = data.get("probability", 0.0)
         self.last_cry_time = time.time()
+        self.night_summary.cry_started(self.last_cry_time)
+        if self.timeline and "first_cry_event" not in dict(self.timeline.marks):
+            self.timeline.mark("first_cry_event")
         
         if self.state != AgentState.SOOTHING:
             self.state = AgentState.SOOTHING
+            self.night_summary.soothing_started(self.last_cry_time)
             print("👶🔊 Baby schreit! Starte Beruhigung...")
+            if self.main_loop:
+                self.main_loop.call_soon_threadsafe(self._publish_state)
             
-            # ✅ FIX: Async Task über Event Loop starten
+            # Scheduler läuft im Event Loop - kein Blockieren des Listener-Threads
             if self.main_loop and self.agent_session:
-                future = asyncio.run_coroutine_threadsafe(
-                    self._start_soothing(), 
-                    self.main_loop
-                )
-                # Optional: Future für Error Handling speichern
-                try:
-                    # Kurz warten um Fehler zu catchen
-                    future.result(timeout=0.1)
-                except asyncio.TimeoutError:
-                    # Normal - Task läuft noch
-                    pass
-                except Exception as e:
-                    print(f"❌ Fehler beim Starten der Beruhigung: {e}")
+                self.main_loop.call_soon_threadsafe(self.scheduler.start)
+                if AVATAR_START == "on_cry":
+                    self.main_loop.call_soon_threadsafe(self.ensure_avatar)
+    
+    def ensure_avatar(self):
+        """Startet den Avatar einmalig im Hintergrund (Event Loop)"""
+        if self.avatar_starter and self.avatar_task is None:
+            self.avatar_task = asyncio.create_task(self._start_avatar())
+    
+    async def _start_avatar(self):
+        print("👤 Starte Beyond Presence Avatar...")
+        try:
+            await self.session_ready.wait()
+            await self.avatar_starter()
+            self.avatar_ready.set()
+            if self.timeline:
+                self.timeline.mark("avatar_ready")
+            print("✅ Avatar gestartet!")
+        except Exception as e:
+            # Ohne Avatar geht die Stimme weiter direkt in den Room
+            print(f"❌ Avatar-Start fehlgeschlagen: {e}")
     
     def _on_cry_stopped(self, data: dict):
         """Callback: Baby-Schrei gestoppt"""
         self.current_cry_probability = data.get("probability", 0.0)
+        now = time.time()
+        self.night_summary.cry_stopped(now)
         
         if self.state == AgentState.SOOTHING:
             self.state = AgentState.COOLDOWN
+            self.night_summary.calmed(now)
             print(f"⏱️ Cooldown gestartet ({self.cooldown_duration}s)")
+            if self.main_loop:
+                self.main_loop.call_soon_threadsafe(self._publish_state)
+            print(self.night_summary.report())
+        
+        # Laufende Synthese und Wiedergabe sofort abbrechen
+        if self.main_loop:
+            self.main_loop.call_soon_threadsafe(self.scheduler.stop)
     
     def _on_status_update(self, data: dict):
         """Callback: Status Update vom Detektor"""
         self.current_cry_probability = data.get("probability", 0.0)
         self.service_connected = data.get("running", False)
     
-    async def _start_soothing(self):
-        """Startet Beruhigungs-Prozess"""
+    def _on_snapshot(self, data: dict):
+        """Callback: Zustand des Detektors direkt nach dem (Re-)Connect"""
+        self.service_connected = data.get("running", False)
+        self.current_cry_probability = data.get("probability", 0.0)
+        # Episode während der Trennung begonnen oder beendet: sofort nachziehen
+        if data.get("is_crying") and self.state != AgentState.SOOTHING:
+            print("🔁 Snapshot: Baby schreit bereits")
+            self._on_cry_detected({"probability": data.get("avg_probability", 0.0)})
+        elif not data.get("is_crying") and self.state == AgentState.SOOTHING:
+            print("🔁 Snapshot: Weinen ist vorbei")
+            self._on_cry_stopped({"probability": data.get("probability", 0.0)})
+    
+    def _pick_soothing_text(self) -> str:
+        """Wählt einen Beruhigungstext, nie zweimal hintereinander denselben"""
+        if self.utterance_pool:
+            # Reiner Lookup - kein LLM-Roundtrip im kritischen Pfad
+            return self.utterance_pool.take("soothing")
+        import random
+        candidates = [t for t in SOOTHING_TEXTS if t != self._last_text] or SOOTHING_TEXTS
+        self._last_text = random.choice(candidates)
+        return self._last_text
+    
+    async def _speak_utterance(self, text: str):
+        """Synthese + Wiedergabe einer Utterance (vom Scheduler aufgerufen)"""
         if not self.agent_session:
-            print("❌ Keine Agent Session verfügbar")
-            return
-            
-        print("👶 Starte Babyberuhigung...")
-        print("🔄 Verwende say() anstatt generate_reply()...")
+            raise RuntimeError("Keine Agent Session verfügbar")
         
-        try:
-            # Direkte TTS-Ausgabe ohne Claude (umgeht Konsistenz-Probleme)
-            soothing_texts = [
-                "Shh, shh... everything is okay, little one. I'm here with you.",
-                "There, there... you're safe and loved. Calm down, sweet baby.",
-                "Shh, shh... it's alright, it's alright. Everything will be better soon.",
-                "Rest now, little angel. You are so loved and protected.",
-                "Shh, shh... breathe gently. Everything is peaceful and calm."
-            ]
-            
-            import random
-            selected_text = random.choice(soothing_texts)
-            
-            print(f"🗣️ Sage: '{selected_text}'")
-            
+        # Schreie während des Starts: sprechen sobald die Session steht
+        if not self.session_ready.is_set():
+            await self.session_ready.wait()
+        if self.timeline and "first_utterance" not in dict(self.timeline.marks):
+            self.timeline.mark("first_utterance")
+        
+        profiler = self.profiler
+        started = time.perf_counter()
+        if self.tts_router:
+            # Router garantiert Audio innerhalb des Latenz-Budgets
+            result = await self.tts_router.route(text)
+            if profiler:
+                profiler.stages.add("tts_dispatch", time.perf_counter() - started)
+                started = time.perf_counter()
+            print(f"🗣️ Sage: '{text}' via {result.path} "
+                  f"({result.first_frame_latency * 1000:.0f}ms bis erstes Frame)")
+            for backend, error in result.errors.items():
+                print(f"⚠️ TTS-Backend {backend} fehlgeschlagen: {error}")
+            handle = self.agent_session.say(text, audio=result.audio)
+        else:
+            print(f"🗣️ Sage: '{text}'")
             # Verwende say() für direkten TTS ohne Claude
-            await self.agent_session.say(selected_text)
-            
-            print("✅ Beruhigungstext direkt an TTS gesendet!")
-            
-        except Exception as e:
-            print(f"❌ Fehler beim direkten TTS: {e}")
-            import traceback
-            traceback.print_exc()
+            handle = self.agent_session.say(text)
+        
+        try:
+            await handle
+        except asyncio.CancelledError:
+            # cry_stopped: Wiedergabe sofort unterbrechen
+            handle.interrupt()
+            print("🤫 Utterance abgebrochen")
+            raise
+        finally:
+            if profiler:
+                profiler.stages.add("playback", time.perf_counter() - started)
+    
+    def start_profile(self, mode: str, seconds: float):
+        """Profiling-Lauf starten (Signal-Handler im Event Loop); Dateien nach `seconds`"""
+        if self.profiler:
+            print("⚠️ Profiling läuft bereits")
+            return
+        loop = asyncio.get_running_loop()
+        self.profiler = ProfileSession(PROFILE_DIR, "agent", mode, seconds, loop=loop)
+        self.profiler.start()
+        self.event_listener.stages = self.profiler.stages
+        loop.call_later(seconds, self.finish_profile)
+        print(f"🔬 Profiling gestartet ({mode}, {seconds:.0f}s)")
+    
+    def finish_profile(self):
+        if not self.profiler:
+            return
+        profiler, self.profiler = self.profiler, None
+        self.event_listener.stages = None
+        paths = profiler.finish(f"Playback: {dict(self.scheduler.stats)}")
+        print(f"🔬 Profiling beendet: {', '.join(paths)}")
+    
+    def _publish_state(self):
+        """Zustandswechsel sofort an das Gateway (nur im Event Loop aufrufen)"""
+        if not self.state_publisher or self.state == self._published_state:
+            return
+        self._published_state = self.state
+        self.state_publisher.publish("agent_state", {"state": self.state.value})
     
     async def _monitor_state(self):
         """Überwacht Agent-Status und Cooldown"""
@@ -279,11 +507,26 @@ class BabySoothingAssistant(Agent):
                         self.state = AgentState.LISTENING
                         print("✅ Cooldown beendet. Zurück zum Lauschen...")
                 
+                # Gateway: Zustandswechsel + laufender Status (wird dort zusammengefasst)
+                if self.state_publisher:
+                    started = time.perf_counter()
+                    self._publish_state()
+                    self.state_publisher.publish("agent_status", {
+                        "state": self.state.value,
+                        "probability": self.current_cry_probability,
+                        "service_connected": self.service_connected,
+                        "playback": dict(self.scheduler.stats),
+                        "summary": self.night_summary.snapshot(current_time),
+                    })
+                    if self.profiler:
+                        self.profiler.stages.add("publish", time.perf_counter() - started)
+                
                 # Status-Log (alle 5 Sekunden)
                 if int(current_time) % 5 == 0:
                     prob = self.current_cry_probability
                     connected = "🔗" if self.service_connected else "❌"
-                    print(f"📊 Agent: {self.state.value} | Cry Prob: {prob:.3f} | Service: {connected}")
+                    cpu = f" | CPU: {self.cpu_meter.interval():.1f}%" if self.cpu_meter else ""
+                    print(f"📊 Agent: {self.state.value} | Cry Prob: {prob:.3f} | Service: {connected}{cpu}")
                 
                 await asyncio.sleep(1)
                 
@@ -291,73 +534,157 @@ class BabySoothingAssistant(Agent):
                 print(f"❌ Monitor Fehler: {e}")
                 await asyncio.sleep(5)
 
+def prewarm(proc: agents.JobProcess):
+    """Lädt die Plugins einmal pro Job-Prozess, bevor ein Job zugewiesen wird"""
+    start = time.perf_counter()
+    proc.userdata["plugins"] = load_plugins()
+    names = ", ".join(proc.userdata["plugins"])
+    print(f"🔌 Plugins geladen ({names}) in {(time.perf_counter() - start) * 1000:.0f}ms")
+
 async def entrypoint(ctx: agents.JobContext):
     """Agent Entry Point mit Avatar-Integration"""
     
+    timeline = StartupTimeline()
+    plugins = ctx.proc.userdata.get("plugins") or load_plugins()
+    anthropic = plugins["anthropic"]
+    elevenlabs = plugins["elevenlabs"]
+    cpu_meter = SessionCpuMeter("output-only" if OUTPUT_ONLY else "full-input")
+    print(f"🔍 DEBUG: Modus: {cpu_meter.label}")
+    
+    # Primäre TTS wird mit dem Router geteilt
+    primary_tts = elevenlabs.TTS(
+        model="eleven_turbo_v2_5",
+        voice_id="3IICiwgyAhgqNzRT14zX",  # Rachel - sanfte weibliche Stimme
+        streaming_latency=1
+    )
+    
+    # Claude: Begrüßung und Beruhigungstexte (Batch-Generierung für den Pool)
+    claude_llm = anthropic.LLM(
+        model="claude-sonnet-4-20250514",
+        temperature=0.3
+    )
+    
     # Agent Session für Baby-Beruhigung
     session = AgentSession(
-        stt=elevenlabs.STT(language_code="en"),  # ✅ Minimal STT für LiveKit Session
-        llm=anthropic.LLM(
-            model="claude-sonnet-4-20250514",
-            temperature=0.3
-        ),
-        tts=elevenlabs.TTS(
-            model="eleven_turbo_v2_5",
-            voice_id="3IICiwgyAhgqNzRT14zX",  # Rachel - sanfte weibliche Stimme
-            streaming_latency=1
-        ),
+        # Output-Only: kein STT, da Room-Audio nie ausgewertet wird
+        stt=None if OUTPUT_ONLY else elevenlabs.STT(language_code="en"),
+        llm=claude_llm,
+        tts=primary_tts,
         vad=None,  # ✅ Kein VAD - Agent reagiert nur auf TCP Events
         turn_detection=None,  # ✅ Keine Turn-Detection
     )
     print("🔍 DEBUG: AgentSession erstellt")
     
-    # ✅ Beyond Presence Avatar Session
-    avatar_session = bey.AvatarSession(
-        avatar_id="7c9ca52f-d4f7-46e1-a4b8-0c8655857cc3",  # Default Avatar ID
-        avatar_participant_name="Mom"
-    )
-    print("🔍 DEBUG: AvatarSession erstellt")
+    # ✅ Beyond Presence Avatar Session (nur wenn konfiguriert)
+    avatar_session = None
+    if AVATAR_ENABLED:
+        avatar_session = plugins["bey"].AvatarSession(
+            avatar_id="7c9ca52f-d4f7-46e1-a4b8-0c8655857cc3",  # Default Avatar ID
+            avatar_participant_name="Mom"
+        )
+        print("🔍 DEBUG: AvatarSession erstellt")
     
     # Baby Soothing Agent erstellen
     baby_agent = BabySoothingAssistant()
     baby_agent.agent_session = session
+    baby_agent.cpu_meter = cpu_meter
+    baby_agent.timeline = timeline
+    if avatar_session:
+        baby_agent.avatar_starter = lambda: avatar_session.start(agent_session=session, room=ctx.room)
+    
+    # Utterance-Pool: Seeds sofort verfügbar, Datei wird parallel geladen
+    baby_agent.utterance_pool = UtterancePool(
+        generate=LiveKitLLMGenerator(claude_llm),
+        seeds={"soothing": SOOTHING_TEXTS, "greeting": GREETING_TEXTS},
+        path=UTTERANCE_POOL_PATH,
+        refresh_interval=UTTERANCE_POOL_REFRESH,
+    )
     print("🔍 DEBUG: BabySoothingAssistant erstellt")
     
     # ✅ WICHTIG: Event Loop für Cross-Thread Communication speichern
-    baby_agent.main_loop = asyncio.get_event_loop()
-    print("🔍 DEBUG: Agent konfiguriert")
+    baby_agent.main_loop = asyncio.get_running_loop()
+    
+    # Detektor-Link zuerst: Schreie während des Starts gehen nicht verloren
+    print("🔡 Starte TCP Event Listener...")
+    baby_agent.event_listener.start_listening()
+    timeline.mark("detector_link_started")
+    
+    # Zustand an das WebSocket-Gateway pushen
+    if STATE_GATEWAY:
+        gateway_host, gateway_port = STATE_GATEWAY.rsplit(":", 1)
+        baby_agent.state_publisher = StatePublisher(gateway_host, int(gateway_port))
+        baby_agent.state_publisher.start()
+    
+    # Profiling auf Abruf (nur POSIX): ohne Signal kein Overhead
+    if hasattr(signal, "SIGUSR1"):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, baby_agent.start_profile, "cprofile", PROFILE_SECONDS)
+        loop.add_signal_handler(signal.SIGUSR2, baby_agent.start_profile, "sample", PROFILE_SECONDS)
+    
+    # State Monitor starten
+    baby_agent.monitor_task = asyncio.create_task(baby_agent._monitor_state())
     
     # Agent Session starten
-    await session.start(
-        room=ctx.room,
-        agent=baby_agent,
-        room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+    if OUTPUT_ONLY:
+        # Keine Audio-Subscription -> kein Decoding, keine BVC, keine Bandbreite für Input
+        room_input_options = RoomInputOptions(
+            audio_enabled=False,
+            text_enabled=False,
+            pre_connect_audio=False,
+        )
+    else:
+        room_input_options = RoomInputOptions(
+            noise_cancellation=plugins["noise_cancellation"].BVC(),
+        )
+    
+    def build_tts_router() -> TTSRouter:
+        # TTS Router: ElevenLabs -> gecachte Audio -> lokales Shush-Rauschen
+        audio_cache = CachedAudioBackend()
+        return TTSRouter(
+            primary=LiveKitTTSBackend("elevenlabs", primary_tts),
+            fallbacks=[audio_cache, ShushNoiseBackend(sample_rate=primary_tts.sample_rate)],
+            budget=TTS_LATENCY_BUDGET,
+            cache=audio_cache,
+        )
+    
+    # Unabhängige Schritte parallel: Session-Start (Netzwerk), Pool laden (Datei), Router (CPU)
+    _, _, baby_agent.tts_router = await asyncio.gather(
+        session.start(
+            room=ctx.room,
+            agent=baby_agent,
+            room_input_options=room_input_options,
         ),
+        asyncio.to_thread(baby_agent.utterance_pool.load),
+        asyncio.to_thread(build_tts_router),
     )
+    baby_agent.session_ready.set()
+    timeline.mark("session_started")
+    print("🍼 Baby Soothing Agent gestartet!")
     
-    # ✅ Avatar Session starten (nach Agent Session)
-    print("👤 Starte Beyond Presence Avatar...")
-    await avatar_session.start(
-        agent_session=session,
-        room=ctx.room
-    )
-    print("✅ Avatar gestartet!")
+    # Avatar nach dem Session-Start im Hintergrund (ersetzt dann die Audio-Ausgabe)
+    if AVATAR_START == "background":
+        baby_agent.ensure_avatar()
     
-    print("🍼 Baby Soothing Agent mit Avatar gestartet!")
-    print("🔡 Starte TCP Event Listener...")
+    # Audio-Cache im Hintergrund füllen, damit der Fallback echte Stimme hat
+    prefill_task = asyncio.create_task(baby_agent.tts_router.prefill(SOOTHING_TEXTS))
     
-    # TCP Event Listener starten
-    baby_agent.event_listener.start_listening()
+    # Pool im Hintergrund erneuern (abseits des kritischen Pfads)
+    baby_agent.utterance_pool.start_refresher()
     
-    # State Monitor starten
-    baby_agent.monitor_task = asyncio.create_task(baby_agent._monitor_state())
+    async def greet():
+        # Begrüßung möglichst über den Avatar, aber nie länger als 5s darauf warten
+        if baby_agent.avatar_task is not None:
+            try:
+                await asyncio.wait_for(baby_agent.avatar_ready.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+        # Über den Scheduler: ein Schrei während der Begrüßung bricht sie sofort ab
+        if baby_agent.scheduler.say_once(baby_agent.utterance_pool.take("greeting")) is None:
+            return  # Baby weint bereits - keine Begrüßung dazwischen
+        timeline.mark("greeting_sent")
+        print(timeline.report())
     
-    # Kurz warten und dann Begrüßung
-    await asyncio.sleep(2)
-    await session.generate_reply(
-        instructions="Introduce yourself briefly as Mom. You are here to sooth babies if they cry. Use a maximum of three sentences."
-    )
+    greet_task = asyncio.create_task(greet())
     
     try:
         # Läuft bis gestoppt
@@ -370,6 +697,24 @@ async def entrypoint(ctx: agents.JobContext):
         baby_agent.event_listener.stop_listening()
         if baby_agent.monitor_task:
             baby_agent.monitor_task.cancel()
+        prefill_task.cancel()
+        greet_task.cancel()
+        if baby_agent.state_publisher:
+            baby_agent.state_publisher.stop()
+        if baby_agent.avatar_task:
+            baby_agent.avatar_task.cancel()
+        baby_agent.utterance_pool.stop()
+        baby_agent.scheduler.stop()
+        baby_agent.finish_profile()
+        print(baby_agent.scheduler.summary())
+        print(baby_agent.night_summary.report())
+        baby_agent.night_summary.flush()
+        if baby_agent.tts_router:
+            print(baby_agent.tts_router.summary())
+        print(cpu_meter.report())
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    if "download-files" in sys.argv:
+        # Plugins müssen registriert sein, damit ihre Modelle heruntergeladen werden
+        load_plugins()
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+CPU-Messung pro Agent-Session
+Jeder LiveKit-Job läuft in einem eigenen Prozess, daher entspricht die
+Prozess-CPU-Zeit der CPU-Last einer Session.
+"""
+
+import os
+import time
+
+
+class SessionCpuMeter:
+    """Misst CPU-Zeit und Wall-Clock-Zeit einer Session"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.start_cpu = time.process_time()
+        self.start_wall = time.monotonic()
+        self.last_cpu = self.start_cpu
+        self.last_wall = self.start_wall
+
+    def total(self) -> dict:
+        """CPU-Verbrauch seit Session-Start"""
+        cpu = time.process_time() - self.start_cpu
+        wall = max(time.monotonic() - self.start_wall, 1e-9)
+        return {
+            "label": self.label,
+            "cpu_seconds": cpu,
+            "wall_seconds": wall,
+            "cpu_percent": 100.0 * cpu / wall,
+            "cpu_count": os.cpu_count() or 1,
+        }
+
+    def interval(self) -> float:
+        """CPU-Prozent seit dem letzten Aufruf"""
+        now_cpu = time.process_time()
+        now_wall = time.monotonic()
+        cpu = now_cpu - self.last_cpu
+        wall = max(now_wall - self.last_wall, 1e-9)
+        self.last_cpu = now_cpu
+        self.last_wall = now_wall
+        return 100.0 * cpu / wall
+
+    def report(self) -> str:
+        """Lesbare Zusammenfassung für die Logs"""
+        t = self.total()
+        return (f"📈 Session CPU [{t['label']}]: {t['cpu_seconds']:.2f}s CPU "
+                f"in {t['wall_seconds']:.1f}s ({t['cpu_percent']:.1f}%)")
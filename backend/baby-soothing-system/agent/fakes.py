@@ -0,0 +1,105 @@
+"""
+Lokale Fake-Komponenten zum Testen ohne Netzwerk und API-Keys
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator
+
+
+class FakeTTSBackend:
+    """Fake TTS mit einstellbarer Verzögerung und Fehlern"""
+
+    def __init__(self, name: str = "fake", delay: float = 0.0, fail: bool = False,
+                 frames: int = 5, frame_interval: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.frames = frames
+        self.frame_interval = frame_interval
+        self.calls = 0
+
+    async def synthesize(self, text: str) -> AsyncIterator:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name}: simulierter TTS-Ausfall")
+        for i in range(self.frames):
+            if i and self.frame_interval:
+                await asyncio.sleep(self.frame_interval)
+            yield f"{self.name}:{text}:{i}".encode()
+
+
+class FakeLLMGenerator:
+    """Fake LLM für den Utterance-Pool: liefert nummerierte Sätze ohne Netzwerk"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, kind: str, n: int):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("Fake LLM: simulierter Ausfall")
+        return [f"Fake {kind} utterance {self.calls}-{i}, shhh." for i in range(n)]
+
+
+class FakeSpeechHandle:
+    """Stand-in für SpeechHandle: await wartet die Sprechdauer ab, interrupt() bricht ab.
+    Wie bei LiveKit stoppt ein abgebrochenes await die Wiedergabe nicht - nur interrupt()."""
+
+    def __init__(self, session: "FakeAgentSession", text: str, duration: float):
+        self.session = session
+        self.text = text
+        self.interrupted = False
+        self.done = False
+        self._playout = asyncio.get_running_loop().create_task(asyncio.sleep(duration))
+        self._playout.add_done_callback(self._finish)
+        session.active += 1
+        session.max_active = max(session.max_active, session.active)
+
+    def _finish(self, _task):
+        if not self.done:
+            self.done = True
+            self.session.active -= 1
+
+    def interrupt(self):
+        if not self.done and not self.interrupted:
+            self.interrupted = True
+            self.session.interrupted += 1
+            self._playout.cancel()
+            self._finish(None)   # Wiedergabe endet sofort, nicht erst nach dem Task-Abbruch
+
+    async def _wait(self):
+        try:
+            await asyncio.shield(self._playout)
+        except asyncio.CancelledError:
+            if not self.interrupted:
+                raise
+
+    def __await__(self):
+        return self._wait().__await__()
+
+
+class FakeAgentSession:
+    """Stand-in für AgentSession: zählt Utterances, Überlappungen und Abbrüche"""
+
+    def __init__(self, speech_duration: float = 1.0):
+        self.speech_duration = speech_duration
+        self.said = []          # (time.time(), text)
+        self.active = 0         # gerade laufende Utterances
+        self.max_active = 0
+        self.interrupted = 0
+        self.handles = []
+
+    def say(self, text: str, audio=None, **kwargs) -> FakeSpeechHandle:
+        self.said.append((time.time(), text))
+        handle = FakeSpeechHandle(self, text, self.speech_duration)
+        self.handles.append(handle)
+        return handle
+
+    def dangling(self) -> int:
+        """Utterances, die weder fertig noch abgebrochen sind"""
+        return sum(1 for handle in self.handles if not handle.done)
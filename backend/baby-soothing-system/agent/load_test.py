@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Lastgenerator für den Event-Pfad des Agents
+Stand-in-Detektoren (TCP, newline JSON wie baby_cry_detector_service.py) spielen Szenarien
+über viele gleichzeitige Verbindungen ab. Auf der anderen Seite laufen echte
+BabySoothingAssistant-Instanzen (Listener-Thread, Scheduler, Zustandsmaschine) mit einer
+FakeAgentSession statt LiveKit.
+
+Gemessen werden
+- Latenz-Perzentile: Detektor-Zeitstempel -> Callback im Listener-Thread (dispatch)
+  -> Scheduler-Start/-Stopp im Event Loop (loop) -> erste Utterance (speech)
+- Durchsatz und Vollständigkeit (verloren, doppelt, falsche Reihenfolge, ungeplante Reconnects)
+- Zustandsmaschine: nie zwei Utterances gleichzeitig, nach cry_stopped keine laufende
+  Wiedergabe, Endzustand passend zum letzten Cry-Event
+
+Szenarien: steady, storm, flapping, malformed, drip, disconnect, mixed, replay:<events.jsonl>
+(Aufzeichnung eines echten Detektors z.B. mit `nc localhost 9999 > events.jsonl`)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fakes import FakeAgentSession
+
+SCENARIOS = ["steady", "storm", "flapping", "malformed", "drip", "disconnect", "mixed"]
+
+# Zeilen, die ein robuster Listener überlebt, ohne die Verbindung zu verlieren
+MALFORMED_LINES = [
+    b"not json at all",
+    b"{",
+    b"[1, 2, 3]",
+    b'"just a string"',
+    b"null",
+    b'{"type": 5}',
+    b'{"type": "cry_detected", "data": null}',
+    b'{"type": "status", "data": "probability=0.9"}',
+    b'{"type": "unknown_event", "data": {}}',
+    b"\xff\xfe\x00garbage",
+    b"",
+    b"   ",
+    b'{"type": "status", "data": {"probability": "' + b"x" * 200000 + b'"}}',
+]
+
+
+# --- Szenarien: Aktionen ("event", typ, data, drip) | ("raw", bytes) | ("sleep", s) | ("close", rest) ---
+
+def _status(rng: random.Random, crying: bool) -> dict:
+    probability = rng.uniform(0.6, 1.0) if crying else rng.uniform(0.0, 0.2)
+    return {"probability": probability, "is_crying": crying, "running": True}
+
+
+def scenario_steady(rng: random.Random, rate: float, duration: float, drip=None) -> Iterator[tuple]:
+    """Status-Events im Takt, ab und zu ein Schrei-Zyklus"""
+    crying = False
+    for _ in range(int(duration * rate)):
+        if rng.random() < 0.03:
+            crying = not crying
+            yield ("event", "cry_detected" if crying else "cry_stopped", {"probability": 0.9}, drip)
+        yield ("event", "status", _status(rng, crying), drip)
+        yield ("sleep", 1.0 / rate)
+
+
+def scenario_storm(rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    """Schrei-Sturm: cry_detected ohne Pause, selten ein cry_stopped dazwischen"""
+    for i in range(int(duration * rate)):
+        stop = i % 50 == 49
+        yield ("event", "cry_stopped" if stop else "cry_detected", {"probability": rng.uniform(0.5, 1.0)}, None)
+        yield ("sleep", 1.0 / rate)
+
+
+def scenario_flapping(rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    """Start/Stopp im Wechsel - jeder Stopp muss die laufende Utterance abbrechen"""
+    for i in range(int(duration * rate)):
+        yield ("event", "cry_detected" if i % 2 == 0 else "cry_stopped", {"probability": 0.7}, None)
+        yield ("sleep", 1.0 / rate)
+
+
+def scenario_malformed(rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    """Gültige Events, durchsetzt mit kaputten Zeilen"""
+    for i, action in enumerate(scenario_steady(rng, rate, duration)):
+        yield action
+        if action[0] == "event" and i % 3 == 0:
+            yield ("raw", rng.choice(MALFORMED_LINES) + b"\n")
+
+
+def scenario_disconnect(rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    """Verbindungsabbrüche, teils mitten in einer Zeile"""
+    for i, action in enumerate(scenario_steady(rng, rate, duration)):
+        yield action
+        if action[0] == "event" and i % 60 == 59:
+            yield ("close", b'{"type": "status", "da' if rng.random() < 0.5 else b"")
+
+
+def scenario_mixed(rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    """Zufällige Abschnitte aus allen Szenarien"""
+    chunk = 5.0
+    kinds = ["steady", "storm", "flapping", "malformed", "drip", "disconnect"]
+    for _ in range(max(1, int(duration / chunk))):
+        yield from make_scenario(rng.choice(kinds), rng, rate, chunk)
+
+
+def scenario_replay(path: str, speed: float) -> Iterator[tuple]:
+    """Aufgezeichnete Detektor-Events mit ihren Abständen abspielen (speed = Zeitraffer)"""
+    previous = None
+    with open(path) as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(event, dict) or "type" not in event:
+                continue
+            ts = event.get("timestamp")
+            if previous is not None and isinstance(ts, (int, float)):
+                yield ("sleep", max(0.0, ts - previous) / speed)
+            previous = ts if isinstance(ts, (int, float)) else previous
+            yield ("event", event["type"], dict(event.get("data") or {}), None)
+
+
+def make_scenario(name: str, rng: random.Random, rate: float, duration: float) -> Iterator[tuple]:
+    if name.startswith("replay:"):
+        return scenario_replay(name[len("replay:"):], speed=rate)
+    if name == "drip":
+        # Jede Zeile in 1-7-Byte-Stücken mit kleinen Pausen
+        return scenario_steady(rng, rate, duration, drip=(7, 0.002))
+    factories = {"steady": scenario_steady, "storm": scenario_storm, "flapping": scenario_flapping,
+                 "malformed": scenario_malformed, "disconnect": scenario_disconnect, "mixed": scenario_mixed}
+    if name not in factories:
+        raise ValueError(f"unbekanntes Szenario: {name}")
+    return factories[name](rng, rate, duration)
+
+
+class FakeDetectorServer:
+    """Ein simulierter Detektor: ein Szenario-Strom, der über Reconnects hinweg weiterläuft"""
+
+    def __init__(self, scenario: str, rate: float, duration: float, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.rng = random.Random(seed)
+        self.actions = make_scenario(scenario, self.rng, rate, duration)
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.seq = 0
+        self.sent: List[Tuple[int, str]] = []   # vollständig gesendete gültige Events (seq, typ)
+        self.connections = 0
+        self.planned_closes = 0
+        self.finished = asyncio.Event()
+        self._turn = asyncio.Lock()             # immer nur eine Verbindung liest aus dem Strom
+        self._writers = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+        for writer in list(self._writers):
+            writer.close()   # reader.read() endet mit EOF, der Handler räumt selbst auf
+        while self._writers:
+            await asyncio.sleep(0.01)
+
+    def _encode(self, event_type: str, data: dict) -> bytes:
+        self.seq += 1
+        data = dict(data, load_seq=self.seq)
+        event = {"type": event_type, "timestamp": time.time(), "data": data}
+        return (json.dumps(event) + "\n").encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        async with self._turn:
+            try:
+                writer.write(self._encode("service_started", {"message": "Fake detector"}))
+                self.sent.append((self.seq, "service_started"))
+                await writer.drain()
+                for action in self.actions:
+                    kind = action[0]
+                    if kind == "sleep":
+                        await asyncio.sleep(action[1])
+                    elif kind == "raw":
+                        writer.write(action[1])
+                        await writer.drain()
+                    elif kind == "close":
+                        self.planned_closes += 1
+                        writer.write(action[1])
+                        await writer.drain()
+                        return
+                    else:
+                        _, event_type, data, drip = action
+                        line = self._encode(event_type, data)
+                        if drip:
+                            max_chunk, delay = drip
+                            position = 0
+                            while position < len(line):
+                                size = self.rng.randint(1, max_chunk)
+                                writer.write(line[position:position + size])
+                                await writer.drain()
+                                position += size
+                                await asyncio.sleep(self.rng.uniform(0, delay))
+                        else:
+                            writer.write(line)
+                            await writer.drain()
+                        self.sent.append((self.seq, event_type))
+                self.finished.set()
+                await reader.read()   # offen bleiben bis der Agent trennt
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                self._writers.discard(writer)
+                writer.close()
+
+
+class ServerThread:
+    """Stand-in-Detektoren in einem eigenen Thread + Event Loop (misst nicht gegen den Agent-Loop)"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="fake-detectors", daemon=True)
+        self.thread.start()
+
+    def call(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def start_servers(self, count: int, scenario: str, rate: float, duration: float,
+                      seed: int) -> List[FakeDetectorServer]:
+        async def create():
+            servers = [FakeDetectorServer(scenario, rate, duration, seed + i) for i in range(count)]
+            for server in servers:
+                await server.start()
+            return servers
+        return self.call(create())
+
+    def wait_finished(self, servers: List[FakeDetectorServer], timeout: float) -> bool:
+        async def wait():
+            await asyncio.wait_for(asyncio.gather(*(s.finished.wait() for s in servers)), timeout)
+        try:
+            self.call(wait())
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stop(self, servers: List[FakeDetectorServer]):
+        async def close():
+            for server in servers:
+                await server.stop()
+        self.call(close(), timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class AgentProbe:
+    """Hängt sich an einen BabySoothingAssistant: Latenzen, empfangene Events, Zustandsfehler"""
+
+    def __init__(self, agent, session: FakeAgentSession):
+        self.agent = agent
+        self.session = session
+        self.received: List[int] = []                       # load_seq in Empfangsreihenfolge
+        self.latency: Dict[str, List[float]] = {"dispatch": [], "loop": [], "speech": []}
+        self.last_cry_event: Optional[str] = None
+        self._pending: Dict[str, float] = {}                # Event-Typ -> Detektor-Zeitstempel
+        self._speech_pending: Optional[float] = None
+        self.violations: List[str] = []
+
+        listener = agent.event_listener
+        for event_type, attribute in (("service_started", "on_service_started"),
+                                      ("cry_detected", "on_cry_detected"),
+                                      ("cry_stopped", "on_cry_stopped"),
+                                      ("status", "on_status_update")):
+            setattr(listener, attribute, self._wrap_callback(event_type, getattr(listener, attribute)))
+        # Detektor-Zeitstempel steckt im Event, die Callbacks bekommen nur data -> Event mitschneiden
+        original_handle = listener._handle_event
+
+        def handle_event(event: dict):
+            self._current_ts = event.get("timestamp")
+            original_handle(event)
+        listener._handle_event = handle_event
+        self._current_ts = None
+
+        scheduler = agent.scheduler
+        original_start, original_stop = scheduler.start, scheduler.stop
+
+        def start():
+            sent_at = self._loop_reached("cry_detected")
+            if not scheduler.is_active:
+                self._speech_pending = sent_at
+            original_start()
+
+        def stop():
+            self._loop_reached("cry_stopped")
+            original_stop()
+        scheduler.start, scheduler.stop = start, stop
+
+        original_say = session.say
+
+        def say(text, audio=None, **kwargs):
+            if self._speech_pending is not None:
+                self.latency["speech"].append(time.time() - self._speech_pending)
+                self._speech_pending = None
+            if session.active:
+                self.violations.append("Utterance gestartet, während eine andere läuft")
+            return original_say(text, audio=audio, **kwargs)
+        session.say = say
+
+    def _wrap_callback(self, event_type: str, callback):
+        def wrapped(data: dict):
+            now = time.time()
+            sent_at = self._current_ts
+            # cry_detected im Zustand SOOTHING startet keinen Scheduler
+            starts = event_type != "cry_detected" or self.agent.state.value != "soothing"
+            if isinstance(sent_at, (int, float)):
+                self.latency["dispatch"].append(now - sent_at)
+                if starts:
+                    # Ältestes noch nicht im Loop angekommenes Event zählt
+                    self._pending.setdefault(event_type, sent_at)
+            seq = data.get("load_seq")
+            if seq is not None:
+                self.received.append(seq)
+            if event_type in ("cry_detected", "cry_stopped"):
+                self.last_cry_event = event_type
+            if callback:
+                callback(data)
+        return wrapped
+
+    def _loop_reached(self, event_type: str) -> Optional[float]:
+        sent_at = self._pending.pop(event_type, None)
+        if sent_at is not None:
+            self.latency["loop"].append(time.time() - sent_at)
+        return sent_at
+
+    def check(self, server: FakeDetectorServer) -> List[str]:
+        """Vollständigkeit + Endzustand (nach dem Abklingen aufrufen)"""
+        from baby_soothing_agent import AgentState
+        problems = list(dict.fromkeys(self.violations))
+        expected = [seq for seq, _ in server.sent]
+        received = set(self.received)
+        lost = [seq for seq in expected if seq not in received]
+        duplicates = len(self.received) - len(received)
+        out_of_order = sum(1 for a, b in zip(self.received, self.received[1:]) if b < a)
+        if lost:
+            problems.append(f"{len(lost)} Events verloren (z.B. seq {lost[:5]})")
+        if duplicates:
+            problems.append(f"{duplicates} Events doppelt")
+        if out_of_order:
+            problems.append(f"{out_of_order} Events in falscher Reihenfolge")
+        unplanned = server.connections - 1 - server.planned_closes
+        if unplanned > 0:
+            problems.append(f"{unplanned} ungeplante Reconnects (Listener hat die Verbindung verworfen)")
+        if self.session.max_active > 1:
+            problems.append(f"bis zu {self.session.max_active} Utterances gleichzeitig")
+
+        agent = self.agent
+        if self.last_cry_event == "cry_stopped":
+            if agent.state == AgentState.SOOTHING:
+                problems.append("nach cry_stopped noch im Zustand SOOTHING")
+            if agent.scheduler.is_active:
+                problems.append("nach cry_stopped läuft der Scheduler weiter")
+            if self.session.dangling():
+                problems.append(f"nach cry_stopped {self.session.dangling()} Utterance(s) nicht abgebrochen")
+        elif self.last_cry_event == "cry_detected":
+            if agent.state != AgentState.SOOTHING:
+                problems.append(f"nach cry_detected im Zustand {agent.state.value}")
+            if not agent.scheduler.is_active:
+                problems.append("nach cry_detected läuft kein Scheduler")
+        return problems
+
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return "keine Messwerte"
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return (f"p50 {pick(0.50):.2f}ms | p95 {pick(0.95):.2f}ms | p99 {pick(0.99):.2f}ms | "
+            f"max {ordered[-1] * 1000:.2f}ms (n={len(ordered)})")
+
+
+async def run_load_test(args) -> bool:
+    # Nacht-Statistiken des Tests nicht in die echte Datei schreiben
+    work_dir = tempfile.mkdtemp(prefix="agent_load_")
+    os.environ["NIGHT_SUMMARY_PATH"] = os.path.join(work_dir, "night_summary.json")
+    import baby_soothing_agent as agent_module   # braucht die Agent-Umgebung (livekit)
+    from night_summary import NightSummary
+
+    loop = asyncio.get_running_loop()
+    servers_thread = ServerThread()
+    servers = servers_thread.start_servers(args.connections, args.scenario, args.rate, args.duration, args.seed)
+    print(f"🧪 Lasttest: {args.scenario}, {args.connections} Verbindungen, {args.rate:g} Events/s, {args.duration:g}s")
+
+    agents, probes = [], []
+    output = open(os.devnull, "w") if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        for i, server in enumerate(servers):
+            agent = agent_module.BabySoothingAssistant()
+            session = FakeAgentSession(args.speech)
+            agent.agent_session = session
+            agent.main_loop = loop
+            agent.session_ready.set()
+            agent.scheduler.cadence = args.cadence
+            agent.night_summary = NightSummary(os.path.join(work_dir, f"night_{i}.json"))
+            agent.event_listener.host, agent.event_listener.port = server.host, server.port
+            probes.append(AgentProbe(agent, session))
+            agent.monitor_task = loop.create_task(agent._monitor_state())
+            agent.event_listener.start_listening()
+            agents.append(agent)
+
+        started = time.monotonic()
+        # Reconnects des Listeners warten 3s -> großzügiges Timeout
+        timeout = args.duration * 3 + 30
+        all_finished = await asyncio.to_thread(servers_thread.wait_finished, servers, timeout)
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(args.settle)   # letzte Events + Abbruch laufender Utterances
+
+        problems: Dict[int, List[str]] = {}
+        for i, (probe, server) in enumerate(zip(probes, servers)):
+            found = probe.check(server)
+            if found:
+                problems[i] = found
+        if not all_finished:
+            problems[-1] = ["Szenario nicht innerhalb des Timeouts abgespielt"]
+
+        for agent in agents:
+            agent.event_listener.stop_listening()
+            agent.monitor_task.cancel()
+            agent.scheduler.stop()
+        servers_thread.stop(servers)
+        await asyncio.sleep(0.1)
+
+    sent = sum(len(server.sent) for server in servers)
+    received = sum(len(probe.received) for probe in probes)
+    print(f"📊 {sent} Events gesendet, {received} verarbeitet in {elapsed:.1f}s "
+          f"({received / max(elapsed, 1e-9):.0f} Events/s gesamt, "
+          f"{received / max(elapsed, 1e-9) / len(servers):.1f} pro Verbindung)")
+    for stage in ("dispatch", "loop", "speech"):
+        values = [value for probe in probes for value in probe.latency[stage]]
+        print(f"   {stage:<8} {percentiles(values)}")
+    utterances = sum(len(probe.session.said) for probe in probes)
+    interrupted = sum(probe.session.interrupted for probe in probes)
+    reconnects = sum(server.connections - 1 for server in servers)
+    print(f"   Utterances {utterances} ({interrupted} abgebrochen) | Reconnects {reconnects} "
+          f"(geplant {sum(server.planned_closes for server in servers)})")
+    if problems:
+        print("❌ Zustandsmaschine/Vollständigkeit:")
+        for index, found in sorted(problems.items()):
+            for problem in found:
+                print(f"   [{index if index >= 0 else '-'}] {problem}")
+        return False
+    print("✅ Keine Verletzungen")
+    return True
+
+
+async def serve(args):
+    """Nur der Stand-in-Detektor, z.B. für einen echten Agent (`--port 9999`)"""
+    server = FakeDetectorServer(args.scenario, args.rate, args.duration, args.seed, host="localhost", port=args.serve)
+    await server.start()
+    print(f"📡 Fake-Detektor ({args.scenario}) auf localhost:{server.port}")
+    await server.finished.wait()
+    print(f"✅ Szenario abgespielt: {len(server.sent)} Events, {server.connections} Verbindungen")
+    await asyncio.sleep(args.settle)
+    await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lastgenerator für den Event-Pfad des Agents")
+    parser.add_argument("--scenario", type=str, default="mixed",
+                        help=f"{', '.join(SCENARIOS)} oder replay:<events.jsonl>")
+    parser.add_argument("--connections", type=int, default=10, help="Gleichzeitige Detektor-Verbindungen (je ein Agent)")
+    parser.add_argument("--rate", type=float, default=20.0,
+                        help="Events pro Sekunde und Verbindung (replay: Zeitraffer-Faktor)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Sekunden pro Szenario")
+    parser.add_argument("--speech", type=float, default=0.5, help="Sprechdauer der FakeAgentSession pro Utterance")
+    parser.add_argument("--cadence", type=float, default=0.2, help="Pause zwischen Utterances")
+    parser.add_argument("--settle", type=float, default=1.0, help="Sekunden Abklingzeit vor der Prüfung")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quiet", action="store_true", help="Ausgaben der Agents unterdrücken")
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT",
+                        help="Nur den Fake-Detektor auf PORT starten (für einen echten Agent)")
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        asyncio.run(serve(args))
+        return
+    sys.exit(0 if asyncio.run(run_load_test(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
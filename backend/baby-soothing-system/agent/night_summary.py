@@ -0,0 +1,203 @@
+"""
+Inkrementelle Nacht-Statistiken
+Wird von den Bestätigungs-Events des Detektors (cry_detected/cry_stopped) und den
+SOOTHING/COOLDOWN-Übergängen des Agents gefüttert. Jedes Event kostet O(1):
+pro Nacht ein fester Satz Zähler, Wochenwerte über ein Fenster von 7 Nacht-Buckets.
+Eine "Nacht" läuft von 12:00 bis 12:00 Uhr.
+Gespeichert wird gebündelt in einem eigenen Thread (höchstens alle save_interval Sekunden),
+nie auf dem Listener-Thread des Detektors; flush() schreibt beim Beenden sofort.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+WEEK_NIGHTS = 7
+
+
+def night_key(timestamp: float) -> str:
+    """Nacht-Schlüssel: Datum des Abends (12:00 bis 12:00)"""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp - 12 * 3600))
+
+
+def _empty_bucket() -> dict:
+    return {
+        "episodes": 0,
+        "crying_seconds": 0.0,
+        "longest_seconds": 0.0,
+        "soothing_sessions": 0,
+        "calmed_sessions": 0,
+        "time_to_calm_total": 0.0,
+    }
+
+
+class NightSummary:
+    """O(1)-Aggregate pro Nacht und über die letzten 7 Nächte"""
+
+    def __init__(self, path: Optional[str] = "night_summary.json", save_interval: float = 5.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self._write_lock = threading.Lock()      # Writer-Thread und flush() nie gleichzeitig
+        self._dirty = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self.nights: Dict[str, dict] = {}   # höchstens WEEK_NIGHTS Einträge
+        self.lifetime = _empty_bucket()
+        self.cry_started_at: Optional[float] = None
+        self.soothing_started_at: Optional[float] = None
+        if path:
+            self._load()
+
+    # --- Event-Eingänge (Detektor) ---
+
+    def cry_started(self, ts: Optional[float] = None):
+        ts = ts or time.time()
+        with self.lock:
+            if self.cry_started_at is not None:
+                return  # doppeltes cry_detected - Episode läuft bereits
+            self.cry_started_at = ts
+            self._add(ts, "episodes", 1)
+            self._save()
+
+    def cry_stopped(self, ts: Optional[float] = None):
+        ts = ts or time.time()
+        with self.lock:
+            if self.cry_started_at is None:
+                return
+            duration = ts - self.cry_started_at
+            self.cry_started_at = None
+            self._add(ts, "crying_seconds", duration)
+            self._max(ts, "longest_seconds", duration)
+            self._save()
+
+    # --- Event-Eingänge (Agent-Zustand) ---
+
+    def soothing_started(self, ts: Optional[float] = None):
+        ts = ts or time.time()
+        with self.lock:
+            self.soothing_started_at = ts
+            self._add(ts, "soothing_sessions", 1)
+
+    def calmed(self, ts: Optional[float] = None):
+        """SOOTHING -> COOLDOWN: Baby hat sich beruhigt"""
+        ts = ts or time.time()
+        with self.lock:
+            if self.soothing_started_at is None:
+                return
+            self._add(ts, "calmed_sessions", 1)
+            self._add(ts, "time_to_calm_total", ts - self.soothing_started_at)
+            self.soothing_started_at = None
+            self._save()
+
+    # --- Aggregation ---
+
+    def _bucket(self, ts: float) -> dict:
+        key = night_key(ts)
+        bucket = self.nights.get(key)
+        if bucket is None:
+            bucket = self.nights[key] = _empty_bucket()
+            # Fenster auf 7 Nächte begrenzen (Schlüssel sind sortierbar)
+            while len(self.nights) > WEEK_NIGHTS:
+                del self.nights[min(self.nights)]
+        return bucket
+
+    def _add(self, ts: float, field: str, value: float):
+        self._bucket(ts)[field] += value
+        self.lifetime[field] += value
+
+    def _max(self, ts: float, field: str, value: float):
+        bucket = self._bucket(ts)
+        bucket[field] = max(bucket[field], value)
+        self.lifetime[field] = max(self.lifetime[field], value)
+
+    @staticmethod
+    def _view(bucket: dict, ongoing: float = 0.0) -> dict:
+        crying = bucket["crying_seconds"] + ongoing
+        calmed = bucket["calmed_sessions"]
+        return {
+            "episodes": bucket["episodes"],
+            "crying_minutes": crying / 60.0,
+            "longest_minutes": max(bucket["longest_seconds"], ongoing) / 60.0,
+            "soothing_sessions": bucket["soothing_sessions"],
+            "mean_time_to_calm_seconds": bucket["time_to_calm_total"] / calmed if calmed else None,
+        }
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """Sofortige Abfrage für das Dashboard - unabhängig von der Länge der Historie"""
+        now = now or time.time()
+        with self.lock:
+            ongoing = now - self.cry_started_at if self.cry_started_at is not None else 0.0
+            tonight_key = night_key(now)
+            tonight = self.nights.get(tonight_key, _empty_bucket())
+
+            oldest_key = night_key(now - (WEEK_NIGHTS - 1) * 86400)
+            week = _empty_bucket()
+            for key, bucket in self.nights.items():   # höchstens 7 Buckets
+                if key < oldest_key:
+                    continue
+                for field in week:
+                    if field == "longest_seconds":
+                        week[field] = max(week[field], bucket[field])
+                    else:
+                        week[field] += bucket[field]
+            return {
+                "night": tonight_key,
+                "crying_now": self.cry_started_at is not None,
+                "tonight": self._view(tonight, ongoing),
+                "week": self._view(week, ongoing),
+                "lifetime": self._view(self.lifetime, ongoing),
+            }
+
+    # --- Persistenz (konstante Größe) ---
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.nights = state.get("nights", {})
+            self.lifetime.update(state.get("lifetime", {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Nacht-Statistik unlesbar, starte neu: {e}")
+
+    def _save(self):
+        """Speichern vormerken (unter self.lock aufgerufen) - keine Datei-I/O im Event-Pfad"""
+        if not self.path:
+            return
+        self._dirty.set()
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="night-summary", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.save_interval)   # Events eines Intervalls bündeln
+            self.flush()
+
+    def flush(self):
+        """Vorgemerkten Stand jetzt schreiben (Writer-Thread und beim Beenden)"""
+        with self._write_lock:
+            if not self.path or not self._dirty.is_set():
+                return
+            self._dirty.clear()
+            with self.lock:
+                state = json.dumps({"nights": self.nights, "lifetime": self.lifetime})
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(state)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Nacht-Statistik konnte nicht gespeichert werden: {e}")
+
+    def report(self) -> str:
+        tonight = self.snapshot()["tonight"]
+        calm = tonight["mean_time_to_calm_seconds"]
+        calm_text = f"{calm:.0f}s" if calm is not None else "-"
+        return (f"🌙 Heute Nacht: {tonight['episodes']} Episoden, "
+                f"{tonight['crying_minutes']:.1f} min Weinen, längste {tonight['longest_minutes']:.1f} min, "
+                f"Ø Beruhigung {calm_text}")
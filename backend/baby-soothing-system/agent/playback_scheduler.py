@@ -0,0 +1,169 @@
+"""
+Playback Scheduler für Beruhigungs-Utterances
+Besitzt den Ausgabekanal: spricht wiederholt im eingestellten Takt solange das
+Baby weint, überlappt nie und bricht Synthese + Wiedergabe bei cry_stopped sofort ab.
+Einzelne Utterances außerhalb der Beruhigung (Begrüßung) laufen über denselben Kanal
+(say_once) und werden von einer startenden Beruhigung sofort verdrängt.
+Alle Methoden laufen im Event Loop des Agents (Thread-Aufrufer nutzen call_soon_threadsafe).
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class SoothingScheduler:
+    """Wiederholt Utterances im Takt, genau eine gleichzeitig, sofort abbrechbar"""
+
+    def __init__(self,
+                 speak: Callable[[str], Awaitable],
+                 pick_text: Callable[[], str],
+                 cadence: float = 3.0,
+                 max_duration: float = 600.0):
+        self.speak = speak              # Coroutine: Synthese + Wiedergabe einer Utterance
+        self.pick_text = pick_text
+        self.cadence = cadence          # Pause zwischen zwei Utterances (Sekunden)
+        self.max_duration = max_duration  # Sicherheitslimit falls cry_stopped nie kommt
+
+        self.run_task: Optional[asyncio.Task] = None
+        self.oneshot_task: Optional[asyncio.Task] = None
+        self.current_task: Optional[asyncio.Task] = None
+        self.current_text: Optional[str] = None
+        self.stats: Dict[str, float] = {
+            "utterances": 0,
+            "cancelled": 0,
+            "failed": 0,
+            "chars": 0,
+            "seconds": 0.0,
+        }
+
+    @property
+    def is_active(self) -> bool:
+        return self.run_task is not None and not self.run_task.done()
+
+    def start(self):
+        """Startet die Beruhigung (idempotent - laufende Runde wird nicht dupliziert);
+        eine laufende Einzel-Utterance wird abgebrochen"""
+        if self.is_active:
+            return
+        preempted = self._cancel_oneshot()
+        self.run_task = asyncio.get_running_loop().create_task(self._run(preempted))
+
+    def say_once(self, text: str) -> Optional[asyncio.Task]:
+        """Einzelne Utterance über denselben Kanal; nur wenn gerade nichts gesprochen wird
+        (None = verworfen). start() und stop() brechen sie ab"""
+        if self.is_active or (self.oneshot_task and not self.oneshot_task.done()):
+            return None
+        self.oneshot_task = asyncio.get_running_loop().create_task(self._speak_once(text))
+        return self.oneshot_task
+
+    def stop(self):
+        """Stoppt sofort - laufende Synthese und Wiedergabe werden abgebrochen"""
+        if self.run_task and not self.run_task.done():
+            self.run_task.cancel()
+        self._cancel_oneshot()
+        if self.current_task and not self.current_task.done():
+            self.current_task.cancel()
+
+    def _cancel_oneshot(self) -> Optional[asyncio.Task]:
+        task = self.oneshot_task
+        if task is None or task.done():
+            return None
+        task.cancel()
+        return task
+
+    async def _speak_once(self, text: str):
+        try:
+            await self._speak_one(text)
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self, preempted: Optional[asyncio.Task] = None):
+        started = time.monotonic()
+        try:
+            if preempted:
+                # Abgebrochene Einzel-Utterance erst ganz beenden - nie zwei gleichzeitig
+                await asyncio.gather(preempted, return_exceptions=True)
+            while time.monotonic() - started < self.max_duration:
+                text = self.pick_text()
+                await self._speak_one(text)
+                await asyncio.sleep(self.cadence)
+            print(f"⏹️ Beruhigung nach {self.max_duration:.0f}s Sicherheitslimit beendet")
+        except asyncio.CancelledError:
+            pass
+
+    async def _speak_one(self, text: str):
+        """Eine Utterance - nie parallel zu einer anderen"""
+        self.current_text = text
+        self.current_task = task = asyncio.get_running_loop().create_task(self.speak(text))
+        start = time.monotonic()
+        try:
+            await task
+            self.stats["utterances"] += 1
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            if not task.done():
+                task.cancel()
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ Fehler bei Utterance: {e}")
+        finally:
+            # Zeichen und Sekunden auch für abgebrochene Utterances zählen (TTS-Kosten)
+            self.stats["chars"] += len(text)
+            self.stats["seconds"] += time.monotonic() - start
+            if self.current_task is task:
+                self.current_task = None
+                self.current_text = None
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"🗣️ Playback: {s['utterances']} gesprochen, {s['cancelled']} abgebrochen, "
+                f"{s['failed']} fehlgeschlagen | {s['chars']} Zeichen, {s['seconds']:.1f}s")
+
+
+async def _selftest():
+    """Wiederholung, keine Überlappung, sofortiger Abbruch"""
+    active = 0
+    max_active = 0
+
+    async def fake_speak(text):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            active -= 1
+
+    scheduler = SoothingScheduler(fake_speak, lambda: "Shh", cadence=0.05)
+    scheduler.start()
+    scheduler.start()  # doppelter Start darf nicht überlappen
+    await asyncio.sleep(0.6)
+    assert scheduler.stats["utterances"] >= 2, scheduler.stats
+    stop_at = time.monotonic()
+    scheduler.stop()
+    await asyncio.sleep(0)
+    await asyncio.gather(scheduler.run_task, return_exceptions=True)
+    assert time.monotonic() - stop_at < 0.05
+    assert active == 0 and max_active == 1, (active, max_active)
+
+    # Begrüßung läuft, Schrei kommt: Begrüßung sofort abbrechen, dann Beruhigung ohne Überlappung
+    greeting = scheduler.say_once("Hello")
+    await asyncio.sleep(0.05)
+    assert active == 1 and scheduler.say_once("Hello again") is None
+    scheduler.start()
+    await asyncio.sleep(0.05)
+    assert greeting.done() and scheduler.is_active and max_active == 1, (active, max_active)
+    scheduler.stop()
+    await asyncio.gather(scheduler.run_task, return_exceptions=True)
+    assert scheduler.say_once("Hello") is not None
+    scheduler.stop()
+    await asyncio.gather(scheduler.oneshot_task, return_exceptions=True)
+    assert active == 0 and max_active == 1, (active, max_active)
+    print(scheduler.summary())
+    print("✅ Playback-Scheduler Selbsttest bestanden")
+
+
+if __name__ == "__main__":
+    asyncio.run(_selftest())
@@ -0,0 +1,242 @@
+"""
+Profiling auf Abruf für den laufenden Agent (kein Neustart unter einem Profiler)
+- cProfile: zeitlich begrenzt, nur der Event-Loop-Thread, dazu langsame asyncio-Callbacks
+  (Debug-Modus des Loops nur für die Dauer des Laufs)
+- Stack-Sampler: alle N ms die Stacks aller Threads (Folded-Format für Flamegraphs)
+- Zeit pro Stage (event_dispatch, tts_dispatch, playback, publish)
+- Ausgabe: agent-<zeit>.prof (pstats), .txt (Stages, langsame Callbacks, Top-Funktionen), .folded
+
+Gleiche Formate wie detector/profiling.py (eigene Kopie, weil Agent und Detektor in getrennten
+Umgebungen laufen). Ohne laufende Session existiert kein Profiler-Objekt.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+MODES = ("cprofile", "sample")
+
+
+class StageClock:
+    """Summiert Zeit pro Stage (auch aus dem Listener-Thread)"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def report(self, wall: float) -> str:
+        lines = [f"{'Stage':<14} {'gesamt ms':>10} {'n':>7} {'ms/Aufruf':>10} {'% Wall':>7}"]
+        for stage, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+            count = self.counts[stage]
+            lines.append(f"{stage:<14} {total * 1000:>10.1f} {count:>7} {total * 1000 / count:>10.2f} "
+                         f"{100 * total / max(wall, 1e-9):>6.1f}%")
+        return "\n".join(lines)
+
+
+class StackSampler:
+    """Sampelt periodisch die Stacks aller Threads (außer dem eigenen)"""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        """Folded-Stacks (flamegraph.pl, speedscope)"""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n: int = 15) -> str:
+        """Häufigste innerste Frames (Self-Time) als Text"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = max(1, sum(leaves.values()))
+        return "\n".join(f"{100 * count / total:6.1f}%  {frame}" for frame, count in leaves.most_common(n))
+
+
+class SlowCallbackMonitor(logging.Handler):
+    """Sammelt asyncio-Warnungen "Executing <Handle ...> took X seconds" während des Laufs"""
+
+    _PATTERN = re.compile(r"Executing (.*) took ([\d.]+) seconds")
+    _ADDRESS = re.compile(r" at 0x[0-9a-f]+|<Task pending name='[^']*'|id=\d+")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float = 0.05):
+        super().__init__(logging.WARNING)
+        self.loop = loop
+        self.threshold = threshold
+        self.slow: Dict[str, List[float]] = {}
+        self._saved = None
+
+    def start(self):
+        logger = logging.getLogger("asyncio")
+        self._saved = (self.loop.get_debug(), self.loop.slow_callback_duration, logger.level)
+        self.loop.slow_callback_duration = self.threshold
+        self.loop.set_debug(True)
+        if logger.level == logging.NOTSET or logger.level > logging.WARNING:
+            logger.setLevel(logging.WARNING)
+        logger.addHandler(self)
+
+    def stop(self):
+        logger = logging.getLogger("asyncio")
+        logger.removeHandler(self)
+        debug, duration, level = self._saved
+        self.loop.set_debug(debug)
+        self.loop.slow_callback_duration = duration
+        logger.setLevel(level)
+
+    def emit(self, record: logging.LogRecord):
+        match = self._PATTERN.search(record.getMessage())
+        if match:
+            # Adressen/IDs entfernen, damit gleiche Callbacks zusammengefasst werden
+            callback = self._ADDRESS.sub("", match.group(1))[:200]
+            self.slow.setdefault(callback, []).append(float(match.group(2)))
+
+    def report(self, n: int = 15) -> str:
+        if not self.slow:
+            return f"Keine Callbacks über {self.threshold * 1000:.0f}ms"
+        lines = [f"Langsame Callbacks (> {self.threshold * 1000:.0f}ms):",
+                 f"{'n':>5} {'max ms':>8} {'gesamt ms':>10}  Callback"]
+        ranked = sorted(self.slow.items(), key=lambda item: -sum(item[1]))
+        for callback, durations in ranked[:n]:
+            lines.append(f"{len(durations):>5} {max(durations) * 1000:>8.0f} {sum(durations) * 1000:>10.0f}  {callback}")
+        return "\n".join(lines)
+
+
+class ProfileSession:
+    """Ein zeitlich begrenzter Profiling-Lauf; start() im Event-Loop-Thread aufrufen"""
+
+    def __init__(self, out_dir: str, name: str, mode: str = "cprofile", seconds: float = 30.0,
+                 loop: Optional[asyncio.AbstractEventLoop] = None, sample_interval: float = 0.01):
+        if mode not in MODES:
+            raise ValueError(f"mode muss einer von {MODES} sein")
+        self.out_dir = out_dir
+        self.name = name
+        self.mode = mode
+        self.seconds = seconds
+        self.loop = loop
+        self.stages = StageClock()
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[StackSampler] = None
+        self.slow_callbacks: Optional[SlowCallbackMonitor] = None
+        self.sample_interval = sample_interval
+        self.started = 0.0
+
+    def start(self):
+        self.started = time.monotonic()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            if self.loop:
+                self.slow_callbacks = SlowCallbackMonitor(self.loop)
+                self.slow_callbacks.start()
+        else:
+            self.sampler = StackSampler(self.sample_interval)
+            self.sampler.start()
+
+    def finish(self, extra: str = "") -> List[str]:
+        """Profiler stoppen und Dateien schreiben; liefert die Pfade"""
+        if self.profile:
+            self.profile.disable()
+        if self.slow_callbacks:
+            self.slow_callbacks.stop()
+        if self.sampler:
+            self.sampler.stop()
+        wall = time.monotonic() - self.started
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.mode}")
+        paths = []
+
+        sections = [f"{self.name}: {self.mode}, {wall:.1f}s", "", self.stages.report(wall)]
+        if self.slow_callbacks:
+            sections += ["", self.slow_callbacks.report()]
+        if extra:
+            sections += ["", extra]
+        if self.profile:
+            self.profile.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(40)
+            sections += ["", text.getvalue()]
+        if self.sampler:
+            self.sampler.write(base + ".folded")
+            paths.append(base + ".folded")
+            sections += ["", f"{self.sampler.samples} Samples à {self.sample_interval * 1000:.0f}ms, "
+                             f"häufigste Frames:", self.sampler.top()]
+        with open(base + ".txt", "w") as f:
+            f.write("\n".join(sections) + "\n")
+        paths.insert(0, base + ".txt")
+        return paths
+
+
+async def _selftest():
+    """Blockierender Callback + Stage-Zeiten landen in der Ausgabe"""
+    import tempfile
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory() as out_dir:
+        for mode in MODES:
+            session = ProfileSession(out_dir, "agent", mode, seconds=0.5, loop=loop)
+            session.start()
+            for _ in range(3):
+                started = time.perf_counter()
+                time.sleep(0.08)   # blockiert den Loop
+                session.stages.add("tts_dispatch", time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+            paths = session.finish()
+            with open(paths[0]) as f:
+                text = f.read()
+            assert "tts_dispatch" in text, text
+            if mode == "cprofile":
+                assert "_selftest" in text and "Langsame Callbacks" in text, text
+                assert not loop.get_debug(), "Debug-Modus nicht zurückgesetzt"
+            else:
+                assert session.sampler.samples > 0
+            print(f"✅ {mode}: {', '.join(os.path.basename(p) for p in paths)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_selftest())
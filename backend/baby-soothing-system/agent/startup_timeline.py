@@ -0,0 +1,26 @@
+"""
+Startup-Timeline für Agent-Jobs
+Protokolliert, wann welcher Startschritt relativ zum Job-Start fertig war.
+"""
+
+import time
+from typing import List, Tuple
+
+
+class StartupTimeline:
+    """Sammelt Zeitmarken relativ zum Job-Start"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, step: str) -> float:
+        elapsed = time.monotonic() - self.start
+        self.marks.append((step, elapsed))
+        print(f"⏱️ [+{elapsed * 1000:6.0f}ms] {step}")
+        return elapsed
+
+    def report(self) -> str:
+        lines = ["🧭 Startup-Timeline:"]
+        lines += [f"   +{elapsed * 1000:6.0f}ms  {step}" for step, elapsed in self.marks]
+        return "\n".join(lines)
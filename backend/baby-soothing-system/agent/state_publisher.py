@@ -0,0 +1,59 @@
+"""
+Agent-Zustand an das WebSocket-Gateway pushen
+Newline-JSON über TCP, gleiches Format wie die Detektor-Events. publish() blockiert nie:
+ist das Gateway nicht erreichbar, werden Nachrichten verworfen und es wird neu verbunden.
+"""
+
+import asyncio
+import json
+import time
+from typing import Optional
+
+
+class StatePublisher:
+    """Fire-and-forget Publisher mit Reconnect (läuft im Event Loop des Agents)"""
+
+    def __init__(self, host: str = "localhost", port: int = 9998, max_queue: int = 100):
+        self.host = host
+        self.port = port
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_queue)
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.dropped = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    def publish(self, event_type: str, data: dict):
+        """Nicht-blockierend; ohne Verbindung wird verworfen"""
+        if not self.connected:
+            return
+        try:
+            self.queue.put_nowait({"type": event_type, "timestamp": time.time(), "data": data})
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self):
+        warned = False
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                self.connected = True
+                warned = False
+                print(f"🌐 Mit Gateway verbunden ({self.host}:{self.port})")
+                while True:
+                    event = await self.queue.get()
+                    writer.write((json.dumps(event) + "\n").encode("utf-8"))
+                    await writer.drain()
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                if not warned:
+                    print(f"⏳ Gateway nicht erreichbar ({e}) - versuche es weiter im Hintergrund")
+                    warned = True
+            self.connected = False
+            await asyncio.sleep(3)
@@ -0,0 +1,251 @@
+"""
+TTS Router mit Latenz-Budget
+Startet die primäre TTS (ElevenLabs). Kommt innerhalb des Budgets kein erstes
+Audio-Frame an, wird parallel auf lokale Backends (Audio-Cache, Shush-Rauschen)
+ausgewichen. Das erste Backend mit einem Frame gewinnt, der Rest wird abgebrochen.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+
+@dataclass
+class RouteResult:
+    """Ergebnis einer Routing-Entscheidung"""
+    text: str
+    path: str                     # Name des Backends, das gewonnen hat
+    first_frame_latency: float    # Sekunden bis zum ersten Frame
+    audio: AsyncIterator          # Frames inkl. erstem Frame
+    errors: Dict[str, str]        # Backends, die fehlgeschlagen sind
+
+
+class LiveKitTTSBackend:
+    """Adapter für ein LiveKit TTS Plugin (z.B. elevenlabs.TTS)"""
+
+    def __init__(self, name: str, tts):
+        self.name = name
+        self.tts = tts
+
+    async def synthesize(self, text: str) -> AsyncIterator:
+        async with self.tts.synthesize(text) as stream:
+            async for ev in stream:
+                yield ev.frame
+
+
+class CachedAudioBackend:
+    """Lokaler Cache bereits synthetisierter Utterances (sofort verfügbar)"""
+
+    def __init__(self, name: str = "cache", max_entries: int = 32):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries: Dict[str, list] = {}
+
+    def put(self, text: str, frames: list):
+        if not frames:
+            return
+        if text not in self.entries and len(self.entries) >= self.max_entries:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[text] = frames
+
+    async def synthesize(self, text: str) -> AsyncIterator:
+        # Beruhigungstexte sind austauschbar - notfalls eine andere gecachte Utterance
+        frames = self.entries.get(text)
+        if frames is None:
+            if not self.entries:
+                raise LookupError("Audio-Cache ist leer")
+            frames = random.choice(list(self.entries.values()))
+        for frame in frames:
+            yield frame
+
+
+class ShushNoiseBackend:
+    """Lokal erzeugtes, sanftes Shush-Rauschen - letzte Rückfallebene ohne Netzwerk"""
+
+    def __init__(self,
+                 name: str = "shush",
+                 sample_rate: int = 24000,
+                 duration: float = 4.0,
+                 frame_ms: int = 100,
+                 frame_factory: Optional[Callable] = None):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.frame_ms = frame_ms
+        self.frame_factory = frame_factory or self._livekit_frame
+        # Vorab berechnen, damit der Notfallpfad selbst keine Latenz hat
+        self._pcm = self._render()
+
+    def _livekit_frame(self, data: bytes, sample_rate: int, samples: int):
+        from livekit import rtc
+        return rtc.AudioFrame(data=data, sample_rate=sample_rate,
+                              num_channels=1, samples_per_channel=samples)
+
+    def _render(self) -> bytes:
+        """Rosa-ähnliches Rauschen mit "shh... shh..." Hüllkurve (einmalig berechnet)"""
+        import numpy as np
+        n = int(self.sample_rate * self.duration)
+        noise = np.random.default_rng().standard_normal(n).astype(np.float32)
+        # Einfacher Tiefpass für weicheres Rauschen
+        noise = np.convolve(noise, np.ones(8, dtype=np.float32) / 8, mode="same")
+        t = np.arange(n, dtype=np.float32) / self.sample_rate
+        envelope = 0.5 - 0.5 * np.cos(2 * np.pi * t / 1.0)  # ein "shh" pro Sekunde
+        pcm = np.clip(noise * envelope * 0.15, -1.0, 1.0)
+        return (pcm * 32767).astype(np.int16).tobytes()
+
+    async def synthesize(self, text: str) -> AsyncIterator:
+        samples = self.sample_rate * self.frame_ms // 1000
+        step = samples * 2
+        for offset in range(0, len(self._pcm), step):
+            chunk = self._pcm[offset:offset + step]
+            yield self.frame_factory(chunk, self.sample_rate, len(chunk) // 2)
+
+
+class TTSRouter:
+    """Hedged TTS: primäre TTS mit Latenz-Budget, lokale Backends als Absicherung"""
+
+    def __init__(self,
+                 primary,
+                 fallbacks: List,
+                 budget: float = 0.8,
+                 cache: Optional[CachedAudioBackend] = None,
+                 history_size: int = 100):
+        self.primary = primary
+        self.fallbacks = fallbacks
+        self.budget = budget
+        self.cache = cache
+        self.stats: Dict[str, int] = {}
+        self.history: deque = deque(maxlen=history_size)
+
+    async def _first_frame(self, backend, text: str):
+        """Startet ein Backend und wartet auf das erste Frame"""
+        it = backend.synthesize(text).__aiter__()
+        first = await it.__anext__()
+        return first, it
+
+    async def _chain(self, first, it, text: Optional[str] = None) -> AsyncIterator:
+        """Liefert erstes Frame + Rest; primäre Audio wird dabei gecacht"""
+        frames = [first] if text is not None else None
+        yield first
+        try:
+            async for frame in it:
+                if frames is not None:
+                    frames.append(frame)
+                yield frame
+        finally:
+            await it.aclose()
+        if frames is not None and self.cache is not None:
+            self.cache.put(text, frames)
+
+    async def route(self, text: str) -> RouteResult:
+        """Wählt das schnellste Backend. Jede Stufe bekommt das Latenz-Budget."""
+        start = time.monotonic()
+        backends = [self.primary] + list(self.fallbacks)
+        tasks: Dict[asyncio.Task, object] = {}
+        errors: Dict[str, str] = {}
+        winner = None
+        next_backend = 0
+
+        try:
+            while winner is None:
+                # Nächste Stufe starten (Primary sofort, Fallbacks nach Budget/Fehler)
+                if next_backend < len(backends):
+                    backend = backends[next_backend]
+                    next_backend += 1
+                    task = asyncio.create_task(self._first_frame(backend, text))
+                    tasks[task] = backend
+                if not tasks:
+                    raise RuntimeError(f"Alle TTS-Backends fehlgeschlagen: {errors}")
+
+                timeout = self.budget if next_backend < len(backends) else None
+                done, _ = await asyncio.wait(tasks.keys(), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = tasks.pop(task)
+                    if task.exception() is not None:
+                        errors[backend.name] = repr(task.exception())
+                    elif winner is None:
+                        winner = (backend, task.result())
+                    else:
+                        # Gleichzeitig fertig geworden - Verlierer schließen
+                        await task.result()[1].aclose()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                try:
+                    _, it = await task
+                    await it.aclose()
+                except BaseException:
+                    pass
+
+        backend, (first, it) = winner
+        latency = time.monotonic() - start
+        self.stats[backend.name] = self.stats.get(backend.name, 0) + 1
+        cache_text = text if backend is self.primary else None
+        result = RouteResult(text=text, path=backend.name, first_frame_latency=latency,
+                             audio=self._chain(first, it, cache_text), errors=errors)
+        self.history.append((time.time(), backend.name, latency))
+        return result
+
+    async def prefill(self, texts: List[str]):
+        """Füllt den Audio-Cache im Hintergrund über die primäre TTS"""
+        if self.cache is None:
+            return
+        for text in texts:
+            if text in self.cache.entries:
+                continue
+            try:
+                frames = [frame async for frame in self.primary.synthesize(text)]
+                self.cache.put(text, frames)
+            except Exception as e:
+                print(f"⚠️ Cache-Vorbefüllung fehlgeschlagen: {e}")
+                return
+        print(f"💾 Audio-Cache vorbefüllt ({len(self.cache.entries)} Utterances)")
+
+    def summary(self) -> str:
+        """Welche Pfade wie oft gewonnen haben"""
+        parts = [f"{name}={count}" for name, count in sorted(self.stats.items())]
+        return "🎛️ TTS-Routing: " + (", ".join(parts) if parts else "noch keine Utterances")
+
+
+async def _selftest():
+    """Szenarien mit Fake-Backends: langsam, kaputt, leer"""
+    from fakes import FakeTTSBackend
+
+    def fake_frame(data, sample_rate, samples):
+        return data
+
+    async def run(primary, budget=0.2):
+        cache = CachedAudioBackend()
+        router = TTSRouter(primary,
+                           [cache, ShushNoiseBackend(frame_factory=fake_frame)],
+                           budget=budget, cache=cache)
+        result = await router.route("Shh, shh...")
+        frames = [f async for f in result.audio]
+        return router, result, frames
+
+    # 1. Schnelle Primary gewinnt und landet im Cache
+    router, result, frames = await run(FakeTTSBackend("primary", delay=0.01))
+    assert result.path == "primary" and len(frames) == 5, result
+    assert "Shh, shh..." in router.cache.entries
+    # 2. Langsame Primary: leerer Cache scheitert, Shush gewinnt innerhalb von 2 Budgets
+    router, result, frames = await run(FakeTTSBackend("primary", delay=5.0))
+    assert result.path == "shush" and result.first_frame_latency < 0.5, result
+    # 3. Kaputte Primary: sofort auf Fallback
+    router, result, frames = await run(FakeTTSBackend("primary", fail=True))
+    assert result.path == "shush" and "primary" in result.errors, result
+    # 4. Langsame Primary mit gefülltem Cache: Cache gewinnt nach einem Budget
+    cache = CachedAudioBackend()
+    cache.put("other", [b"x"])
+    router = TTSRouter(FakeTTSBackend("primary", delay=5.0), [cache], budget=0.1, cache=cache)
+    result = await router.route("Shh")
+    assert result.path == "cache" and result.first_frame_latency < 0.3, result
+    print("✅ TTS-Router Selbsttest bestanden")
+
+
+if __name__ == "__main__":
+    asyncio.run(_selftest())
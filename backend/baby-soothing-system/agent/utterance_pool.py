@@ -0,0 +1,203 @@
+"""
+Vorgenerierter Utterance-Pool
+Claude erzeugt Beruhigungstexte und Begrüßungen im Batch abseits des kritischen
+Pfads. Der Pool wird lokal als JSON gespeichert und im Hintergrund erneuert.
+Bei einem Schrei ist take() ein reiner Lookup ohne Netzwerk.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+PROMPTS = {
+    "soothing": (
+        "Write {n} different short, gentle sentences a caring mother would softly say "
+        "to calm a crying baby. English only. Use soothing words like 'Shhh', "
+        "'everything is okay', 'I'm here'. One sentence group per line, at most two "
+        "short sentences each. No numbering, no quotes, no stage directions."
+    ),
+    "greeting": (
+        "Write {n} different brief self-introductions as 'Mom', a gentle assistant who "
+        "is here to soothe the baby if it cries. English only, at most three short "
+        "sentences each, one introduction per line. No numbering, no quotes, no stage directions."
+    ),
+}
+
+
+def clean_lines(raw: str, min_len: int = 8, max_len: int = 200) -> List[str]:
+    """Bereinigt LLM-Ausgabe: Nummerierung, Anführungszeichen, Regieanweisungen"""
+    result = []
+    for line in raw.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line)
+        line = re.sub(r"\*[^*]*\*", "", line)        # *speaks softly*
+        line = line.strip().strip('"“”').strip()
+        if min_len <= len(line) <= max_len and line not in result:
+            result.append(line)
+    return result
+
+
+class LiveKitLLMGenerator:
+    """Erzeugt Utterance-Batches über ein LiveKit LLM Plugin (z.B. anthropic.LLM)"""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def __call__(self, kind: str, n: int) -> List[str]:
+        from livekit.agents import llm as lk_llm
+        chat_ctx = lk_llm.ChatContext()
+        chat_ctx.add_message(role="user", content=PROMPTS[kind].format(n=n))
+        parts = []
+        async with self.llm.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        return clean_lines("".join(parts))
+
+
+class UtterancePool:
+    """Lokaler Pool von LLM-Utterances mit Hintergrund-Erneuerung"""
+
+    def __init__(self,
+                 generate: Callable[[str, int], Awaitable[List[str]]],
+                 seeds: Dict[str, List[str]],
+                 path: str = "utterance_pool.json",
+                 target_size: int = 30,
+                 batch_size: int = 10,
+                 max_uses: int = 5,
+                 refresh_interval: float = 1800.0):
+        self.generate = generate
+        self.path = path
+        self.target_size = target_size
+        self.batch_size = batch_size
+        self.max_uses = max_uses          # danach gilt eine Utterance als "abgenutzt"
+        self.refresh_interval = refresh_interval
+
+        # kind -> Liste von {"text", "uses", "created"}
+        self.entries: Dict[str, List[dict]] = {}
+        self.seeds = seeds
+        self.last_taken: Dict[str, str] = {}
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    def load(self):
+        """Lädt den gespeicherten Pool, Seeds als Rückfallebene"""
+        # Erst lokal aufbauen, dann in einem Schritt zuweisen (load läuft im Thread)
+        entries: Dict[str, List[dict]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            counts = {kind: len(items) for kind, items in entries.items()}
+            print(f"💾 Utterance-Pool geladen: {counts}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Utterance-Pool unlesbar, starte mit Seeds: {e}")
+            entries = {}
+        for kind, texts in self.seeds.items():
+            if not entries.get(kind):
+                entries[kind] = [self._entry(t) for t in texts]
+        self.entries = entries
+
+    def save(self):
+        """Atomar schreiben, damit ein Absturz den Pool nicht zerstört"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, text: str) -> dict:
+        return {"text": text, "uses": 0, "created": time.time()}
+
+    def take(self, kind: str = "soothing") -> str:
+        """Sofortiger Lookup: eine wenig genutzte Utterance, nie zweimal hintereinander"""
+        items = self.entries.get(kind) or [self._entry(t) for t in self.seeds[kind]]
+        candidates = [e for e in items if e["text"] != self.last_taken.get(kind)] or items
+        fewest = min(e["uses"] for e in candidates)
+        entry = random.choice([e for e in candidates if e["uses"] == fewest])
+        entry["uses"] += 1
+        self.last_taken[kind] = entry["text"]
+        return entry["text"]
+
+    async def refresh_once(self, kind: str) -> int:
+        """Ersetzt abgenutzte und älteste Utterances durch einen neuen Batch"""
+        items = self.entries.setdefault(kind, [])
+        fresh = await self.generate(kind, self.batch_size)
+        known = {e["text"] for e in items}
+        fresh = [t for t in fresh if t not in known]
+        if not fresh:
+            return 0
+
+        # Abgenutzte zuerst, dann die ältesten - Poolgröße bleibt bei target_size
+        items.sort(key=lambda e: (e["uses"] < self.max_uses, e["created"]))
+        overflow = max(0, len(items) + len(fresh) - self.target_size)
+        del items[:overflow]
+        items.extend(self._entry(t) for t in fresh)
+        await asyncio.to_thread(self.save)
+        return len(fresh)
+
+    async def run_refresher(self):
+        """Hintergrund-Task: erneuert alle Kategorien periodisch"""
+        while True:
+            for kind in self.seeds:
+                try:
+                    added = await self.refresh_once(kind)
+                    print(f"🔄 Utterance-Pool '{kind}': {added} neue, {len(self.entries[kind])} gesamt")
+                except Exception as e:
+                    print(f"⚠️ Utterance-Pool Erneuerung fehlgeschlagen ({kind}): {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start_refresher(self):
+        self.refresh_task = asyncio.create_task(self.run_refresher())
+
+    def stop(self):
+        if self.refresh_task:
+            self.refresh_task.cancel()
+        try:
+            self.save()
+        except OSError as e:
+            print(f"⚠️ Utterance-Pool konnte nicht gespeichert werden: {e}")
+
+
+async def _selftest():
+    """Pool gegen ein lokales Fake-LLM"""
+    import tempfile
+    from fakes import FakeLLMGenerator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pool.json")
+        llm = FakeLLMGenerator(delay=0.05)
+        pool = UtterancePool(llm, {"soothing": ["Shh, seed one.", "Shh, seed two."]},
+                             path=path, target_size=6, batch_size=4)
+        pool.load()
+        # Vor der ersten Erneuerung: Seeds, sofort verfügbar
+        start = time.perf_counter()
+        first = pool.take("soothing")
+        assert first.startswith("Shh, seed") and time.perf_counter() - start < 0.01
+        assert pool.take("soothing") != first
+
+        await pool.refresh_once("soothing")
+        await pool.refresh_once("soothing")
+        assert len(pool.entries["soothing"]) == 6
+        assert sum(e["text"].startswith("Fake") for e in pool.entries["soothing"]) >= 4
+
+        # Persistenz: neuer Pool lädt ohne LLM-Aufruf
+        reloaded = UtterancePool(FakeLLMGenerator(fail=True), {"soothing": ["x" * 10]}, path=path)
+        reloaded.load()
+        assert len(reloaded.entries["soothing"]) == 6
+
+        # LLM-Ausfall lässt den Pool unverändert
+        try:
+            await reloaded.refresh_once("soothing")
+        except ConnectionError:
+            pass
+        assert len(reloaded.entries["soothing"]) == 6
+        assert clean_lines('1. "Shhh, I am here." *softly*\n- Everything is okay, love.') == \
+            ["Shhh, I am here.", "Everything is okay, love."]
+    print("✅ Utterance-Pool Selbsttest bestanden")
+
+
+if __name__ == "__main__":
+    asyncio.run(_selftest())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Benchmark für Detektor und Agent
+Misst die Prozess-Startzeit (--help) und die Import-Kosten pro Modul
+über python -X importtime. Ergebnisse können als JSONL mitprotokolliert werden.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "detector": {"dir": "detector", "script": "baby_cry_detector_service.py",
+                 "module": "baby_cry_detector_service"},
+    "agent": {"dir": "agent", "script": "baby_soothing_agent.py",
+              "module": "baby_soothing_agent"},
+}
+
+
+def measure_help(target: dict, runs: int) -> dict:
+    """Wall-Clock-Zeit von Prozessstart bis Ende für '--help'"""
+    cwd = os.path.join(BASE_DIR, target["dir"])
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, target["script"], "--help"], cwd=cwd,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        durations.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.decode(errors="replace").strip().splitlines()[-1]}
+    return {"min_ms": min(durations) * 1000, "median_ms": statistics.median(durations) * 1000}
+
+
+def import_profile(target: dict, top: int) -> dict:
+    """Import-Kosten der direkten Imports (kumulativ, pro Paket) beim Import des Moduls"""
+    cwd = os.path.join(BASE_DIR, target["dir"])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target['module']}"],
+                          cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    packages = {}
+    pending = {}
+    total_us = 0
+    for line in proc.stderr.decode(errors="replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        level = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        # importtime gibt Kinder vor dem Eltern-Modul aus: direkte Imports sammeln,
+        # bis das Zielmodul selbst (Ebene 0) erscheint
+        if level == 1:
+            package = name.split(".")[0]
+            pending[package] = pending.get(package, 0) + int(cumulative_us)
+        elif level == 0:
+            if name == target["module"]:
+                packages = pending
+                total_us = int(cumulative_us)
+            pending = {}
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    result = {"total_ms": total_us / 1000, "top": [[name, us / 1000] for name, us in ranked]}
+    if proc.returncode != 0:
+        result["error"] = proc.stderr.decode(errors="replace").strip().splitlines()[-1]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-Start Benchmark (Detektor + Agent)")
+    parser.add_argument("--target", choices=["detector", "agent", "all"], default="all")
+    parser.add_argument("--runs", type=int, default=5, help="Wiederholungen für --help")
+    parser.add_argument("--top", type=int, default=10, help="Anzahl Pakete im Import-Profil")
+    parser.add_argument("--record", type=str, default=None,
+                        help="Ergebnisse als JSON-Zeile an diese Datei anhängen")
+    args = parser.parse_args()
+
+    names = list(TARGETS) if args.target == "all" else [args.target]
+    results = {"timestamp": time.time(), "python": sys.version.split()[0]}
+    for name in names:
+        target = TARGETS[name]
+        help_result = measure_help(target, args.runs)
+        imports = import_profile(target, args.top)
+        results[name] = {"help": help_result, "imports": imports}
+
+        print(f"🚀 {name}")
+        if "error" in help_result:
+            print(f"   --help fehlgeschlagen: {help_result['error']}")
+        else:
+            print(f"   --help: min {help_result['min_ms']:.0f}ms, median {help_result['median_ms']:.0f}ms")
+        print(f"   import {target['module']}: {imports['total_ms']:.1f}ms")
+        for package, ms in imports["top"]:
+            print(f"   {ms:8.1f}ms  {package}")
+        if "error" in imports:
+            print(f"   Import fehlgeschlagen: {imports['error']}")
+
+    if args.record:
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(results) + "\n")
+        print(f"💾 Ergebnis angehängt an {args.record}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Audio-Archiv für ganze Nächte
+Der Detection Loop kopiert pro Hop nur Audio in einen vorab allokierten Chunk-Puffer.
+Volle Chunks werden in einem Hintergrund-Thread komprimiert (zlib, int16) und an die
+Tagesdatei angehängt. Ein Sidecar-Index mit festen Records (Startzeit, Offset, Länge,
+max. Schrei-Wahrscheinlichkeit) erlaubt Sprünge per Index-Lookup statt Scan.
+
+Dateien pro Tag:  archive_YYYYMMDD.bin  (komprimierte Chunks hintereinander)
+                  archive_YYYYMMDD.idx  (INDEX_DTYPE Records, 40 Bytes pro Chunk)
+"""
+
+import glob
+import mmap
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+INDEX_DTYPE = np.dtype([
+    ("start", "<f8"),      # Unix-Zeit des ersten Samples
+    ("duration", "<f4"),   # Sekunden Audio im Chunk
+    ("max_prob", "<f4"),   # höchste Schrei-Wahrscheinlichkeit im Chunk
+    ("max_at", "<f4"),     # Sekunden ab Chunk-Start bis zum Maximum
+    ("samples", "<u4"),
+    ("offset", "<u8"),     # Byte-Offset in der .bin Datei
+    ("length", "<u4"),     # komprimierte Länge in Bytes
+    ("sample_rate", "<u4"),
+])
+
+
+def _day_key(timestamp: float) -> str:
+    return time.strftime("%Y%m%d", time.localtime(timestamp))
+
+
+class AudioArchiveWriter:
+    """Asynchroner Chunk-Writer - add_audio() ist nur eine Kopie in einen Puffer"""
+
+    def __init__(self,
+                 archive_dir: str,
+                 sample_rate: int = 16000,
+                 chunk_seconds: float = 30.0,
+                 spare_buffers: int = 3,
+                 compression_level: int = 6):
+        self.archive_dir = archive_dir
+        self.sample_rate = sample_rate
+        self.chunk_samples = int(chunk_seconds * sample_rate)
+        self.compression_level = compression_level
+        os.makedirs(archive_dir, exist_ok=True)
+
+        # Vorab allokierte Puffer, die zwischen Loop und Writer-Thread rotieren
+        self._free: "queue.Queue" = queue.Queue()
+        for _ in range(spare_buffers):
+            self._free.put(np.zeros(self.chunk_samples, dtype=np.float32))
+        self._pending: "queue.Queue" = queue.Queue()
+
+        self._buffer: Optional[np.ndarray] = self._free.get_nowait()
+        self._filled = 0
+        self._start_time = 0.0
+        self._max_prob = 0.0
+        self._max_at = 0.0
+
+        self.stats = {"chunks_written": 0, "chunks_dropped": 0, "bytes_raw": 0, "bytes_written": 0}
+        self._worker = threading.Thread(target=self._write_loop, daemon=True)
+        self._worker.start()
+
+    def add_audio(self, block: np.ndarray, cry_probability: float, timestamp: Optional[float] = None):
+        """Pro Hop aus dem Detection Loop aufrufen"""
+        if self._buffer is None:
+            # Kein freier Puffer (Writer hängt hinterher) - Audio verwerfen statt blockieren
+            try:
+                self._buffer = self._free.get_nowait()
+                self._filled = 0
+            except queue.Empty:
+                return
+        if self._filled == 0:
+            self._start_time = timestamp if timestamp is not None else time.time()
+            self._max_prob = -1.0
+        if cry_probability > self._max_prob:
+            self._max_prob = cry_probability
+            self._max_at = self._filled / self.sample_rate
+
+        offset = 0
+        while offset < len(block):
+            n = min(len(block) - offset, self.chunk_samples - self._filled)
+            self._buffer[self._filled:self._filled + n] = block[offset:offset + n]
+            self._filled += n
+            offset += n
+            if self._filled >= self.chunk_samples:
+                self._submit()
+                if offset < len(block):
+                    # Rest des Blocks beginnt einen neuen Chunk
+                    if self._buffer is None:
+                        return
+                    self._start_time += self.chunk_samples / self.sample_rate
+                    self._max_prob, self._max_at = cry_probability, 0.0
+
+    def _submit(self):
+        meta = (self._start_time, self._filled, self._max_prob, self._max_at)
+        self._pending.put((self._buffer, meta))
+        self._filled = 0
+        try:
+            self._buffer = self._free.get_nowait()
+        except queue.Empty:
+            self._buffer = None
+            self.stats["chunks_dropped"] += 1
+            print("⚠️ Archiv-Writer hängt hinterher - Audio wird verworfen")
+
+    def flush(self):
+        """Angefangenen Chunk schreiben und warten bis alles auf der Platte ist"""
+        if self._buffer is not None and self._filled > 0:
+            self._submit()
+        self._pending.join()
+
+    def _write_loop(self):
+        while True:
+            buffer, (start, samples, max_prob, max_at) = self._pending.get()
+            try:
+                pcm = (np.clip(buffer[:samples], -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+                self._free.put(buffer)
+                self._append_chunk(start, samples, max_prob, max_at, pcm)
+            except OSError as e:
+                print(f"❌ Archiv-Chunk konnte nicht geschrieben werden: {e}")
+            finally:
+                self._pending.task_done()
+
+    def _append_chunk(self, start: float, samples: int, max_prob: float, max_at: float, pcm: bytes):
+        compressed = zlib.compress(pcm, self.compression_level)
+        base = os.path.join(self.archive_dir, f"archive_{_day_key(start)}")
+        # Erst Daten, dann Index - ein Index-Record zeigt nie über das Dateiende hinaus
+        with open(base + ".bin", "ab") as f:
+            offset = f.tell()
+            f.write(compressed)
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record[0] = (start, samples / self.sample_rate, max_prob, max_at, samples,
+                     offset, len(compressed), self.sample_rate)
+        with open(base + ".idx", "ab") as f:
+            f.write(record.tobytes())
+        self.stats["chunks_written"] += 1
+        self.stats["bytes_raw"] += len(pcm)
+        self.stats["bytes_written"] += len(compressed)
+
+
+class AudioArchiveReader:
+    """Random Access über Memory-Mapping von Index und Daten"""
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self.days: List[Tuple[str, np.ndarray]] = []
+        for idx_path in sorted(glob.glob(os.path.join(archive_dir, "archive_*.idx"))):
+            count = os.path.getsize(idx_path) // INDEX_DTYPE.itemsize
+            if count == 0:
+                continue
+            # Halb geschriebene Records am Ende (Absturz) werden ignoriert
+            index = np.memmap(idx_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+            self.days.append((idx_path[:-4] + ".bin", index))
+
+    def chunks(self, start: float = 0.0, end: float = float("inf")):
+        """(bin_path, record) aller Chunks, die [start, end) überlappen"""
+        for bin_path, index in self.days:
+            # start ist pro Tag aufsteigend -> binäre Suche
+            lo = max(np.searchsorted(index["start"], start, side="right") - 1, 0)
+            hi = np.searchsorted(index["start"], end, side="left")
+            for record in index[lo:hi]:
+                if record["start"] + record["duration"] > start:
+                    yield bin_path, record
+
+    def loudest(self, start: float = 0.0, end: float = float("inf")) -> Optional[float]:
+        """Zeitpunkt der höchsten Schrei-Wahrscheinlichkeit im Zeitraum (nur Index)"""
+        best = None
+        for _, record in self.chunks(start, end):
+            if best is None or record["max_prob"] > best["max_prob"]:
+                best = record
+        if best is None:
+            return None
+        return float(best["start"] + best["max_at"])
+
+    def _decode(self, bin_path: str, record) -> np.ndarray:
+        with open(bin_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offset, length = int(record["offset"]), int(record["length"])
+                pcm = zlib.decompress(data[offset:offset + length])
+        return np.frombuffer(pcm, dtype=np.int16)
+
+    def read(self, start: float, seconds: float) -> Tuple[np.ndarray, int]:
+        """Audio ab start (int16) - dekomprimiert nur die betroffenen Chunks"""
+        parts = []
+        sample_rate = 16000
+        end = start + seconds
+        for bin_path, record in self.chunks(start, end):
+            sample_rate = int(record["sample_rate"])
+            pcm = self._decode(bin_path, record)
+            first = max(int((start - record["start"]) * sample_rate), 0)
+            last = min(int((end - record["start"]) * sample_rate), len(pcm))
+            if last > first:
+                parts.append(pcm[first:last])
+        audio = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+        return audio, sample_rate
+
+
+def _parse_time(value: str) -> float:
+    """'HH:MM' (letztes Vorkommen) oder 'YYYY-MM-DD HH:MM' -> Unix-Zeit"""
+    if len(value) <= 5:
+        hours, minutes = (int(part) for part in value.split(":"))
+        now = time.localtime()
+        candidate = time.mktime((now.tm_year, now.tm_mon, now.tm_mday, hours, minutes, 0, 0, 0, -1))
+        return candidate - 86400 if candidate > time.time() else candidate
+    return time.mktime(time.strptime(value, "%Y-%m-%d %H:%M"))
+
+
+def main():
+    import argparse
+    import wave
+
+    parser = argparse.ArgumentParser(description="Audio-Archiv durchsuchen")
+    parser.add_argument("--dir", type=str, default="archive", help="Archiv-Ordner")
+    sub = parser.add_subparsers(dest="command", required=True)
+    loudest = sub.add_parser("loudest", help="Lautestes Weinen im Zeitraum finden")
+    loudest.add_argument("--after", type=str, default=None, help="HH:MM oder 'YYYY-MM-DD HH:MM'")
+    loudest.add_argument("--before", type=str, default=None)
+    loudest.add_argument("--seconds", type=float, default=30.0, help="Länge des Ausschnitts")
+    loudest.add_argument("--out", type=str, default=None, help="Ausschnitt als WAV speichern")
+    extract = sub.add_parser("extract", help="Ausschnitt ab Zeitpunkt als WAV speichern")
+    extract.add_argument("--at", type=str, required=True)
+    extract.add_argument("--seconds", type=float, default=30.0)
+    extract.add_argument("--out", type=str, required=True)
+    args = parser.parse_args()
+
+    reader = AudioArchiveReader(args.dir)
+    if args.command == "loudest":
+        start = _parse_time(args.after) if args.after else 0.0
+        end = _parse_time(args.before) if args.before else float("inf")
+        at = reader.loudest(start, end)
+        if at is None:
+            print("Keine Aufnahmen im Zeitraum")
+            return
+        print(f"🔊 Lautestes Weinen: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(at))}")
+        out, begin = args.out, at - args.seconds / 2
+    else:
+        out, begin = args.out, _parse_time(args.at)
+
+    if out:
+        audio, sample_rate = reader.read(begin, args.seconds)
+        with wave.open(out, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(audio.tobytes())
+        print(f"💾 {len(audio) / sample_rate:.1f}s gespeichert: {out}")
+
+
+if __name__ == "__main__":
+    main()
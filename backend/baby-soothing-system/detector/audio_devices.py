@@ -0,0 +1,9 @@
+"""
+Geräteauswahl auf der Kommandozeile (ohne numpy/sounddevice: --help und das Parsen der
+Argumente bleiben leicht, siehe Startzeit-Profil)
+"""
+
+
+def parse_device(value: str):
+    """sounddevice-Gerät von der Kommandozeile: Index oder Teil des Namens"""
+    return int(value) if value.isdigit() else value
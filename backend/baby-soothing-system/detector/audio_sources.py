@@ -0,0 +1,341 @@
+"""
+Audio-Quellen für den Detection Loop
+- MicrophoneSource: lokales Mikrofon über sounddevice (bisheriges Verhalten)
+- NativeMicrophoneSource: Mikrofon mit nativer Rate/Kanalzahl, Downmix + Resampling auf
+  16 kHz im Prozess (resampler.py) statt durch den Audio-Stack des Hosts
+- NetworkAudioSource: UDP-Frames von einem Capture-Client (capture_client.py),
+  mit Jitter-Buffer für Umordnung, Verspätung und Lücken
+
+Frame-Format (Little Endian): FRAME_HEADER + int16 PCM mono 16 kHz
+"""
+
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+FRAME_MAGIC = b"BCA1"
+FRAME_HEADER = struct.Struct("<4sIdH")   # magic, seq, capture_ts, n_samples
+
+
+def pack_frame(seq: int, capture_ts: float, pcm: np.ndarray) -> bytes:
+    """float32 [-1, 1] -> UDP-Datagramm"""
+    samples = (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2")
+    return FRAME_HEADER.pack(FRAME_MAGIC, seq & 0xFFFFFFFF, capture_ts, len(samples)) + samples.tobytes()
+
+
+class MicrophoneSource:
+    """Lokales Mikrofon (blockierendes Lesen pro Hop)"""
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self._stream = None
+        self._out: Optional[np.ndarray] = None
+
+    def __enter__(self):
+        import sounddevice as sd
+        self._sd = sd
+        self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32')
+        self._stream.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.__exit__(*exc)
+
+    def read_block(self, block_size: int) -> Optional[np.ndarray]:
+        # In einen wiederverwendeten Puffer aufnehmen statt pro Hop neu zu allokieren
+        if self._out is None or len(self._out) != block_size:
+            self._out = np.zeros((block_size, 1), dtype=np.float32)
+        self._sd.rec(out=self._out, samplerate=self.sample_rate)
+        self._sd.wait()
+        return self._out[:, 0]  # Mono
+
+    def backlog_samples(self) -> int:
+        return 0   # Aufnahme startet erst beim Lesen: Überlast erzeugt Lücken, keinen Rückstand
+
+    def skip(self, n_samples: int):
+        pass
+
+
+class NativeMicrophoneSource:
+    """Mikrofon mit nativer Geräterate: Stream im Callback, Resampling auf sample_rate,
+    Ringpuffer für den Detection Loop (Rückstand sichtbar, Überspringen möglich)"""
+
+    def __init__(self, sample_rate: int = 16000, device=None, native_rate: Optional[int] = None,
+                 channels: Optional[int] = None, block_ms: int = 10, max_buffer: float = 10.0):
+        self.sample_rate = sample_rate
+        self.device = device
+        self.native_rate = native_rate       # None = Standardrate des Geräts
+        self.channels = channels             # None = Gerätekanäle (höchstens 2)
+        self.block_ms = block_ms             # Callback-Blockgröße -> feste Aufnahmelatenz
+        self.resampler = None
+        self.cond = threading.Condition()
+        self._ring = np.zeros(int(max_buffer * sample_rate), dtype=np.float32)
+        self._written = 0                    # Samples insgesamt geschrieben / gelesen (absolut)
+        self._read = 0
+        self._stream = None
+        self._outs: Dict[int, np.ndarray] = {}
+        self._last_warning = 0.0
+        self.stats = {"callbacks": 0, "overflows": 0, "dropped": 0, "skipped": 0}
+
+    def __enter__(self):
+        import sounddevice as sd
+        from resampler import PolyphaseResampler
+
+        info = sd.query_devices(self.device, "input")
+        rate = int(self.native_rate or info["default_samplerate"])
+        # Mehrkanal-Interfaces haben oft unbenutzte Eingänge, die den Mittelwert nur leiser machen
+        channels = self.channels or max(1, min(2, int(info["max_input_channels"])))
+        self.resampler = PolyphaseResampler(rate, self.sample_rate, channels)
+        self._stream = sd.InputStream(device=self.device, samplerate=rate, channels=channels,
+                                      dtype='float32', blocksize=rate * self.block_ms // 1000,
+                                      callback=self._on_audio)
+        self._stream.start()
+        self.native_rate, self.channels = rate, channels
+        print(f"🎙️ Mikrofon '{info['name']}' nativ {rate} Hz x{channels} -> {self.sample_rate} Hz "
+              f"(Block {self.block_ms}ms, Filter {self.resampler.delay * 1000:.2f}ms, "
+              f"Eingangslatenz {self._stream.latency * 1000:.0f}ms)")
+        return self
+
+    def __exit__(self, *exc):
+        if self._stream:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _on_audio(self, indata, n_frames, time_info, status):
+        if status.input_overflow:
+            self.stats["overflows"] += 1
+        self.write(self.resampler.process(indata))
+
+    def write(self, samples: np.ndarray):
+        """Resampelte Samples anhängen; bei vollem Ring gehen die ältesten verloren"""
+        ring = self._ring
+        size = len(ring)
+        with self.cond:
+            self.stats["callbacks"] += 1
+            n = len(samples)
+            if n > size:
+                samples, n = samples[-size:], size
+            start = self._written % size
+            first = min(n, size - start)
+            ring[start:start + first] = samples[:first]
+            ring[:n - first] = samples[first:]
+            self._written += n
+            overrun = self._written - self._read - size
+            if overrun > 0:
+                self._read += overrun
+                self.stats["dropped"] += overrun
+            self.cond.notify()
+
+    def read_block(self, block_size: int) -> Optional[np.ndarray]:
+        out = self._outs.get(block_size)
+        if out is None:
+            out = self._outs[block_size] = np.zeros(block_size, dtype=np.float32)
+        ring = self._ring
+        size = len(ring)
+        with self.cond:
+            if not self.cond.wait_for(lambda: self._written - self._read >= block_size, timeout=2.0):
+                if time.monotonic() - self._last_warning > 10:
+                    print("⚠️ Keine Audio-Daten vom Mikrofon")
+                    self._last_warning = time.monotonic()
+                return None
+            start = self._read % size
+            first = min(block_size, size - start)
+            out[:first] = ring[start:start + first]
+            out[first:] = ring[:block_size - first]
+            self._read += block_size
+        return out
+
+    def backlog_samples(self) -> int:
+        with self.cond:
+            return self._written - self._read
+
+    def skip(self, n_samples: int):
+        with self.cond:
+            n = min(n_samples, self._written - self._read)
+            self._read += n
+            self.stats["skipped"] += n
+
+
+class JitterBuffer:
+    """Ordnet Frames nach Sequenznummer; fehlende Frames werden nach target_delay als Stille ersetzt"""
+
+    def __init__(self, target_delay: float = 0.12, max_frames: int = 1000):
+        self.target_delay = target_delay
+        self.max_frames = max_frames
+        self.frames: Dict[int, np.ndarray] = {}
+        self.arrival: Dict[int, float] = {}
+        self.next_seq: Optional[int] = None
+        self.frame_samples = 0
+        self.cond = threading.Condition()
+        self.stats = {"received": 0, "late": 0, "duplicate": 0, "gaps": 0, "reordered": 0, "resyncs": 0,
+                      "skipped": 0}
+        self._highest_seq = -1
+        self._carry: Optional[np.ndarray] = None   # Rest eines angebrochenen Frames
+        # Warm-Standby: nur die neuesten Samples behalten (None = unbegrenzt bis max_frames)
+        self.max_buffered_samples: Optional[int] = None
+
+    def put(self, seq: int, samples: np.ndarray):
+        with self.cond:
+            now = time.monotonic()
+            self.stats["received"] += 1
+            if self.next_seq is None or abs(seq - self.next_seq) > self.max_frames:
+                # Erster Frame oder Client-Neustart: neu synchronisieren
+                if self.next_seq is not None:
+                    self.stats["resyncs"] += 1
+                self.frames.clear()
+                self.arrival.clear()
+                self.next_seq = seq
+                self._highest_seq = seq - 1
+            if seq < self.next_seq:
+                self.stats["late"] += 1       # schon durch Stille ersetzt
+                return
+            if seq in self.frames:
+                self.stats["duplicate"] += 1
+                return
+            if seq < self._highest_seq:
+                self.stats["reordered"] += 1
+            self._highest_seq = max(self._highest_seq, seq)
+            self.frames[seq] = samples
+            self.arrival[seq] = now
+            self.frame_samples = len(samples)
+            if self.max_buffered_samples is not None:
+                while len(self.frames) * self.frame_samples > self.max_buffered_samples:
+                    self._drop_oldest()
+            self.cond.notify()
+
+    def _drop_oldest(self):
+        oldest = min(self.frames)
+        del self.frames[oldest], self.arrival[oldest]
+        self.next_seq = min(self.frames) if self.frames else oldest + 1
+        self._carry = None
+
+    def backlog_samples(self) -> int:
+        """Gepufferte, noch nicht gelesene Samples (Rückstand des Detection Loops)"""
+        with self.cond:
+            carry = len(self._carry) if self._carry is not None else 0
+            return len(self.frames) * self.frame_samples + carry
+
+    def skip(self, n_samples: int):
+        """Älteste Samples verwerfen (veraltete Hops überspringen), ganze Frames"""
+        with self.cond:
+            dropped = 0
+            if self._carry is not None:
+                dropped, self._carry = len(self._carry), None
+            while self.frames and dropped + self.frame_samples <= n_samples:
+                self._drop_oldest()
+                dropped += self.frame_samples
+            self.stats["skipped"] += dropped
+
+    def _pop_next(self) -> Optional[np.ndarray]:
+        """Nächster Frame, Stille für eine verlorene Lücke, oder None (warten)"""
+        if self.next_seq in self.frames:
+            self.arrival.pop(self.next_seq)
+            frame = self.frames.pop(self.next_seq)
+            self.next_seq += 1
+            return frame
+        if self.frames:
+            # Ein späterer Frame wartet schon länger als target_delay -> Lücke aufgeben
+            oldest_waiting = min(self.arrival.values())
+            if time.monotonic() - oldest_waiting >= self.target_delay:
+                self.stats["gaps"] += 1
+                self.next_seq += 1
+                return np.zeros(self.frame_samples, dtype=np.float32)
+        return None
+
+    def read(self, n_samples: int, out: np.ndarray, timeout: float = 2.0) -> bool:
+        """Füllt out[:n_samples]; False wenn zu lange keine Daten kommen"""
+        filled = 0
+        deadline = time.monotonic() + timeout
+        pending = self._carry
+        with self.cond:
+            while filled < n_samples:
+                if pending is None or len(pending) == 0:
+                    pending = self._pop_next()
+                if pending is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._carry = None
+                        return False
+                    self.cond.wait(min(remaining, self.target_delay / 2))
+                    continue
+                n = min(n_samples - filled, len(pending))
+                out[filled:filled + n] = pending[:n]
+                filled += n
+                pending = pending[n:]
+                deadline = time.monotonic() + timeout
+        self._carry = pending
+        return True
+
+
+class NetworkAudioSource:
+    """Empfängt Audio-Frames eines Capture-Clients per UDP"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 9997, target_delay: float = 0.12,
+                 fileno: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.fileno = fileno  # geerbter UDP-Socket (Supervisor), Frames warten im Kernel-Puffer
+        self.jitter = JitterBuffer(target_delay)
+        self.sock: Optional[socket.socket] = None
+        self.is_running = False
+        self._outs: Dict[int, np.ndarray] = {}
+        self._last_warning = 0.0
+
+    def __enter__(self):
+        if self.fileno is not None:
+            self.sock = socket.socket(fileno=self.fileno)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            self.sock.bind((self.host, self.port))
+        if self.sock.family == socket.AF_INET:
+            self.port = self.sock.getsockname()[1]   # falls Port 0 (Selbsttest)
+        self.is_running = True
+        threading.Thread(target=self._receive_loop, daemon=True).start()
+        if self.fileno is not None:
+            print(f"🛰️ Audio vom Supervisor (fd {self.fileno})")
+        else:
+            print(f"🛰️ Warte auf Audio vom Capture-Client (UDP {self.host}:{self.port})")
+        return self
+
+    def __exit__(self, *exc):
+        self.is_running = False
+        self.sock.close()
+
+    def _receive_loop(self):
+        while self.is_running:
+            try:
+                datagram = self.sock.recv(65536)
+            except OSError:
+                break
+            if len(datagram) < FRAME_HEADER.size:
+                continue
+            magic, seq, capture_ts, n_samples = FRAME_HEADER.unpack_from(datagram)
+            if magic != FRAME_MAGIC or len(datagram) != FRAME_HEADER.size + 2 * n_samples:
+                continue
+            pcm = np.frombuffer(datagram, dtype="<i2", offset=FRAME_HEADER.size).astype(np.float32)
+            pcm *= 1.0 / 32767
+            self.jitter.put(seq, pcm)
+
+    def read_block(self, block_size: int) -> Optional[np.ndarray]:
+        # Ein Puffer pro Blockgröße (Hop, Fenster nach Überspringen, breiter Hop)
+        out = self._outs.get(block_size)
+        if out is None:
+            out = self._outs[block_size] = np.zeros(block_size, dtype=np.float32)
+        if self.jitter.read(block_size, out):
+            return out
+        if time.monotonic() - self._last_warning > 10:
+            print("⚠️ Keine Audio-Frames vom Capture-Client")
+            self._last_warning = time.monotonic()
+        return None
+
+    def backlog_samples(self) -> int:
+        return self.jitter.backlog_samples()
+
+    def skip(self, n_samples: int):
+        self.jitter.skip(n_samples)
@@ -11,13 +11,39 @@ import threading
 import signal
 import sys
 import socket
+import struct
+import os
+import uuid
+from collections import deque
 from typing import Optional, List
-import numpy as np
-import sounddevice as sd
-import tensorflow as tf
-import tensorflow_hub as hub
 import csv
 
+# numpy, sounddevice, tensorflow und tensorflow_hub werden erst dort importiert,
+# wo sie gebraucht werden - "--help" und Neustarts zahlen so nicht den TF-Import.
+
+# Letzte Events für die Nachlieferung nach einem Reconnect (resync); status nicht -
+# den aktuellen Stand liefert der Snapshot
+REPLAY_EVENTS = 256
+NOT_REPLAYED = {"status"}
+
+# Obergrenze für eine Control-Message-Zeile; länger ohne Newline = Verbindung trennen
+MAX_CONTROL_LINE = 65536
+
+# Sekunden, die ein Send auf einen Client-Socket blockieren darf; danach wird getrennt
+SEND_TIMEOUT = 0.25
+
+
+def _set_send_timeout(client_socket: socket.socket, seconds: float):
+    """Nur Senden begrenzen (SO_SNDTIMEO) - recv im Control-Thread bleibt blockierend"""
+    if sys.platform == "win32":
+        value = struct.pack("I", int(seconds * 1000))
+    else:
+        value = struct.pack("ll", int(seconds), int(seconds % 1 * 1_000_000))
+    try:
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, value)
+    except OSError as e:
+        print(f"⚠️ Send-Timeout nicht gesetzt: {e}")
+
 class BabyCryDetectorService:
     """Standalone Baby-Cry-Detektor Service mit TCP Communication und Bestätigungslogik"""
     
@@ -25,40 +51,271 @@ class BabyCryDetectorService:
                  host: str = "localhost",
                  port: int = 9999,
                  threshold: float = 0.5, 
-                 sample_rate: int = 16000):
+                 sample_rate: int = 16000,
+                 profile_startup: bool = False,
+                 clip_dir: Optional[str] = "clips",
+                 pre_roll: float = 10.0,
+                 post_roll: float = 5.0,
+                 archive_dir: Optional[str] = None,
+                 archive_chunk: float = 30.0,
+                 timeline_dir: Optional[str] = "timeline",
+                 viz_port: Optional[int] = None,
+                 audio_source: str = "mic",
+                 audio_port: int = 9997,
+                 audio_device=None,
+                 audio_channels: Optional[int] = None,
+                 head_path: Optional[str] = None,
+                 head_mode: str = "fuse",
+                 sound_events: Optional[str] = None,
+                 model=None,
+                 config: Optional["DetectorConfig"] = None,
+                 config_path: Optional[str] = None,
+                 standby: bool = False,
+                 listen_fd: Optional[int] = None,
+                 audio_fd: Optional[int] = None,
+                 heartbeat_fd: Optional[int] = None,
+                 profile_dir: str = "profiles"):
         self.host = host
         self.port = port
-        self.threshold = threshold
+        # Laufzeit-Parameter (detector_config.py), austauschbar zwischen zwei Hops
+        from detector_config import DetectorConfig
+        # Basis aus Argumenten/Flags; die Datei wird bei jedem Neuladen darübergelegt
+        self._base_config = config or DetectorConfig(threshold=threshold, head_mode=head_mode)
+        self.config = self._base_config
+        self.config_path = config_path
+        if config_path:
+            from detector_config import load_config_file
+            self.config, errors = load_config_file(config_path, self._base_config)
+            if errors:
+                print(f"❌ Ungültige Konfiguration: {'; '.join(errors)}")
+                sys.exit(1)
+        self._pending_config: Optional[tuple] = None   # (DetectorConfig, Quelle)
+        self._config_lock = threading.Lock()
+        self._reload_requested = False
         self.sample_rate = sample_rate
         self.frame_length = 1.0  # 1 Sekunde
         self.hop_length = 0.5    # 0.5 Sekunden
         
+        # "mic" = lokales Mikrofon mit 16 kHz, "native" = Mikrofon mit Geräterate + eigenem
+        # Resampling, "net" = Frames vom Capture-Client (capture_client.py)
+        self.audio_source = audio_source
+        self.audio_port = audio_port
+        self.audio_device = audio_device
+        self.audio_channels = audio_channels
+        
         self.is_running = False
         self.server_socket: Optional[socket.socket] = None
         self.client_connections: List[socket.socket] = []
-        self.connections_lock = threading.Lock()
+        # Reentrant: der Detection Loop hält ihn über Zustandswechsel + zugehörige Events hinweg
+        self.connections_lock = threading.RLock()
+        
+        # Sequenznummern: jedes gesendete Event bekommt die nächste (unter connections_lock),
+        # neue Verbindungen bekommen einen Snapshot mit Stand seq und können per resync nachholen
+        self.instance_id = uuid.uuid4().hex[:12]   # neue Instanz (Neustart, Failover) = neue Zählung
+        self._event_seq = 0
+        self._replay: deque = deque(maxlen=REPLAY_EVENTS)   # (seq, JSON-Zeile ohne Newline)
+        self._replay_dropped = 0                   # höchste seq, die aus dem Ring gefallen ist
+        self._snapshot_seq = {}                    # Client-Socket -> seq seines Snapshots
+        # Abos pro Verbindung (subscriptions.py); Streams ohne Abonnenten werden nicht gebaut
+        self.subscriptions = {}                    # Client-Socket -> Subscription
+        self.wanted_streams = frozenset()
+        self._last_hop_at: Optional[float] = None
+        self._started_at = time.time()
+        self._last_probability = 0.0
+        self._cry_started_at: Optional[float] = None
         
-        print("📄 Lade YAMNet...")
-        self.yamnet = hub.load("https://tfhub.dev/google/yamnet/1")
+        # Ausgaben (Clips, Archiv, Timeline, Viz) - beim Warm-Standby erst bei der Übernahme
+        self._output_options = dict(clip_dir=clip_dir, pre_roll=pre_roll, post_roll=post_roll,
+                                    archive_dir=archive_dir, archive_chunk=archive_chunk,
+                                    timeline_dir=timeline_dir, viz_port=viz_port)
+        self.clip_recorder = None
+        self.audio_archive = None
+        self.timeline = None
+        self.viz_stream = None
         
-        # Label-Liste laden
-        class_map_path = tf.keras.utils.get_file(
-            "yamnet_class_map.csv",
-            "https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv"
-        )
-        labels = [row[2] for row in csv.reader(open(class_map_path))][1:]
+        # Supervisor-Betrieb: geerbte Sockets und Heartbeat-Pipe (supervisor.py)
+        self.standby = standby
+        self.listen_fd = listen_fd
+        self.audio_fd = audio_fd
+        self.heartbeat_fd = heartbeat_fd
+        self._audio = None   # geöffnete Audio-Quelle
+        
+        # Profiling auf Abruf (SIGUSR1/SIGUSR2 oder Control-Message, profiling.py)
+        self.profile_dir = profile_dir
+        self.profiler = None                           # laufende ProfileSession
+        self._stages = None                            # deren StageClock (None = aus)
+        self._profile_request: Optional[tuple] = None  # (Modus, Sekunden, Quelle)
+        
+        # Startup-Phasen messen (Ausgabe mit --profile-startup)
+        self.profile_startup = profile_startup
+        self.startup_timings: List[tuple] = []
+        phase_start = time.perf_counter()
+        
+        if model is not None:
+            # Vorgeladenes Modell (z.B. fakes.FakeYamnet für Soak-Tests ohne TensorFlow)
+            self.yamnet = model
+            labels = list(model.class_names)
+        else:
+            import tensorflow as tf
+            import tensorflow_hub as hub
+            phase_start = self._mark_phase("import tensorflow + tensorflow_hub", phase_start)
+            
+            print("📄 Lade YAMNet...")
+            self.yamnet = hub.load("https://tfhub.dev/google/yamnet/1")
+            phase_start = self._mark_phase("load YAMNet", phase_start)
+            
+            # Label-Liste laden
+            class_map_path = tf.keras.utils.get_file(
+                "yamnet_class_map.csv",
+                "https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv"
+            )
+            labels = [row[2] for row in csv.reader(open(class_map_path))][1:]
+        self.class_names = labels
         self.cry_index = labels.index("Baby cry, infant cry")
         print(f"✅ YAMNet geladen. Baby cry index: {self.cry_index}")
+        phase_start = self._mark_phase("load class map", phase_start)
+        
+        # Personalisierter Head auf den Embeddings (cry_head.py)
+        self.cry_head = None
+        if head_path:
+            from cry_head import CryHead
+            self.cry_head = CryHead.load(head_path)
+            print(f"🧠 Cry-Head geladen: {head_path} ({self.cry_head.kind}, {self.config.head_mode})")
+        
+        # Weitere Alarm-Typen aus denselben Scores (sound_events.py, "default" oder JSON-Datei)
+        self.sound_events = None
+        if sound_events:
+            from sound_events import SoundEventTaxonomy, load_taxonomy
+            groups, errors = load_taxonomy(sound_events)
+            if not errors:
+                try:
+                    self.sound_events = SoundEventTaxonomy(groups, labels, self.hop_length)
+                except ValueError as e:
+                    errors = [str(e)]
+            if errors:
+                print(f"❌ Ungültige Geräusch-Taxonomie: {'; '.join(errors)}")
+                sys.exit(1)
+            for warning in self.sound_events.warnings:
+                print(f"⚠️ {warning}")
+            print(f"🔔 Geräusch-Events: {self.sound_events.describe()}")
+        
+        self._init_hot_loop()
+        if not standby:
+            self.open_outputs()
         
         # Socket Server erstellen
         self._create_server()
+        self._mark_phase("create TCP server", phase_start)
         
         # Signal Handler für sauberes Beenden
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        if hasattr(signal, "SIGHUP"):
+            # Konfiguration neu lesen (wird zwischen zwei Hops angewendet)
+            signal.signal(signal.SIGHUP, self._on_sighup)
+        if hasattr(signal, "SIGUSR1"):
+            # Profiling: USR1 = cProfile 30s, USR2 = Stack-Sampler 60s
+            signal.signal(signal.SIGUSR1, lambda sig, frame: self.request_profile("cprofile", 30.0, "sigusr1"))
+            signal.signal(signal.SIGUSR2, lambda sig, frame: self.request_profile("sample", 60.0, "sigusr2"))
+    
+    def _mark_phase(self, phase: str, phase_start: float) -> float:
+        """Speichert die Dauer einer Startup-Phase und liefert den neuen Startzeitpunkt"""
+        now = time.perf_counter()
+        self.startup_timings.append((phase, now - phase_start))
+        return now
+    
+    def warm_up(self):
+        """Erste Inferenz ausführen (Graph-Tracing) und Dauer messen"""
+        import numpy as np
+        phase_start = time.perf_counter()
+        self.predict_cry_probability(np.zeros(int(self.sample_rate * self.frame_length), dtype=np.float32))
+        self._mark_phase("first inference (warm-up)", phase_start)
+    
+    def startup_report(self) -> str:
+        """Tabelle der Startup-Phasen"""
+        total = sum(duration for _, duration in self.startup_timings)
+        lines = ["⏱️ Startup-Profil:"]
+        for phase, duration in self.startup_timings:
+            lines.append(f"   {duration * 1000:8.1f}ms  {phase}")
+        lines.append(f"   {total * 1000:8.1f}ms  gesamt")
+        return "\n".join(lines)
+    
+    def open_outputs(self):
+        """Clip-Recorder, Archiv, Timeline und Viz-Stream öffnen (schreibender Teil des Service)"""
+        options = self._output_options
+        
+        # Pre-Roll Clips (None oder pre_roll <= 0 deaktiviert)
+        if options["clip_dir"] and options["pre_roll"] > 0:
+            from clip_recorder import ClipRecorder
+            self.clip_recorder = ClipRecorder(options["clip_dir"], self.sample_rate,
+                                              options["pre_roll"], options["post_roll"])
+            self.clip_recorder.on_saved = lambda path, seconds: self._send_event(
+                "clip_saved", {"clip_path": path, "seconds": round(seconds, 1)})
+        
+        # Nacht-Archiv (komprimierte Chunks + Index), nur wenn Ordner angegeben
+        if options["archive_dir"]:
+            from audio_archive import AudioArchiveWriter
+            self.audio_archive = AudioArchiveWriter(options["archive_dir"], self.sample_rate,
+                                                    options["archive_chunk"])
+        
+        # Timeline-Store: ein Record pro Hop (Wahrscheinlichkeit, Zustand, Event)
+        if options["timeline_dir"]:
+            from timeline_store import TimelineWriter, STATE_CODES, EVENT_CODES
+            self.timeline = TimelineWriter(options["timeline_dir"])
+            self._state_codes = STATE_CODES
+            self._event_codes = EVENT_CODES
+        
+        # Live-Visualisierung (Spektrogramm + Top-k) aus den vorhandenen YAMNet-Tensoren
+        if options["viz_port"]:
+            from viz_stream import VizStreamServer
+            self.viz_stream = VizStreamServer(self.host, options["viz_port"], self.class_names,
+                                              self.cry_index, self.hop_length)
+        self._apply_config(self.config, None)
+    
+    def _heartbeat(self, message: bytes):
+        """Lebenszeichen an den Supervisor (nur im Supervisor-Betrieb)"""
+        if self.heartbeat_fd is None:
+            return
+        try:
+            os.write(self.heartbeat_fd, message)
+        except OSError:
+            # Supervisor weg - nicht verwaist weiterlaufen
+            print("⚠️ Supervisor nicht mehr erreichbar - beende")
+            self.is_running = False
+    
+    def wait_for_promotion(self):
+        """Warm-Standby: Modell geladen + erste Inferenz, warten auf "promote" vom Supervisor"""
+        self.warm_up()
+        if self.audio_fd is not None:
+            # Audio vom Supervisor schon jetzt mitlesen, aber nur die letzte Sekunde behalten:
+            # nach der Übernahme ist der erste Block sofort da
+            self._open_audio_source().jitter.max_buffered_samples = len(self._audio_buffer)
+        self._heartbeat(b"warm\n")
+        print("🧊 Warm-Standby bereit")
+        inherited = None
+        for line in sys.stdin:
+            command, _, payload = line.strip().partition(" ")
+            if command == "promote":
+                # Optional die zur Laufzeit geänderte Konfiguration des ausgefallenen Detectors
+                inherited = json.loads(payload) if payload else None
+                break
+        else:
+            sys.exit(0)  # Supervisor hat die Pipe geschlossen
+        promoted_at = time.perf_counter()
+        if inherited:
+            self.request_config(inherited, "failover")
+        if self._audio is not None:
+            self._audio.jitter.max_buffered_samples = None
+        self.open_outputs()
+        print(f"🔥 Übernommen ({(time.perf_counter() - promoted_at) * 1000:.1f}ms bis Ausgaben offen)")
     
     def _create_server(self):
         """Erstellt TCP Server für IPC"""
+        if self.listen_fd is not None:
+            # Vom Supervisor geerbter Listening-Socket: Verbindungen warten im Backlog
+            self.server_socket = socket.socket(fileno=self.listen_fd)
+            print(f"📡 TCP Server übernommen (fd {self.listen_fd})")
+            return
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -71,58 +328,251 @@ class BabyCryDetectorService:
     
     def _accept_connections(self):
         """Akzeptiert eingehende Client-Verbindungen"""
+        from subscriptions import Subscription
+        
         while self.is_running:
             try:
                 client_socket, address = self.server_socket.accept()
+                # Kleine Nachrichten (Events, pong) sofort senden - ohne Nagle + Delayed ACK ~40ms
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 print(f"🔗 Client verbunden: {address}")
                 
+                # Hängender Client blockiert Sendungen unter connections_lock höchstens kurz
+                _set_send_timeout(client_socket, SEND_TIMEOUT)
+                
+                # Begrüßung + Snapshot unter dem Lock bauen, aber ohne ihn senden - der Client ist
+                # noch nicht registriert, kein anderer Thread schreibt auf diesen Socket
                 with self.connections_lock:
-                    self.client_connections.append(client_socket)
+                    snapshot_seq = self._event_seq
+                    greeting = (self._direct_line("service_started", {"message": "Detector service connected",
+                                                                      "instance": self.instance_id})
+                                + self._direct_line("snapshot", self._snapshot()))
+                try:
+                    client_socket.sendall(greeting.encode('utf-8'))
+                except OSError:
+                    client_socket.close()
+                    continue
                 
-                # Begrüßungs-Event senden
-                self._send_event("service_started", {"message": "Detector service connected"})
+                with self.connections_lock:
+                    # Events seit dem Snapshot nachschieben, danach geht es live weiter
+                    missed = [line for seq, line in self._replay if seq > snapshot_seq]
+                    try:
+                        if missed:
+                            client_socket.sendall(("\n".join(missed) + "\n").encode('utf-8'))
+                    except OSError:
+                        client_socket.close()
+                        continue
+                    self._snapshot_seq[client_socket] = self._event_seq
+                    self.subscriptions[client_socket] = Subscription()
+                    self.client_connections.append(client_socket)
+                threading.Thread(target=self._read_commands, args=(client_socket,), daemon=True).start()
                 
             except socket.error:
                 if self.is_running:  # Nur loggen wenn nicht beim Shutdown
                     print("⚠️ Socket Accept Fehler")
                 break
     
+    def _snapshot(self) -> dict:
+        """Aktueller Stand der Bestätigungslogik (für neue Verbindungen; nur unter connections_lock
+        aufrufen - Zustandswechsel und ihre Events passieren unter demselben Lock)"""
+        confirmation = self.confirmation
+        snapshot = {
+            "instance": self.instance_id,
+            "state": confirmation.state,
+            "is_crying": confirmation.confirmed,
+            "probability": self._last_probability,
+            "avg_probability": float(confirmation.last_avg_prob) if confirmation.confirmed else 0.0,
+            "cry_started": self._cry_started_at if confirmation.confirmed else None,
+            "last_cry_time": confirmation.last_cry_time,
+            "mode": self.scheduler.mode,
+            "running": self.is_running,
+            "uptime": time.time() - self._started_at,
+        }
+        if self.sound_events:
+            snapshot["sounds"] = self.sound_events.snapshot()
+        return snapshot
+    
+    def _direct_line(self, event_type: str, data: dict) -> str:
+        """Nachricht für einen einzelnen Client; trägt den aktuellen Stand (seq), ohne ihn zu erhöhen
+        (nur unter connections_lock aufrufen)"""
+        event = {"type": event_type, "seq": self._event_seq, "timestamp": time.time(), "data": data}
+        return json.dumps(event) + '\n'
+    
+    def _send_direct(self, client_socket: socket.socket, event_type: str, data: dict):
+        """Nachricht nur an einen registrierten Client (nur unter connections_lock aufrufen)"""
+        client_socket.sendall(self._direct_line(event_type, data).encode('utf-8'))
+    
+    def _resync(self, client_socket: socket.socket, data: dict):
+        """Events zwischen since (letzte seq des Clients) und dem Snapshot dieser Verbindung nachliefern"""
+        try:
+            since = int(data.get("since", 0))
+        except (TypeError, ValueError):
+            since = 0
+        with self.connections_lock:
+            upto = self._snapshot_seq.get(client_socket)
+            if upto is None:
+                return
+            # anderer Prozess (Neustart/Failover): alte Nummern gelten nicht, Lücke ist unbekannt
+            foreign = data.get("instance") not in (None, self.instance_id)
+            if foreign:
+                since = 0
+            events = [line for seq, line in self._replay if since < seq <= upto]
+            truncated = foreign or self._replay_dropped > since
+            # Events liegen schon serialisiert im Ring: in die leere Liste am Ende einsetzen
+            reply = json.dumps({"type": "replay", "seq": self._event_seq, "timestamp": time.time(),
+                                "data": {"since": since, "upto": upto, "truncated": truncated, "events": []}})
+            reply = reply[:-len("]}}")] + ", ".join(events) + "]}}\n"
+            try:
+                client_socket.sendall(reply.encode('utf-8'))
+            except OSError:
+                return
+        print(f"🔁 Resync: {len(events)} Events seit seq {since}{' (unvollständig)' if truncated else ''}")
+    
     def _send_event(self, event_type: str, data: dict = None):
         """Sendet Event über TCP Socket an alle verbundenen Clients"""
-        event = {
-            "type": event_type,
-            "timestamp": time.time(),
-            "data": data or {}
-        }
+        with self.connections_lock:
+            self._event_seq += 1
+            event = {
+                "type": event_type,
+                "seq": self._event_seq,
+                "timestamp": time.time(),
+                "data": data or {}
+            }
+            if event_type in NOT_REPLAYED:
+                self._deliver(event)
+                return
+            # Fertige Zeile aufheben: Replay ohne Neu-Serialisieren
+            line = json.dumps(event)
+            if len(self._replay) == REPLAY_EVENTS:
+                self._replay_dropped = self._replay[0][0]
+            self._replay.append((self._event_seq, line))
+            self._deliver(event, line)
+    
+    def _publish_stream(self, stream: str, data: dict):
+        """Stream-Nachricht (pro Hop) an ihre Abonnenten; zählt nicht als Event (seq = letztes Event)
+        und wird nicht nachgeliefert. Aufrufer prüfen vorher `stream in self.wanted_streams`"""
+        with self.connections_lock:
+            self._deliver({"type": stream, "seq": self._event_seq, "timestamp": time.time(), "data": data})
+    
+    def _deliver(self, event: dict, line: Optional[str] = None):
+        """An alle Clients, deren Abo die Nachricht will; serialisiert nur, wenn es welche gibt
+        (nur unter connections_lock aufrufen)"""
+        now = time.monotonic()
+        event_type = event["type"]
+        subscriptions = self.subscriptions
+        recipients = [client for client in self.client_connections
+                      if subscriptions[client].accepts(event_type, now)]
+        if not recipients:
+            return
+        payload = ((line or json.dumps(event)) + '\n').encode('utf-8')
         
-        json_str = json.dumps(event) + '\n'
+        # Sende an alle Abonnenten
+        disconnected_clients = []
         
-        with self.connections_lock:
-            # Sende an alle verbundenen Clients
-            disconnected_clients = []
-            
-            for client_socket in self.client_connections:
-                try:
-                    client_socket.send(json_str.encode('utf-8'))
-                except (ConnectionResetError, BrokenPipeError):
-                    print("📡 Client disconnected")
-                    disconnected_clients.append(client_socket)
-                except Exception as e:
-                    print(f"⚠️ Fehler beim Senden an Client: {e}")
-                    disconnected_clients.append(client_socket)
-            
-            # Disconnected Clients entfernen
-            for client in disconnected_clients:
-                try:
-                    client.close()
-                except:
-                    pass
+        for client_socket in recipients:
+            try:
+                # Nur ein Send: was nach SEND_TIMEOUT nicht komplett im Puffer ist, gilt als hängender Client
+                if client_socket.send(payload) < len(payload):
+                    raise BlockingIOError("Client liest nicht mit (Sendepuffer voll)")
+            except (ConnectionResetError, BrokenPipeError):
+                print("📡 Client disconnected")
+                disconnected_clients.append(client_socket)
+            except Exception as e:
+                print(f"⚠️ Fehler beim Senden an Client: {e}")
+                disconnected_clients.append(client_socket)
+        
+        # Disconnected Clients entfernen
+        if disconnected_clients:
+            self._drop_clients(disconnected_clients)
+    
+    def _drop_clients(self, clients: List[socket.socket]):
+        """Verbindungen schließen und mit ihren Abos entfernen (nur unter connections_lock aufrufen)"""
+        from subscriptions import wanted_streams
+        
+        for client in clients:
+            try:
+                client.close()
+            except:
+                pass
+            if client in self.subscriptions:
                 self.client_connections.remove(client)
+                del self.subscriptions[client]
+            self._snapshot_seq.pop(client, None)
+        self.wanted_streams = wanted_streams(self.subscriptions.values())
     
-    def predict_cry_probability(self, audio_buffer: np.ndarray) -> float:
+    def _change_subscription(self, client_socket: socket.socket, command: str, data: dict):
+        """subscribe/unsubscribe eines Clients übernehmen und mit dem neuen Stand beantworten"""
+        from subscriptions import wanted_streams
+        
+        with self.connections_lock:
+            subscription = self.subscriptions.get(client_socket)
+            if subscription is None:
+                return
+            if command == "subscribe":
+                errors = subscription.subscribe(data)
+            else:
+                errors = subscription.unsubscribe(data)
+            self.wanted_streams = wanted_streams(self.subscriptions.values())
+            try:
+                if errors:
+                    self._send_direct(client_socket, "subscribe_rejected", {"errors": errors})
+                else:
+                    self._send_direct(client_socket, "subscribed", subscription.describe())
+            except OSError:
+                return
+        if errors:
+            print(f"⚠️ Abo abgelehnt: {'; '.join(errors)}")
+        else:
+            streams = ", ".join(sorted(self.wanted_streams)) or "-"
+            print(f"📬 {command}: {data['types']} | Streams mit Abonnenten: {streams}")
+    
+    def _reply(self, client_socket: Optional[socket.socket], event_type: str, data: dict):
+        """Antwort auf eine Control-Message nur an den anfragenden Client (ohne seq/Replay-Ring);
+        ohne Socket (Signal, Start) als normales Event an alle"""
+        if client_socket is None:
+            self._send_event(event_type, data)
+            return
+        with self.connections_lock:
+            if client_socket not in self.subscriptions:
+                return
+            try:
+                self._send_direct(client_socket, event_type, data)
+            except OSError:
+                pass
+    
+    def _pong(self, client_socket: socket.socket, data: dict):
+        """Antwort auf ping: Nutzdaten zurück + Detektor-Zeit und Alter des letzten Hops"""
+        last_hop = self._last_hop_at
+        reply = {
+            "id": data.get("id"),
+            "client_time": data.get("client_time"),
+            "detector_time": time.time(),
+            "hop_age_ms": round((time.monotonic() - last_hop) * 1000, 1) if last_hop else None,
+        }
+        with self.connections_lock:
+            if client_socket not in self.subscriptions:
+                return
+            try:
+                self._send_direct(client_socket, "pong", reply)
+            except OSError:
+                pass
+    
+    def predict_cry_probability(self, audio_buffer: "np.ndarray") -> float:
         """Berechnet Baby-Schrei-Wahrscheinlichkeit"""
+        if self.scheduler.lite:
+            # Degradation "lite": nur der neueste Patch (ein statt zwei YAMNet-Frames)
+            audio_buffer = audio_buffer[-self._lite_samples:]
         scores, embeddings, spectrogram = self.yamnet(audio_buffer)
-        mean_scores = tf.reduce_mean(scores, axis=0).numpy()
+        # Mittelwert direkt in den wiederverwendeten Puffer (EagerTensor -> NumPy teilt den Speicher)
+        mean_scores = self._mean_scores
+        self._patch_scores = self._np.asarray(scores)   # für max-Pooling der Geräusch-Events
+        self._np.mean(self._patch_scores, axis=0, out=mean_scores)
+        # Spektrogramm nur in NumPy wandeln, wenn ein Viz-Client einen Frame braucht
+        if self.viz_stream and not self.scheduler.lite and self.viz_stream.wants_frame():
+            self.viz_stream.publish(self._np.asarray(spectrogram), mean_scores)
+        if self.cry_head:
+            head_prob = self.cry_head.score_hop(self._np.asarray(embeddings))
+            return self.cry_head.combine(head_prob, float(mean_scores[self.cry_index]), self.config.head_mode)
         return float(mean_scores[self.cry_index])
     
     def start_service(self):
@@ -138,136 +588,504 @@ class BabyCryDetectorService:
         # Detection Loop (Hauptthread)
         self._detection_loop()
     
-    def _detection_loop(self):
-        """Haupt-Detection-Loop mit robuster Bestätigungslogik"""
-        block_size = int(self.sample_rate * self.hop_length)
-        buffer_size = int(self.sample_rate * self.frame_length)
-        audio_buffer = np.zeros(buffer_size, dtype=np.float32)
+    def _init_hot_loop(self):
+        """Puffer für den Detection Loop einmalig anlegen (pro Hop wird nur wiederverwendet)"""
+        import numpy as np
+        from cry_confirmation import CryConfirmation
+        from deadline_scheduler import HopScheduler
+        
+        self._np = np
+        self._block_size = int(self.sample_rate * self.hop_length)
+        self._audio_buffer = np.zeros(int(self.sample_rate * self.frame_length), dtype=np.float32)
+        self._mean_scores = np.zeros(len(self.class_names), dtype=np.float32)
+        self._patch_scores = None
+        self._lite_samples = int(self.sample_rate * 0.975)   # kürzeste YAMNet-Eingabe = ein Patch
+        self.confirmation = CryConfirmation()
+        # Deadline pro Hop + Degradationsleiter (deadline_scheduler.py)
+        self.scheduler = HopScheduler(self.hop_length, self.frame_length, self.sample_rate)
+        self._apply_config(self.config, None)
+        self._last_status_time = 0
+        
+        # Allokationszähler: Netto-Änderung der Python-Speicherblöcke pro Hop
+        self.hot_loop_stats = {"hops": 0, "alloc_blocks_total": 0, "alloc_blocks_per_hop": 0.0}
+        self._alloc_window_blocks = 0
+        self._alloc_window_hops = 0
+    
+    def request_config(self, changes: dict, source: str,
+                       client_socket: Optional[socket.socket] = None) -> List[str]:
+        """Änderungen validieren und für den nächsten Hop vormerken; liefert Fehler"""
+        with self._config_lock:
+            pending = self._pending_config
+            base = pending[0] if pending else self.config
+            new_config, errors = base.updated(changes)
+            if errors:
+                print(f"⚠️ Konfiguration abgelehnt ({source}): {'; '.join(errors)}")
+                self._reply(client_socket, "config_rejected", {"source": source, "errors": errors})
+                return errors
+            self._pending_config = (new_config, source)
+            return []
+    
+    def reload_config_file(self, source: str = "reload",
+                           client_socket: Optional[socket.socket] = None) -> List[str]:
+        """Konfigurationsdatei neu lesen (SIGHUP oder Control-Message)"""
+        if not self.config_path:
+            return ["keine Konfigurationsdatei (--config)"]
+        from detector_config import load_config_file
+        new_config, errors = load_config_file(self.config_path, self._base_config)
+        if errors:
+            print(f"⚠️ Konfiguration abgelehnt ({source}): {'; '.join(errors)}")
+            self._reply(client_socket, "config_rejected", {"source": source, "errors": errors})
+            return errors
+        with self._config_lock:
+            self._pending_config = (new_config, source)
+        return []
+    
+    def _apply_config(self, new_config: "DetectorConfig", source: Optional[str]):
+        """Parameter-Satz übernehmen (nur aus dem Detection Loop bzw. beim Start)"""
+        changed = self.config.diff(new_config)
+        self.config = new_config
+        
+        confirmation = self.confirmation
+        confirmation.window = new_config.cry_window
+        confirmation.required_percentage = new_config.cry_required_percentage
+        confirmation.min_detections = max(1, round(new_config.cry_min_seconds / self.hop_length))
+        confirmation.stop_delay = new_config.stop_delay
+        if self.viz_stream:
+            self.viz_stream.min_interval = 1.0 / new_config.viz_max_fps if new_config.viz_max_fps > 0 else 0.0
+        if self.cry_head and new_config.head_weight is not None:
+            self.cry_head.weight = new_config.head_weight
+        scheduler = self.scheduler
+        scheduler.max_lag = new_config.max_lag
+        scheduler.degrade = new_config.degrade == "auto"
+        if not scheduler.degrade:
+            with self.connections_lock:
+                change = scheduler.reset(time.monotonic())
+                if change:
+                    self._apply_mode(change)
+        
+        if source is None:
+            return  # Startwerte
+        summary = ", ".join(f"{key}: {old} -> {new}" for key, (old, new) in changed.items()) or "keine Änderung"
+        print(f"⚙️ Konfiguration übernommen ({source}): {summary}")
+        # Supervisor merkt sich den aktiven Satz für den nächsten Failover
+        self._heartbeat(b"config " + json.dumps(new_config.to_dict()).encode() + b"\n")
+        self._send_event("config_changed", {"source": source, "changed": changed,
+                                            "config": new_config.to_dict()})
+    
+    def _apply_mode(self, change: dict):
+        """Degradationsstufe übernehmen (nur aus dem Detection Loop bzw. _apply_config)"""
+        from deadline_scheduler import MODE_CODES
         
-        last_status_time = 0
+        self.hop_length = change["hop_length"]
+        self._block_size = int(self.sample_rate * self.hop_length)
+        self.confirmation.min_detections = max(1, round(self.config.cry_min_seconds / self.hop_length))
+        if self.sound_events:
+            self.sound_events.set_hop(self.hop_length)
+        if self.viz_stream:
+            self.viz_stream.hop_seconds = self.hop_length
         
-        # Robuste Bestätigungslogik-Variablen
-        cry_confirmation_window = 5.0   # 5 Sekunden Beobachtungsfenster
-        cry_required_percentage = 0.6   # 60% der Zeit muss Weinen erkannt werden
-        stop_confirmation_delay = 8.0   # 8 Sekunden kontinuierlich still für Stop
+        icon = "🐢" if change["level"] > MODE_CODES[change["previous"]] else "🐇"
+        print(f"{icon} Modus: {change['previous']} -> {change['mode']} ({change['reason']}, "
+              f"Last {change['load']:.2f}, Lag {change['lag_ms']:.0f}ms)")
+        self._send_event("mode_changed", change)
+    
+    def _on_sighup(self, sig, frame):
+        self._reload_requested = True
+    
+    def request_profile(self, mode: str, seconds: float, source: str,
+                        client_socket: Optional[socket.socket] = None) -> List[str]:
+        """Profiling-Lauf vormerken (startet zwischen zwei Hops im Detection Loop)"""
+        from profiling import MODES
+        errors = []
+        if mode not in MODES:
+            errors.append(f"mode muss einer von {', '.join(MODES)} sein")
+        if not 1.0 <= seconds <= 600.0:
+            errors.append("seconds muss zwischen 1 und 600 liegen")
+        if self.profiler or self._profile_request:
+            errors.append("Profiling läuft bereits")
+        if errors:
+            if source.startswith("sig"):
+                print(f"⚠️ Profiling abgelehnt ({source}): {'; '.join(errors)}")
+            else:
+                self._reply(client_socket, "profile_rejected", {"source": source, "errors": errors})
+            return errors
+        self._profile_request = (mode, seconds, source)
+        return []
+    
+    def _start_profile(self):
+        from profiling import ProfileSession
+        mode, seconds, source = self._profile_request
+        self._profile_request = None
+        self.profiler = ProfileSession(self.profile_dir, "detector", mode, seconds)
+        self.profiler.start()
+        self._stages = self.profiler.stages
+        print(f"🔬 Profiling gestartet ({mode}, {seconds:.0f}s, {source})")
+        self._send_event("profile_started", {"mode": mode, "seconds": seconds, "source": source})
+    
+    def _finish_profile(self):
+        profiler, self.profiler, self._stages = self.profiler, None, None
+        paths = profiler.finish(f"Scheduler: {self.scheduler.metrics()}")
+        print(f"🔬 Profiling beendet: {', '.join(paths)}")
+        self._send_event("profile_finished", {"mode": profiler.mode, "files": paths})
+    
+    def _read_commands(self, client_socket: socket.socket):
+        """Control-Messages eines Clients lesen (JSON pro Zeile)"""
+        buffer = b""
+        while self.is_running:
+            try:
+                chunk = client_socket.recv(4096)
+            except OSError:
+                chunk = b""
+            if chunk:
+                buffer += chunk
+                if len(buffer) > MAX_CONTROL_LINE and b"\n" not in buffer:
+                    print("⚠️ Übergroße Control-Message - Verbindung getrennt")
+                    chunk = b""
+            if not chunk:
+                # Verbindung zu: Abos sofort freigeben, nicht erst beim nächsten Sendefehler
+                with self.connections_lock:
+                    if client_socket in self.subscriptions:
+                        print("📡 Client disconnected")
+                        self._drop_clients([client_socket])
+                return
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    print(f"⚠️ Ungültige Control-Message verworfen: {line[:80]!r}")
+                    continue
+                data = message.get("data")
+                if data is None:
+                    data = {}
+                if not isinstance(data, dict):
+                    print(f"⚠️ Control-Message mit ungültigem data verworfen: {line[:80]!r}")
+                    continue
+                try:
+                    self._handle_command(client_socket, message.get("type"), data)
+                except Exception as e:
+                    # Fehler in einem Kommando beendet nicht den Control-Kanal der Verbindung
+                    print(f"⚠️ Fehler bei Control-Message {message.get('type')!r}: {e}")
+    
+    def _handle_command(self, client_socket: socket.socket, command, data: dict):
+        """Eine Control-Message ausführen (data ist immer ein dict)"""
+        if command == "set_config":
+            self.request_config(data, "control", client_socket)
+        elif command == "reload_config":
+            self.reload_config_file("control", client_socket)
+        elif command == "resync":
+            self._resync(client_socket, data)
+        elif command in ("subscribe", "unsubscribe"):
+            self._change_subscription(client_socket, command, data)
+        elif command == "ping":
+            self._pong(client_socket, data)
+        elif command == "get_config":
+            self._reply(client_socket, "config", self.config.to_dict())
+        elif command == "profile":
+            try:
+                seconds = float(data.get("seconds", 30.0))
+            except (TypeError, ValueError):
+                seconds = -1.0
+            self.request_profile(str(data.get("mode", "cprofile")), seconds, "control", client_socket)
+    
+    def _open_audio_source(self):
+        """Audio-Quelle öffnen: Mikrofon, Capture-Client (UDP) oder Supervisor (geerbter Socket)"""
+        from audio_sources import MicrophoneSource, NativeMicrophoneSource, NetworkAudioSource
         
-        cry_detections = []  # Liste von (timestamp, is_crying) tupeln
-        confirmed_crying = False
-        last_cry_time = None
-        quiet_streak_start = None
+        if self.audio_source == "net" or self.audio_fd is not None:
+            source = NetworkAudioSource("0.0.0.0", self.audio_port, fileno=self.audio_fd)
+        elif self.audio_source == "native":
+            source = NativeMicrophoneSource(self.sample_rate, self.audio_device, channels=self.audio_channels)
+        else:
+            source = MicrophoneSource(self.sample_rate)
+        self._audio = source.__enter__()
+        return self._audio
+    
+    def _detection_loop(self):
+        """Haupt-Detection-Loop mit robuster Bestätigungslogik"""
+        source = self._audio or self._open_audio_source()
+        scheduler = self.scheduler
         
         try:
-            with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32'):
-                while self.is_running:
-                    try:
-                        # Audio lesen
-                        data, _ = sd.rec(block_size, samplerate=self.sample_rate, channels=1, dtype='float32'), sd.wait()
-                        data = data[:, 0]  # Mono
-                        
-                        # Buffer aktualisieren
-                        audio_buffer = np.roll(audio_buffer, -block_size)
-                        audio_buffer[-block_size:] = data
-                        
-                        # Vorhersage
-                        cry_probability = self.predict_cry_probability(audio_buffer)
-                        is_crying_now = cry_probability > self.threshold
-                        current_time = time.time()
-                        
-                        # Neue Detection zu Liste hinzufügen
-                        cry_detections.append((current_time, is_crying_now, cry_probability))
-                        
-                        # Alte Detections außerhalb des Fensters entfernen
-                        cry_detections = [(t, c, p) for t, c, p in cry_detections 
-                                        if current_time - t <= cry_confirmation_window]
-                        
-                        # Analyse des Confirmation Windows für CRY START
-                        if not confirmed_crying and len(cry_detections) >= 6:  # mindestens 3 Sekunden Daten
-                            crying_detections = sum(1 for _, is_cry, _ in cry_detections if is_cry)
-                            cry_percentage = crying_detections / len(cry_detections)
-                            
-                            if cry_percentage >= cry_required_percentage:
-                                confirmed_crying = True
-                                last_cry_time = current_time
-                                quiet_streak_start = None
-                                avg_prob = np.mean([p for _, c, p in cry_detections if c])
-                                print(f"👶🔊 WEINEN BESTÄTIGT! ({cry_percentage*100:.1f}% over {cry_confirmation_window}s, Avg Prob: {avg_prob:.3f})")
-                                self._send_event("cry_detected", {"probability": float(avg_prob)})
-                                
-                        # Update last_cry_time wenn aktuell weint (aber reset Timer nicht sofort)
-                        if is_crying_now and confirmed_crying:
-                            last_cry_time = current_time
-                            # quiet_streak_start = None  # ← ENTFERNT - Timer läuft weiter
-                        
-                        # CRY STOP Logik - längere kontinuierliche Stille nötig
-                        if confirmed_crying:
-                            if not is_crying_now:
-                                # Stille erkannt
-                                if quiet_streak_start is None:
-                                    # Erste Stille - Timer starten
-                                    quiet_streak_start = current_time
-                                    print(f"🤫 Stille-Timer gestartet (Prob: {cry_probability:.3f}) - brauche {stop_confirmation_delay}s")
-                                else:
-                                    # Timer läuft bereits - prüfe wie lange
-                                    elapsed = current_time - quiet_streak_start
-                                    if elapsed >= stop_confirmation_delay:
-                                        # Timer abgelaufen - Beruhigung bestätigt
-                                        confirmed_crying = False
-                                        print(f"✅ BERUHIGUNG BESTÄTIGT! ({elapsed:.1f}s kontinuierliche Stille)")
-                                        self._send_event("cry_stopped", {"probability": cry_probability})
-                                        quiet_streak_start = None
-                                        cry_detections.clear()
-                                    # Sonst: Timer läuft weiter - kein Print
-                            else:
-                                # Weinen erkannt während confirmed_crying
-                                if quiet_streak_start is not None:
-                                    elapsed = current_time - quiet_streak_start
-                                    print(f"🔄 Weinen unterbricht Stille nach {elapsed:.1f}s (Prob: {cry_probability:.3f})")
-                                    quiet_streak_start = None
-                                else:
-                                    # Debug: Weinen während confirmed_crying aber kein Timer
-                                    print(f"🔄 Weinen während CRYING state (Prob: {cry_probability:.3f})")
-                        
-                        # Status Update (alle 10 Sekunden)
-                        if current_time - last_status_time >= 10:
-                            if confirmed_crying:
-                                if quiet_streak_start is not None:
-                                    quiet_duration = current_time - quiet_streak_start
-                                    remaining = stop_confirmation_delay - quiet_duration
-                                    status = f"CHECKING_STOP ({remaining:.1f}s)"
-                                else:
-                                    status = "CRYING"
-                            else:
-                                if len(cry_detections) >= 6:
-                                    crying_count = sum(1 for _, is_cry, _ in cry_detections if is_cry)
-                                    percentage = (crying_count / len(cry_detections)) * 100
-                                    status = f"ANALYZING ({percentage:.1f}% crying)"
-                                else:
-                                    status = "QUIET"
-                            
-                            self._send_event("status", {
-                                "probability": cry_probability,
-                                "is_crying": confirmed_crying,
-                                "running": True,
-                                "connected_clients": len(self.client_connections)
-                            })
-                            
-                            clients = len(self.client_connections)
-                            print(f"📊 Status: {status} | Prob: {cry_probability:.3f} | Clients: {clients}")
-                            last_status_time = current_time
-                        
+            self._heartbeat(b"active\n")
+            while self.is_running:
+                try:
+                    if self._profile_request:
+                        self._start_profile()
+                    stages = self._stages
+                    if stages:
+                        stages.start()
+                    
+                    # Veraltetes Audio verwerfen: die Entscheidung bleibt nah an der Echtzeit,
+                    # das neueste Fenster wird danach komplett neu gelesen
+                    block_size = self._block_size
+                    stale = scheduler.stale_samples(source.backlog_samples())
+                    if stale:
+                        source.skip(stale)
+                        block_size = len(self._audio_buffer)
+                    
+                    # Audio lesen (None = Capture-Client liefert gerade nichts)
+                    data = source.read_block(block_size)
+                    if stages:
+                        stages.lap("capture")
+                    if data is None:
+                        self._heartbeat(b"idle\n")
+                        continue
+                    hop_start = time.perf_counter()
+                    self._process_hop(data, time.time())
+                    processing = time.perf_counter() - hop_start
+                    self._last_hop_at = time.monotonic()
+                    
+                    # Deadline: Rechenzeit gegen Hop-Budget, Rückstand gegen max_lag
+                    # (nicht während cProfile läuft - der Profiler selbst verlangsamt den Hop)
+                    if not (self.profiler and self.profiler.mode == "cprofile"):
+                        with self.connections_lock:   # Modus im Snapshot passt zur seq
+                            change = scheduler.record(time.monotonic(), processing,
+                                                      source.backlog_samples() / self.sample_rate)
+                            if change:
+                                self._apply_mode(change)
+                    if "diagnostics" in self.wanted_streams:
+                        self._publish_stream("diagnostics", {"processing_ms": round(processing * 1000, 2),
+                                                             **scheduler.metrics()})
+                    self._heartbeat(b"hop\n")
+                    if stages:
+                        stages.lap("schedule")
+                    if not scheduler.behind:
                         time.sleep(0.1)
-                        
-                    except Exception as e:
-                        print(f"❌ Fehler in Detection Loop: {e}")
-                        time.sleep(1)
+                    if stages:
+                        stages.lap("idle")
+                        if self.profiler and self.profiler.expired:
+                            self._finish_profile()
+                    
+                except Exception as e:
+                    print(f"❌ Fehler in Detection Loop: {e}")
+                    time.sleep(1)
         except KeyboardInterrupt:
             print("\n⏹️ Detection gestoppt")
+        finally:
+            source.__exit__(None, None, None)
+            self._audio = None
+    
+    def _process_hop(self, data: "np.ndarray", current_time: float):
+        """Ein Hop: Buffer, Vorhersage, Bestätigungslogik, Aufzeichnung, Status"""
+        blocks_before = sys.getallocatedblocks()
+        
+        # Neue Konfiguration nur hier, zwischen zwei Hops, als Ganzes übernehmen
+        if self._reload_requested:
+            self._reload_requested = False
+            self.reload_config_file("sighup")
+        pending = self._pending_config
+        if pending is not None:
+            self._pending_config = None
+            self._apply_config(*pending)
+        
+        block_size = len(data)
+        block_start_time = current_time - block_size / self.sample_rate
+        
+        # Buffer in place nach vorne schieben (statt np.roll), in nicht überlappenden Stücken
+        audio_buffer = self._audio_buffer
+        shift_end = len(audio_buffer) - block_size
+        for start in range(0, shift_end, block_size):
+            stop = min(start + block_size, shift_end)
+            audio_buffer[start:stop] = audio_buffer[start + block_size:stop + block_size]
+        audio_buffer[shift_end:] = data
+        stages = self._stages   # Profiling (None = aus)
+        if stages:
+            stages.lap("capture")
+        if self.clip_recorder:
+            self.clip_recorder.add_audio(data)
+        if stages:
+            stages.lap("record")
+        
+        # Vorhersage
+        cry_probability = self.predict_cry_probability(audio_buffer)
+        if stages:
+            stages.lap("inference")
+        if self.audio_archive:
+            self.audio_archive.add_audio(data, cry_probability, block_start_time)
+        if stages:
+            stages.lap("record")
+        
+        confirmation = self.confirmation
+        # Zustandswechsel und ihre Events unter demselben Lock wie seq und Snapshot: eine neue
+        # Verbindung sieht entweder den alten Zustand + das Event oder den neuen Zustand ohne Event
+        with self.connections_lock:
+            hop_event = confirmation.update(current_time, cry_probability, self.config.threshold)
+            self._last_probability = cry_probability
+            sound_events = self.sound_events.update(current_time, self._mean_scores, self._patch_scores) \
+                if self.sound_events else ()
+            if stages:
+                stages.lap("confirmation")
+            if hop_event == "cry_detected":
+                self._cry_started_at = current_time
+                event_data = {"probability": float(confirmation.last_avg_prob)}
+                if self.clip_recorder:
+                    # Datei wird nach dem Post-Roll im Hintergrund geschrieben, Pfad folgt mit clip_saved
+                    self.clip_recorder.trigger("cry")
+                self._send_event("cry_detected", event_data)
+            elif hop_event == "cry_stopped":
+                self._send_event("cry_stopped", {"probability": cry_probability})
+            for event_type, event_data in sound_events:
+                self._send_event(event_type, event_data)
+        for event_type, event_data in sound_events:
+            if event_type == "sound_detected":
+                print(f"🚨 {event_data['kind']} erkannt ({event_data['class']}, Prob: {event_data['probability']:.3f})")
+            else:
+                print(f"✅ {event_data['kind']} vorbei (Spitze: {event_data['peak']:.3f})")
+        if "probability" in self.wanted_streams:
+            self._publish_stream("probability", {"probability": cry_probability, "state": confirmation.state,
+                                                 "is_crying": confirmation.confirmed})
+        if stages:
+            stages.lap("publish")
+        
+        # Timeline-Record für diesen Hop
+        if self.timeline:
+            self.timeline.append(current_time, cry_probability,
+                                 self._state_codes[confirmation.state], self._event_codes[hop_event],
+                                 self.scheduler.level)
+        if stages:
+            stages.lap("record")
+        
+        # Status Update (alle 10 Sekunden)
+        if current_time - self._last_status_time >= self.config.status_interval:
+            stats = self.hot_loop_stats
+            if self._alloc_window_hops:
+                stats["alloc_blocks_per_hop"] = self._alloc_window_blocks / self._alloc_window_hops
+            self._alloc_window_blocks = self._alloc_window_hops = 0
+            
+            self._send_event("status", {
+                "probability": cry_probability,
+                "is_crying": confirmation.confirmed,
+                "running": True,
+                "connected_clients": len(self.client_connections),
+                "alloc_blocks_per_hop": stats["alloc_blocks_per_hop"],
+                **self.scheduler.metrics(),
+                **({"sounds": self.sound_events.snapshot()} if self.sound_events else {})
+            })
+            
+            clients = len(self.client_connections)
+            mode = f" | Modus: {self.scheduler.mode}" if self.scheduler.level else ""
+            print(f"📊 Status: {confirmation.status_text(current_time)} | Prob: {cry_probability:.3f} | Clients: {clients}{mode}")
+            self._last_status_time = current_time
+        if stages:
+            stages.lap("publish")
+        
+        delta = sys.getallocatedblocks() - blocks_before
+        self.hot_loop_stats["hops"] += 1
+        self.hot_loop_stats["alloc_blocks_total"] += delta
+        self._alloc_window_blocks += delta
+        self._alloc_window_hops += 1
+    
+    def soak_test(self, hours: float, wav_path: Optional[str] = None,
+                  checkpoints: int = 8, max_growth_kb: float = 512.0,
+                  max_growth_blocks: int = 1024) -> bool:
+        """Spielt Audio über `hours` simulierte Stunden ohne Echtzeit-Warten ab und prüft,
+        dass Python-Heap (tracemalloc), Speicherblöcke und RSS nach dem Warm-up flach bleiben"""
+        import contextlib
+        import os
+        import tracemalloc
+        np = self._np
+        
+        block_size = self._block_size
+        if wav_path:
+            from corpus_scoring import load_wav
+            audio = load_wav(wav_path)
+        else:
+            # 60s Muster: 20s lautes Rauschen (Weinen), 40s leise - Zustandsmaschine läuft durch
+            rng = np.random.default_rng(0)
+            audio = (rng.standard_normal(self.sample_rate * 60) * 0.02).astype(np.float32)
+            audio[:self.sample_rate * 20] *= 20
+        audio = audio[:len(audio) - len(audio) % block_size]
+        blocks_in_audio = len(audio) // block_size
+        
+        total_hops = int(hours * 3600 / self.hop_length)
+        warmup_hops = min(total_hops // 10, 1200)
+        # Warm-up verlängern, bis der Replay-Ring (resync) voll ist: er ist begrenzt, erreicht die
+        # Obergrenze im Soak-Muster aber erst nach Stunden - höchstens 12 simulierte Stunden extra
+        max_warmup_hops = warmup_hops + int(12 * 3600 / self.hop_length)
+        checkpoint_every = max(1, (total_hops - warmup_hops) // checkpoints)
+        
+        def rss_kb() -> float:
+            try:
+                with open("/proc/self/statm") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+            except OSError:
+                import resource
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        
+        def fitted_growth(column: int) -> float:
+            """Anstieg der Ausgleichsgeraden über alle Checkpoints, hochgerechnet auf die Messdauer -
+            einzelne Allokationsstufen und das Audio-Muster kippen das Ergebnis nicht"""
+            xs = [sample[0] for sample in samples]
+            ys = [sample[column] for sample in samples]
+            mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+            var_x = sum((x - mean_x) ** 2 for x in xs)
+            if not var_x:
+                return 0.0
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+            return slope * (xs[-1] - xs[0])
+        
+        print(f"🧪 Soak-Test: {hours}h simuliert = {total_hops} Hops (Warm-up ab {warmup_hops})")
+        self.is_running = True
+        tracemalloc.start()
+        samples = []
+        now = time.time()
+        started = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            hop = 0
+            while hop < warmup_hops or (len(self._replay) < REPLAY_EVENTS and hop < max_warmup_hops):
+                offset = (hop % blocks_in_audio) * block_size
+                self._process_hop(audio[offset:offset + block_size], now)
+                now += self.hop_length
+                hop += 1
+            warmup_hops = hop
+            for hop in range(warmup_hops, warmup_hops + total_hops):
+                offset = (hop % blocks_in_audio) * block_size
+                self._process_hop(audio[offset:offset + block_size], now)
+                now += self.hop_length
+                if (hop - warmup_hops) % checkpoint_every == 0:
+                    samples.append((hop, tracemalloc.get_traced_memory()[0] / 1024,
+                                    sys.getallocatedblocks(), rss_kb()))
+        tracemalloc.stop()
+        elapsed = time.perf_counter() - started
+        print(f"   Warm-up {warmup_hops} Hops | Replay-Ring {len(self._replay)}/{REPLAY_EVENTS}")
+        
+        print(f"   {'Hop':>8} {'Heap KB':>10} {'Blöcke':>10} {'RSS KB':>10}")
+        for hop, heap_kb, blocks, rss in samples:
+            print(f"   {hop:>8} {heap_kb:>10.1f} {blocks:>10} {rss:>10.0f}")
+        hops = max(1, samples[-1][0] - samples[0][0])
+        heap_growth = fitted_growth(1)
+        block_growth = fitted_growth(2)
+        rss_growth = fitted_growth(3)
+        print(f"   {(warmup_hops + total_hops) / elapsed:.0f} Hops/s | Heap {heap_growth:+.1f} KB | "
+              f"Blöcke {block_growth:+.0f} ({block_growth / hops:+.4f}/Hop) | RSS {rss_growth:+.0f} KB")
+        
+        # Absolute Toleranz für Caches (Dateinamen, Timeline-Tagesdateien) - gleiches Urteil
+        # unabhängig von der Laufzeit; längere Läufe finden kleinere Lecks
+        passed = (heap_growth < max_growth_kb and block_growth < max_growth_blocks
+                  and rss_growth < max_growth_kb * 16)
+        print("✅ Soak-Test bestanden" if passed else "❌ Soak-Test: Speicher wächst")
+        return passed
     
     def stop_service(self):
         """Stoppt den Service"""
         print("🛑 Stoppe Baby-Cry-Detektor-Service...")
         self.is_running = False
         
+        # Laufendes Profiling und Clip abschließen
+        if self.profiler:
+            self._finish_profile()
+        if self.clip_recorder:
+            self.clip_recorder.flush()
+        if self.audio_archive:
+            self.audio_archive.flush()
+        if self.timeline:
+            self.timeline.close()
+        if self.viz_stream:
+            self.viz_stream.close()
+        
         # Service-Stopped Event senden
         self._send_event("service_stopped")
         time.sleep(0.5)  # Kurz warten damit Event ankommt
@@ -280,6 +1098,9 @@ class BabyCryDetectorService:
                 except:
                     pass
             self.client_connections.clear()
+            self.subscriptions.clear()
+            self._snapshot_seq.clear()
+            self.wanted_streams = frozenset()
         
         # Server Socket schließen
         if self.server_socket:
@@ -296,16 +1117,69 @@ class BabyCryDetectorService:
         self.stop_service()
         sys.exit(0)
 
-def main():
-    """Main Entry Point"""
+def build_parser():
+    """Kommandozeile des Service (auch vom Supervisor zum Lesen der Socket-Optionen genutzt)"""
     import argparse
+    from audio_devices import parse_device
     
     parser = argparse.ArgumentParser(description="Baby Cry Detector Service (TCP) mit Bestätigungslogik")
     parser.add_argument("--threshold", type=float, default=0.3, help="Cry detection threshold")
     parser.add_argument("--host", type=str, default="localhost", help="TCP Server Host")
     parser.add_argument("--port", type=int, default=9999, help="TCP Server Port")
     parser.add_argument("--cry-delay", type=float, default=3.0, help="Sekunden vor Cry-Bestätigung")
-    parser.add_argument("--stop-delay", type=float, default=5.0, help="Sekunden vor Stop-Bestätigung")
+    parser.add_argument("--stop-delay", type=float, default=8.0, help="Sekunden vor Stop-Bestätigung")
+    parser.add_argument("--config", type=str, default=None,
+                        help="JSON-Konfiguration (überschreibt Flags, neu gelesen bei SIGHUP/reload_config)")
+    parser.add_argument("--clip-dir", type=str, default="clips", help="Ordner für Schrei-Clips")
+    parser.add_argument("--pre-roll", type=float, default=10.0,
+                        help="Sekunden Audio vor der Bestätigung im Clip (0 = keine Clips)")
+    parser.add_argument("--post-roll", type=float, default=5.0,
+                        help="Sekunden Audio nach der Bestätigung im Clip")
+    parser.add_argument("--archive-dir", type=str, default=None,
+                        help="Ganze Nächte komprimiert + indiziert archivieren (aus wenn leer)")
+    parser.add_argument("--archive-chunk", type=float, default=30.0, help="Sekunden pro Archiv-Chunk")
+    parser.add_argument("--timeline-dir", type=str, default="timeline",
+                        help="Timeline-Store für Wahrscheinlichkeiten/Events (leer = aus)")
+    parser.add_argument("--viz-port", type=int, default=None,
+                        help="Port für den Live-Spektrogramm-Stream (aus wenn nicht gesetzt)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Startup-Phasen inkl. erster Inferenz messen und beenden")
+    parser.add_argument("--audio-source", choices=["mic", "native", "net"], default="mic",
+                        help="mic = lokales Mikrofon (16 kHz vom Host), native = Mikrofon mit Geräterate "
+                             "und eigenem Resampling, net = Audio vom Capture-Client empfangen")
+    parser.add_argument("--audio-device", type=parse_device, default=None,
+                        help="Eingabegerät (Index oder Namensteil, sounddevice), nur --audio-source native")
+    parser.add_argument("--audio-channels", type=int, default=None,
+                        help="Aufnahmekanäle vor dem Downmix (Standard: Gerät, höchstens 2)")
+    parser.add_argument("--audio-port", type=int, default=9997,
+                        help="UDP-Port für Capture-Client-Audio (nur --audio-source net)")
+    parser.add_argument("--head", type=str, default=None,
+                        help="Gewichte eines personalisierten Cry-Heads (cry_head.py)")
+    parser.add_argument("--head-mode", choices=["fuse", "replace"], default="fuse",
+                        help="Head mit Standard-Score mischen oder ihn ersetzen")
+    parser.add_argument("--sound-events", type=str, default=None, metavar="TAXONOMY",
+                        help="Weitere Alarm-Typen aus denselben Scores: 'default' (Husten, Ersticken, "
+                             "Rauchmelder, Glasbruch) oder JSON-Datei mit Gruppen (sound_events.py)")
+    parser.add_argument("--soak", type=float, default=None, metavar="HOURS",
+                        help="Soak-Test: Audio für HOURS simulierte Stunden abspielen, Speicher prüfen, beenden")
+    parser.add_argument("--soak-wav", type=str, default=None,
+                        help="WAV-Datei für den Soak-Test (Standard: synthetisches Muster)")
+    parser.add_argument("--fake-model", action="store_true",
+                        help="Fake-YAMNet ohne TensorFlow (nur für Soak-/Lasttests)")
+    parser.add_argument("--fake-latency", type=float, default=0.0, metavar="SECONDS",
+                        help="Simulierte Rechenzeit pro Patch des Fake-YAMNet (Überlast-Test)")
+    parser.add_argument("--profile-dir", type=str, default="profiles",
+                        help="Ordner für Profiling-Ausgaben (SIGUSR1/SIGUSR2 oder Control-Message 'profile')")
+    parser.add_argument("--standby", action="store_true",
+                        help="(Supervisor) Warm-Standby: aufwärmen und auf 'promote [Konfiguration]' über stdin warten")
+    parser.add_argument("--listen-fd", type=int, default=None, help="(Supervisor) geerbter TCP-Socket")
+    parser.add_argument("--audio-fd", type=int, default=None, help="(Supervisor) geerbter UDP-Audio-Socket")
+    parser.add_argument("--heartbeat-fd", type=int, default=None, help="(Supervisor) Heartbeat-Pipe")
+    return parser
+
+def main():
+    """Main Entry Point"""
+    parser = build_parser()
     args = parser.parse_args()
     
     print("🍼 Baby Cry Detector Service (TCP Version mit Bestätigungslogik)")
@@ -316,18 +1190,60 @@ def main():
     print(f"   Stop Confirmation: {args.stop_delay}s")
     print()
     
+    from detector_config import DetectorConfig
+    config = DetectorConfig(threshold=args.threshold, cry_min_seconds=args.cry_delay,
+                            stop_delay=args.stop_delay, head_mode=args.head_mode)
+    errors = config.validate()
+    if errors:
+        parser.error("; ".join(errors))
+    
+    model = None
+    if args.fake_model:
+        from fakes import FakeYamnet
+        model = FakeYamnet(latency=args.fake_latency)
+    
     service = BabyCryDetectorService(
         host=args.host,
         port=args.port,
-        threshold=args.threshold
+        threshold=args.threshold,
+        profile_startup=args.profile_startup,
+        clip_dir=args.clip_dir,
+        pre_roll=args.pre_roll,
+        post_roll=args.post_roll,
+        archive_dir=args.archive_dir,
+        archive_chunk=args.archive_chunk,
+        timeline_dir=args.timeline_dir,
+        viz_port=args.viz_port,
+        audio_source=args.audio_source,
+        audio_port=args.audio_port,
+        audio_device=args.audio_device,
+        audio_channels=args.audio_channels,
+        head_path=args.head,
+        sound_events=args.sound_events,
+        model=model,
+        config=config,
+        config_path=args.config,
+        standby=args.standby,
+        listen_fd=args.listen_fd,
+        audio_fd=args.audio_fd,
+        heartbeat_fd=args.heartbeat_fd,
+        profile_dir=args.profile_dir
     )
     
-    # Optionally adjust timings via command line
-    if hasattr(service, '_detection_loop'):
-        # Would need to refactor to make delays configurable
-        pass
+    if args.soak:
+        passed = service.soak_test(args.soak, args.soak_wav)
+        service.stop_service()
+        sys.exit(0 if passed else 1)
+    
+    if args.profile_startup:
+        service.warm_up()
+        print(service.startup_report())
+        service.stop_service()
+        return
     
     try:
+        if args.standby:
+            service.wait_for_promotion()
         service.start_service()
     except KeyboardInterrupt:
         print("\n👋 Service beendet")
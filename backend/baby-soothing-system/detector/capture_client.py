@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Capture Client - schlanker Audio-Sender für Räume ohne eigene Inferenz
+Nimmt 16 kHz Mono auf (Mikrofon oder WAV-Datei) und schickt nummerierte
+UDP-Frames an einen zentralen Detector (--audio-source net).
+--native: Mikrofon mit Geräterate öffnen und selbst auf 16 kHz resampeln (resampler.py).
+Braucht nur numpy + sounddevice, kein TensorFlow.
+"""
+
+import queue
+import random
+import socket
+import sys
+import time
+import wave
+from typing import Optional
+
+import numpy as np
+
+from audio_devices import parse_device
+from audio_sources import pack_frame
+
+
+class CaptureClient:
+    """Zerlegt Audio in Frames und sendet sie mit Sequenznummer per UDP"""
+
+    def __init__(self,
+                 server_host: str = "localhost",
+                 server_port: int = 9997,
+                 sample_rate: int = 16000,
+                 frame_ms: int = 20,
+                 loss: float = 0.0,
+                 reorder: float = 0.0):
+        self.server = (server_host, server_port)
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.seq = 0
+        # Netzwerkstörungen simulieren (Test auf localhost)
+        self.loss = loss
+        self.reorder = reorder
+        self._held: Optional[bytes] = None
+        self.stats = {"sent": 0, "dropped": 0, "reordered": 0}
+
+    def send_frame(self, pcm: np.ndarray, capture_ts: Optional[float] = None):
+        datagram = pack_frame(self.seq, capture_ts if capture_ts is not None else time.time(), pcm)
+        self.seq += 1
+        if self.loss and random.random() < self.loss:
+            self.stats["dropped"] += 1
+            return
+        if self._held is None and self.reorder and random.random() < self.reorder:
+            self._held = datagram   # nach dem nächsten Frame senden
+            self.stats["reordered"] += 1
+            return
+        self.sock.sendto(datagram, self.server)
+        self.stats["sent"] += 1
+        if self._held is not None:
+            self.sock.sendto(self._held, self.server)
+            self.stats["sent"] += 1
+            self._held = None
+
+    def run_microphone(self):
+        """Mikrofon im Callback lesen, im Hauptthread senden"""
+        import sounddevice as sd
+        frames: "queue.Queue" = queue.Queue(maxsize=500)
+
+        def callback(indata, n_frames, time_info, status):
+            try:
+                frames.put_nowait((time.time(), indata[:, 0].copy()))
+            except queue.Full:
+                pass  # Sender hängt - lieber Lücke als Rückstau
+
+        print(f"🎙️ Sende Mikrofon an {self.server[0]}:{self.server[1]} "
+              f"({self.frame_samples} Samples/Frame)")
+        with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32',
+                            blocksize=self.frame_samples, callback=callback):
+            while True:
+                capture_ts, pcm = frames.get()
+                self.send_frame(pcm, capture_ts)
+
+    def run_native_microphone(self, device=None, channels: Optional[int] = None):
+        """Mikrofon mit nativer Rate, Frames aus dem resampelten Ringpuffer"""
+        from audio_sources import NativeMicrophoneSource
+
+        print(f"🎙️ Sende Mikrofon (nativ) an {self.server[0]}:{self.server[1]} "
+              f"({self.frame_samples} Samples/Frame)")
+        with NativeMicrophoneSource(self.sample_rate, device, channels=channels) as source:
+            while True:
+                pcm = source.read_block(self.frame_samples)
+                if pcm is not None:
+                    self.send_frame(pcm)
+
+    def run_wav(self, path: str, loop: bool = False):
+        """WAV-Datei (16 kHz, Mono, 16 Bit) in Echtzeit senden"""
+        with wave.open(path, "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (self.sample_rate, 1, 2):
+                raise ValueError(f"{path}: erwartet {self.sample_rate} Hz, Mono, 16 Bit")
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2").astype(np.float32) / 32767
+        print(f"📼 Sende {path} ({len(pcm) / self.sample_rate:.1f}s) an {self.server[0]}:{self.server[1]}")
+        frame_seconds = self.frame_samples / self.sample_rate
+        next_send = time.monotonic()
+        while True:
+            for start in range(0, len(pcm) - self.frame_samples + 1, self.frame_samples):
+                self.send_frame(pcm[start:start + self.frame_samples])
+                next_send += frame_seconds
+                time.sleep(max(0.0, next_send - time.monotonic()))
+            if not loop:
+                return
+
+    def close(self):
+        self.sock.close()
+
+
+def _selftest():
+    """Client -> NetworkAudioSource auf localhost mit Verlust, Umordnung und Duplikaten"""
+    from audio_sources import NetworkAudioSource
+
+    source = NetworkAudioSource("127.0.0.1", 0, target_delay=0.05)
+    with source:
+        client = CaptureClient("127.0.0.1", source.port)
+        frame = client.frame_samples
+        datagrams = []
+        for seq in range(100):
+            # Jeder Frame trägt seine Sequenznummer als Pegel -> Reihenfolge prüfbar
+            datagrams.append(pack_frame(seq, time.time(), np.full(frame, (seq + 1) / 200, dtype=np.float32)))
+        lost = {7, 30, 31, 60}
+        order = [s for s in range(100) if s not in lost]
+        order[10], order[11] = order[11], order[10]
+        order[40], order[43] = order[43], order[40]
+        order.insert(50, order[49])   # Duplikat
+        for seq in order:
+            client.sock.sendto(datagrams[seq], ("127.0.0.1", source.port))
+
+        received = []
+        for _ in range(4):
+            block = source.read_block(8000)
+            assert block is not None, "Block fehlt"
+            received.extend(np.round(block[::frame] * 200).astype(int) - 1)
+        client.close()
+
+    stats = source.jitter.stats
+    expected = [-1 if s in lost else s for s in range(100)]
+    assert received == expected, f"Reihenfolge falsch: {received}"
+    assert stats["gaps"] == len(lost), stats
+    assert stats["duplicate"] == 1 and stats["reordered"] >= 2, stats
+    print(f"✅ Capture-Selbsttest ok: {stats}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture Client: Audio an zentralen Detector streamen")
+    parser.add_argument("--server", type=str, default="localhost", help="Host des Detectors")
+    parser.add_argument("--port", type=int, default=9997, help="UDP-Port des Detectors (--audio-port)")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Millisekunden Audio pro Frame")
+    parser.add_argument("--wav", type=str, default=None, help="WAV-Datei statt Mikrofon senden")
+    parser.add_argument("--loop", action="store_true", help="WAV-Datei endlos wiederholen")
+    parser.add_argument("--native", action="store_true",
+                        help="Mikrofon mit Geräterate öffnen und selbst auf 16 kHz resampeln")
+    parser.add_argument("--device", type=parse_device, default=None,
+                        help="Eingabegerät (Index oder Namensteil), nur mit --native")
+    parser.add_argument("--channels", type=int, default=None,
+                        help="Aufnahmekanäle vor dem Downmix (Standard: Gerät, höchstens 2)")
+    parser.add_argument("--loss", type=float, default=0.0, help="Anteil verworfener Frames (Test)")
+    parser.add_argument("--reorder", type=float, default=0.0, help="Anteil vertauschter Frames (Test)")
+    parser.add_argument("--selftest", action="store_true", help="Jitter-Buffer auf localhost prüfen")
+    args = parser.parse_args()
+
+    if args.selftest:
+        _selftest()
+        return
+
+    client = CaptureClient(args.server, args.port, frame_ms=args.frame_ms,
+                           loss=args.loss, reorder=args.reorder)
+    try:
+        if args.wav:
+            client.run_wav(args.wav, args.loop)
+        elif args.native:
+            client.run_native_microphone(args.device, args.channels)
+        else:
+            client.run_microphone()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n👋 Capture Client beendet: {client.stats}")
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Pre-Roll Clip Recorder
+Hält die letzten N Sekunden Audio in einem vorab allokierten Ringpuffer.
+Bei einem bestätigten Schrei wird Pre-Roll + Post-Roll als WAV-Clip gespeichert -
+Kodierung und Schreiben laufen in einem Hintergrund-Thread, nie im Detection Loop.
+Der Pfad wird erst nach erfolgreichem Schreiben gemeldet (on_saved); verworfene Clips nie.
+"""
+
+import os
+import queue
+import threading
+import time
+import wave
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class PreRollRing:
+    """Ringpuffer fester Größe für Roh-Audio (float32, mono)"""
+
+    def __init__(self, seconds: float, sample_rate: int):
+        self.size = int(seconds * sample_rate)
+        self.buffer = np.zeros(self.size, dtype=np.float32)
+        self.write_pos = 0
+        self.filled = 0
+
+    def write(self, block: np.ndarray):
+        """Schreibt einen Block in-place (keine Allokation)"""
+        n = len(block)
+        if n >= self.size:
+            self.buffer[:] = block[-self.size:]
+            self.write_pos = 0
+            self.filled = self.size
+            return
+        end = self.write_pos + n
+        if end <= self.size:
+            self.buffer[self.write_pos:end] = block
+        else:
+            first = self.size - self.write_pos
+            self.buffer[self.write_pos:] = block[:first]
+            self.buffer[:n - first] = block[first:]
+        self.write_pos = end % self.size
+        self.filled = min(self.filled + n, self.size)
+
+    def snapshot(self) -> np.ndarray:
+        """Kopie des Inhalts in zeitlicher Reihenfolge (nur bei Events)"""
+        if self.filled < self.size:
+            return self.buffer[:self.filled].copy()
+        return np.concatenate((self.buffer[self.write_pos:], self.buffer[:self.write_pos]))
+
+
+class ClipRecorder:
+    """Speichert Pre-Roll + Post-Roll Clips asynchron als WAV"""
+
+    def __init__(self,
+                 clip_dir: str = "clips",
+                 sample_rate: int = 16000,
+                 pre_roll: float = 10.0,
+                 post_roll: float = 5.0,
+                 max_pending: int = 8):
+        self.clip_dir = clip_dir
+        self.sample_rate = sample_rate
+        self.pre_roll = PreRollRing(pre_roll, sample_rate)
+        self.post_roll_samples = int(post_roll * sample_rate)
+
+        # Aktiver Clip: Pre-Roll-Snapshot + vorab allokierter Post-Roll
+        self._active_path: Optional[str] = None
+        self._active_pre: Optional[np.ndarray] = None
+        self._post_buffer = np.zeros(self.post_roll_samples, dtype=np.float32)
+        self._post_filled = 0
+
+        self.stats = {"clips_written": 0, "clips_dropped": 0, "write_errors": 0}
+        # Aufruf aus dem Schreib-Thread mit (Pfad, Sekunden), sobald die Datei vollständig da ist
+        self.on_saved: Optional[Callable[[str, float], None]] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._worker = threading.Thread(target=self._write_loop, daemon=True)
+        self._worker.start()
+        os.makedirs(self.clip_dir, exist_ok=True)
+
+    def add_audio(self, block: np.ndarray):
+        """Pro Hop aus dem Detection Loop aufrufen"""
+        self.pre_roll.write(block)
+        if self._active_path is None:
+            return
+        n = min(len(block), self.post_roll_samples - self._post_filled)
+        self._post_buffer[self._post_filled:self._post_filled + n] = block[:n]
+        self._post_filled += n
+        if self._post_filled >= self.post_roll_samples:
+            self._finish()
+
+    def trigger(self, label: str = "cry") -> str:
+        """Startet einen Clip und liefert den geplanten Pfad - die Datei gibt es erst nach Post-Roll
+        und Schreiben, und nur wenn on_saved dafür aufgerufen wird"""
+        if self._active_path is not None:
+            return self._active_path  # Post-Roll läuft noch - gleicher Clip
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        millis = int((time.time() % 1) * 1000)
+        path = os.path.abspath(os.path.join(self.clip_dir, f"{label}_{stamp}-{millis:03d}.wav"))
+        self._active_path = path
+        self._active_pre = self.pre_roll.snapshot()
+        self._post_filled = 0
+        if self.post_roll_samples == 0:
+            self._finish()
+        return path
+
+    def _finish(self):
+        clip = np.concatenate((self._active_pre, self._post_buffer[:self._post_filled]))
+        try:
+            self._queue.put_nowait((self._active_path, clip))
+        except queue.Full:
+            self.stats["clips_dropped"] += 1
+            print(f"⚠️ Clip verworfen (Schreib-Warteschlange voll): {self._active_path}")
+        self._active_path = None
+        self._active_pre = None
+
+    def flush(self):
+        """Laufenden Clip abschließen (z.B. beim Beenden)"""
+        if self._active_path is not None:
+            self._finish()
+
+    def _write_loop(self):
+        """Hintergrund-Thread: float32 -> int16 WAV"""
+        while True:
+            path, clip = self._queue.get()
+            try:
+                pcm = (np.clip(clip, -1.0, 1.0) * 32767).astype(np.int16)
+                tmp_path = path + ".tmp"
+                with wave.open(tmp_path, "wb") as wav:
+                    wav.setnchannels(1)
+                    wav.setsampwidth(2)
+                    wav.setframerate(self.sample_rate)
+                    wav.writeframes(pcm.tobytes())
+                os.replace(tmp_path, path)
+                self.stats["clips_written"] += 1
+                print(f"💾 Clip gespeichert: {path} ({len(pcm) / self.sample_rate:.1f}s)")
+                if self.on_saved:
+                    self.on_saved(path, len(pcm) / self.sample_rate)
+            except OSError as e:
+                self.stats["write_errors"] += 1
+                print(f"❌ Clip konnte nicht geschrieben werden: {e}")
+            finally:
+                self._queue.task_done()
+
+    def wait_idle(self):
+        """Blockiert bis alle Clips geschrieben sind"""
+        self._queue.join()
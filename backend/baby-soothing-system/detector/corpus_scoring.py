@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Corpus Scoring - gelabelte Audio-Ordner offline mit YAMNet bewerten
+- Prozess-Pool, jeder Worker lädt YAMNet genau einmal
+- Ganze Dateien (in 60s-Segmenten) pro Inferenz statt einzelner 1s-Fenster
+- Cache pro Datei (SHA-256 des Inhalts): Scores + Embeddings als .npz,
+  Wiederholungen mit neuem Threshold/Head laufen ohne Modell
+- Pro Clip: max/mittlere Wahrscheinlichkeit, Bestätigung wie im Service
+- Gesamt: Precision/Recall/F1, ROC-AUC und Threshold-Sweep
+
+Ordnerstruktur: <root>/cry/*.wav und <root>/no_cry/*.wav (oder --manifest CSV: path,label)
+"""
+
+import csv
+import hashlib
+import os
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MODEL_TAG = "yamnet1"
+SAMPLE_RATE = 16000
+PATCH_HOP = 7680                  # YAMNet: 0.48s Hop zwischen Patches
+SEGMENT_SAMPLES = 125 * PATCH_HOP  # 60s pro Inferenz, Patch-Raster bleibt lückenlos
+POSITIVE_LABELS = {"cry", "crying", "baby_cry", "1", "true", "yes"}
+
+# Bestätigungslogik wie in BabyCryDetectorService._detection_loop (Hop = 0.5s)
+CONFIRM_WINDOW_HOPS = 10   # 5s Fenster
+CONFIRM_MIN_HOPS = 6       # mindestens 3s Daten
+CONFIRM_PERCENTAGE = 0.6
+
+_worker_model = None
+_worker_cry_index = None
+
+
+# ---------- Worker ----------
+
+def _init_worker(model_name: str):
+    """Pool-Initializer: Modell einmal pro Prozess laden"""
+    global _worker_model, _worker_cry_index
+    if model_name == "fake":
+        from fakes import FakeYamnet
+        _worker_model = FakeYamnet()
+        _worker_cry_index = FakeYamnet.CRY_INDEX
+        return
+    import tensorflow as tf
+    import tensorflow_hub as hub
+    # Ein Thread pro Worker - parallelisiert wird über Prozesse
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _worker_model = hub.load("https://tfhub.dev/google/yamnet/1")
+    class_map_path = tf.keras.utils.get_file(
+        "yamnet_class_map.csv",
+        "https://raw.githubusercontent.com/tensorflow/models/master/research/audioset/yamnet/yamnet_class_map.csv"
+    )
+    labels = [row[2] for row in csv.reader(open(class_map_path))][1:]
+    _worker_cry_index = labels.index("Baby cry, infant cry")
+
+
+def load_wav(path: str) -> np.ndarray:
+    """WAV als float32 Mono 16 kHz (andere Raten: lineare Interpolation)"""
+    with wave.open(path, "rb") as wav:
+        rate, channels, width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+    if width != 2:
+        raise ValueError(f"nur 16-Bit-WAV unterstützt ({width * 8} Bit)")
+    pcm = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32767
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        n_out = int(len(pcm) * SAMPLE_RATE / rate)
+        pcm = np.interp(np.arange(n_out) * (rate / SAMPLE_RATE), np.arange(len(pcm)), pcm).astype(np.float32)
+    return pcm
+
+
+def _score_file(task: Tuple[str, str, str]) -> Tuple[str, Optional[str]]:
+    """Worker: Datei bewerten und in den Cache schreiben; liefert (path, Fehler)"""
+    path, cache_path, _ = task
+    try:
+        waveform = load_wav(path)
+        if len(waveform) < SAMPLE_RATE:
+            waveform = np.pad(waveform, (0, SAMPLE_RATE - len(waveform)))
+        scores, embeddings = [], []
+        for start in range(0, len(waveform), SEGMENT_SAMPLES):
+            segment = waveform[start:start + SEGMENT_SAMPLES]
+            if start and len(segment) < PATCH_HOP:
+                break  # Rest kürzer als ein Patch-Hop
+            seg_scores, seg_embeddings, _ = _worker_model(segment)
+            scores.append(np.asarray(seg_scores, dtype=np.float16))
+            embeddings.append(np.asarray(seg_embeddings, dtype=np.float16))
+        tmp_path = cache_path + ".tmp.npz"
+        np.savez(tmp_path, scores=np.concatenate(scores), embeddings=np.concatenate(embeddings),
+                 cry_index=np.int32(_worker_cry_index), duration=np.float32(len(waveform) / SAMPLE_RATE))
+        os.replace(tmp_path, cache_path)
+        return path, None
+    except Exception as e:
+        return path, str(e)
+
+
+# ---------- Cache ----------
+
+def file_key(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path_for(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.{MODEL_TAG}.npz")
+
+
+def load_cached(cache_path: str) -> Dict[str, np.ndarray]:
+    with np.load(cache_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+# ---------- Metriken ----------
+
+def hop_probabilities(scores: np.ndarray, cry_index: int) -> np.ndarray:
+    """Näherung der Live-Hop-Wahrscheinlichkeit: Mittel zweier benachbarter Patches (~1s Fenster)"""
+    cry = scores[:, cry_index].astype(np.float32)
+    if len(cry) < 2:
+        return cry
+    return (cry[:-1] + cry[1:]) / 2
+
+
+def first_confirmation(probs: np.ndarray, threshold: float) -> Optional[int]:
+    """Hop-Index der ersten Bestätigung nach der Service-Logik, sonst None"""
+    over = probs > threshold
+    for i in range(CONFIRM_MIN_HOPS - 1, len(over)):
+        window = over[max(0, i - CONFIRM_WINDOW_HOPS + 1):i + 1]
+        if window.mean() >= CONFIRM_PERCENTAGE:
+            return i
+    return None
+
+
+def clip_metrics(probs: np.ndarray, threshold: float) -> dict:
+    confirmed_at = first_confirmation(probs, threshold)
+    return {
+        "max_prob": float(probs.max()),
+        "mean_prob": float(probs.mean()),
+        "over_threshold": float((probs > threshold).mean()),
+        "confirmed": confirmed_at is not None,
+        "confirmed_after": None if confirmed_at is None else (confirmed_at + 1) * PATCH_HOP / SAMPLE_RATE,
+    }
+
+
+def roc_auc(labels: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """Rang-basierte AUC (Mann-Whitney), None wenn eine Klasse fehlt"""
+    positives, negatives = labels.sum(), (~labels).sum()
+    if positives == 0 or negatives == 0:
+        return None
+    order = scores.argsort()
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    # Gleichstände mitteln
+    for value in np.unique(scores):
+        tied = scores == value
+        if tied.sum() > 1:
+            ranks[tied] = ranks[tied].mean()
+    return float((ranks[labels].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def aggregate(labels: np.ndarray, predicted: np.ndarray) -> dict:
+    tp = int((labels & predicted).sum())
+    fp = int((~labels & predicted).sum())
+    fn = int((labels & ~predicted).sum())
+    tn = int((~labels & ~predicted).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"tp": tp, "fp": fp, "fn": fn, "tn": tn, "precision": precision, "recall": recall, "f1": f1}
+
+
+# ---------- Korpus ----------
+
+def discover(root: Optional[str], manifest: Optional[str]) -> List[Tuple[str, bool]]:
+    """(Pfad, Label)-Liste aus Manifest oder Unterordnern"""
+    clips = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            for row in csv.DictReader(f):
+                clips.append((os.path.join(base, row["path"]), row["label"].strip().lower() in POSITIVE_LABELS))
+        return clips
+    for dirpath, _, filenames in os.walk(root):
+        label = os.path.basename(os.path.relpath(dirpath, root).split(os.sep)[0]).lower() in POSITIVE_LABELS
+        for name in sorted(filenames):
+            if name.lower().endswith(".wav"):
+                clips.append((os.path.join(dirpath, name), label))
+    return clips
+
+
+class CorpusScorer:
+    """Scores für einen Korpus bereitstellen (Cache oder Prozess-Pool)"""
+
+    def __init__(self, cache_dir: str = ".score_cache", workers: Optional[int] = None, model: str = "yamnet"):
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.model = model
+        self.stats = {"cached": 0, "scored": 0, "failed": 0, "seconds": 0.0}
+
+    def ensure_scored(self, paths: List[str]) -> Dict[str, str]:
+        """Liefert {path: cache_path}; fehlende Dateien werden parallel bewertet"""
+        started = time.perf_counter()
+        cache_paths, tasks = {}, []
+        for path in paths:
+            key = file_key(path)
+            cache_path = cache_path_for(self.cache_dir, key)
+            cache_paths[path] = cache_path
+            if os.path.exists(cache_path):
+                self.stats["cached"] += 1
+            else:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tasks.append((path, cache_path, key))
+
+        if tasks:
+            import multiprocessing
+            workers = min(self.workers, len(tasks))
+            print(f"⚙️ Bewerte {len(tasks)} Clips mit {workers} Workern ({self.stats['cached']} aus Cache)...")
+            # spawn: TensorFlow ist nicht fork-sicher
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(workers, initializer=_init_worker, initargs=(self.model,)) as pool:
+                for done, (path, error) in enumerate(pool.imap_unordered(_score_file, tasks, chunksize=4), 1):
+                    if error:
+                        self.stats["failed"] += 1
+                        cache_paths.pop(path)
+                        print(f"⚠️ {path}: {error}")
+                    else:
+                        self.stats["scored"] += 1
+                    if done % 100 == 0:
+                        print(f"   {done}/{len(tasks)}")
+        self.stats["seconds"] = time.perf_counter() - started
+        return cache_paths
+
+
+def evaluate(clips: List[Tuple[str, bool]], cache_paths: Dict[str, str], threshold: float) -> Tuple[List[dict], dict]:
+    """Per-Clip-Zeilen und Gesamtmetriken aus dem Cache"""
+    rows, all_probs = [], []
+    for path, label in clips:
+        if path not in cache_paths:
+            continue
+        cached = load_cached(cache_paths[path])
+        probs = hop_probabilities(cached["scores"], int(cached["cry_index"]))
+        rows.append({"path": path, "label": label, "duration": float(cached["duration"]),
+                     **clip_metrics(probs, threshold)})
+        all_probs.append(probs)
+
+    labels = np.array([row["label"] for row in rows], dtype=bool)
+    max_probs = np.array([row["max_prob"] for row in rows])
+    summary = {
+        "clips": len(rows),
+        "threshold": threshold,
+        **aggregate(labels, np.array([row["confirmed"] for row in rows], dtype=bool)),
+        "auc_max_prob": roc_auc(labels, max_probs),
+        "sweep": [],
+    }
+    for sweep_threshold in np.round(np.arange(0.05, 1.0, 0.05), 2):
+        predicted = np.array([first_confirmation(p, sweep_threshold) is not None for p in all_probs], dtype=bool)
+        summary["sweep"].append({"threshold": float(sweep_threshold), **aggregate(labels, predicted)})
+    return rows, summary
+
+
+def write_clip_csv(rows: List[dict], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_summary(summary: dict, stats: dict):
+    print(f"\n📊 {summary['clips']} Clips | Threshold {summary['threshold']:.2f} "
+          f"(Cache: {stats['cached']}, neu: {stats['scored']}, Fehler: {stats['failed']}, {stats['seconds']:.1f}s)")
+    print(f"   TP {summary['tp']}  FP {summary['fp']}  FN {summary['fn']}  TN {summary['tn']}")
+    print(f"   Precision {summary['precision']:.3f}  Recall {summary['recall']:.3f}  F1 {summary['f1']:.3f}")
+    if summary["auc_max_prob"] is not None:
+        print(f"   ROC-AUC (max prob): {summary['auc_max_prob']:.3f}")
+    print("   Threshold-Sweep:")
+    for row in summary["sweep"]:
+        print(f"     {row['threshold']:.2f}  P {row['precision']:.3f}  R {row['recall']:.3f}  F1 {row['f1']:.3f}")
+
+
+def _selftest():
+    import tempfile
+    with tempfile.TemporaryDirectory() as root:
+        rng = np.random.default_rng(0)
+        for label, level, count in (("cry", 0.4, 6), ("no_cry", 0.02, 6)):
+            os.makedirs(os.path.join(root, "corpus", label))
+            for i in range(count):
+                pcm = (rng.standard_normal(SAMPLE_RATE * 6) * level).clip(-1, 1)
+                with wave.open(os.path.join(root, "corpus", label, f"{i}.wav"), "wb") as wav:
+                    wav.setnchannels(1)
+                    wav.setsampwidth(2)
+                    wav.setframerate(SAMPLE_RATE)
+                    wav.writeframes((pcm * 32767).astype("<i2").tobytes())
+        clips = discover(os.path.join(root, "corpus"), None)
+        assert len(clips) == 12 and sum(label for _, label in clips) == 6
+
+        scorer = CorpusScorer(os.path.join(root, "cache"), workers=2, model="fake")
+        _, summary = evaluate(clips, scorer.ensure_scored([p for p, _ in clips]), 0.5)
+        assert scorer.stats["scored"] == 12 and summary["f1"] == 1.0, (scorer.stats, summary)
+
+        rerun = CorpusScorer(os.path.join(root, "cache"), workers=2, model="fake")
+        _, summary = evaluate(clips, rerun.ensure_scored([p for p, _ in clips]), 0.3)
+        assert rerun.stats["cached"] == 12 and rerun.stats["scored"] == 0, rerun.stats
+        assert summary["auc_max_prob"] == 1.0
+        print(f"✅ Corpus-Selbsttest ok (Neubewertung {scorer.stats['seconds']:.2f}s, "
+              f"Cache {rerun.stats['seconds']:.2f}s)")
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Gelabelten Audio-Korpus parallel mit YAMNet bewerten")
+    parser.add_argument("root", nargs="?", help="Korpus-Ordner mit Unterordnern cry/ und no_cry/")
+    parser.add_argument("--manifest", type=str, default=None, help="CSV mit Spalten path,label")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Cry detection threshold")
+    parser.add_argument("--cache-dir", type=str, default=".score_cache", help="Ordner für Scores/Embeddings")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--out", type=str, default=None, help="Per-Clip-Ergebnisse als CSV")
+    parser.add_argument("--summary-json", type=str, default=None, help="Gesamtmetriken als JSON")
+    parser.add_argument("--selftest", action="store_true", help="Pipeline mit Fake-Modell prüfen")
+    args = parser.parse_args()
+
+    if args.selftest:
+        _selftest()
+        return
+    if not args.root and not args.manifest:
+        parser.error("Korpus-Ordner oder --manifest angeben")
+
+    clips = discover(args.root, args.manifest)
+    print(f"📂 {len(clips)} Clips ({sum(label for _, label in clips)} mit Weinen)")
+    scorer = CorpusScorer(args.cache_dir, args.workers)
+    rows, summary = evaluate(clips, scorer.ensure_scored([path for path, _ in clips]), args.threshold)
+    if not rows:
+        print("❌ Keine Clips bewertet")
+        return 1
+    print_summary(summary, scorer.stats)
+    if args.out:
+        write_clip_csv(rows, args.out)
+        print(f"💾 Per-Clip-Ergebnisse: {args.out}")
+    if args.summary_json:
+        with open(args.summary_json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
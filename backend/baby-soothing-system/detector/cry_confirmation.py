@@ -0,0 +1,141 @@
+"""
+Bestätigungslogik des Detektors (Cry-Start über ein Zeitfenster, Cry-Stop über
+kontinuierliche Stille) auf einem vorallokierten Ringpuffer - pro Hop werden
+keine Listen oder Tupel neu aufgebaut.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+class CryConfirmation:
+    """Zustandsmaschine QUIET/ANALYZING -> CRYING -> CHECKING_STOP -> QUIET"""
+
+    def __init__(self,
+                 window: float = 5.0,
+                 required_percentage: float = 0.6,
+                 stop_delay: float = 8.0,
+                 min_detections: int = 6,
+                 capacity: int = 64):
+        self.window = window                            # Beobachtungsfenster (Sekunden)
+        self.required_percentage = required_percentage  # Anteil Weinen für Bestätigung
+        self.stop_delay = stop_delay                    # Sekunden kontinuierlich still für Stop
+        self.min_detections = min_detections            # mindestens 3 Sekunden Daten
+
+        # Ringpuffer der Detections im Fenster
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._cry = np.zeros(capacity, dtype=np.bool_)
+        self._prob = np.zeros(capacity, dtype=np.float32)
+        self._start = 0
+        self._count = 0
+        self._crying_count = 0
+
+        self.confirmed = False
+        self.is_crying_now = False
+        self.last_cry_time: Optional[float] = None
+        self.quiet_streak_start: Optional[float] = None
+        self.last_avg_prob = 0.0
+
+    def _push(self, now: float, is_crying: bool, prob: float):
+        capacity = len(self._ts)
+        if self._count == capacity:
+            self._pop()  # Fenster voller als erwartet (Hop-Burst) - älteste verwerfen
+        index = (self._start + self._count) % capacity
+        self._ts[index] = now
+        self._cry[index] = is_crying
+        self._prob[index] = prob
+        self._count += 1
+        self._crying_count += is_crying
+
+    def _pop(self):
+        self._crying_count -= bool(self._cry[self._start])
+        self._start = (self._start + 1) % len(self._ts)
+        self._count -= 1
+
+    def clear(self):
+        self._start = self._count = self._crying_count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def crying_percentage(self) -> float:
+        return self._crying_count / self._count if self._count else 0.0
+
+    def _avg_crying_prob(self) -> float:
+        total = 0.0
+        capacity = len(self._ts)
+        for offset in range(self._count):
+            index = (self._start + offset) % capacity
+            if self._cry[index]:
+                total += float(self._prob[index])
+        return total / self._crying_count if self._crying_count else 0.0
+
+    def update(self, now: float, prob: float, threshold: float) -> str:
+        """Verarbeitet einen Hop; liefert "", "cry_detected" oder "cry_stopped" """
+        is_crying_now = prob > threshold
+        self.is_crying_now = is_crying_now
+        event = ""
+
+        # Neue Detection hinzufügen, alte außerhalb des Fensters entfernen
+        self._push(now, is_crying_now, prob)
+        while self._count and now - self._ts[self._start] > self.window:
+            self._pop()
+
+        # Analyse des Confirmation Windows für CRY START
+        if not self.confirmed and self._count >= self.min_detections:
+            cry_percentage = self.crying_percentage()
+            if cry_percentage >= self.required_percentage:
+                self.confirmed = True
+                self.last_cry_time = now
+                self.quiet_streak_start = None
+                self.last_avg_prob = self._avg_crying_prob()
+                print(f"👶🔊 WEINEN BESTÄTIGT! ({cry_percentage*100:.1f}% over {self.window}s, Avg Prob: {self.last_avg_prob:.3f})")
+                event = "cry_detected"
+
+        # Update last_cry_time wenn aktuell weint (aber reset Timer nicht sofort)
+        if is_crying_now and self.confirmed:
+            self.last_cry_time = now
+
+        # CRY STOP Logik - längere kontinuierliche Stille nötig
+        if self.confirmed:
+            if not is_crying_now:
+                if self.quiet_streak_start is None:
+                    # Erste Stille - Timer starten
+                    self.quiet_streak_start = now
+                    print(f"🤫 Stille-Timer gestartet (Prob: {prob:.3f}) - brauche {self.stop_delay}s")
+                else:
+                    elapsed = now - self.quiet_streak_start
+                    if elapsed >= self.stop_delay:
+                        # Timer abgelaufen - Beruhigung bestätigt
+                        self.confirmed = False
+                        print(f"✅ BERUHIGUNG BESTÄTIGT! ({elapsed:.1f}s kontinuierliche Stille)")
+                        event = "cry_stopped"
+                        self.quiet_streak_start = None
+                        self.clear()
+            else:
+                if self.quiet_streak_start is not None:
+                    elapsed = now - self.quiet_streak_start
+                    print(f"🔄 Weinen unterbricht Stille nach {elapsed:.1f}s (Prob: {prob:.3f})")
+                    self.quiet_streak_start = None
+                else:
+                    print(f"🔄 Weinen während CRYING state (Prob: {prob:.3f})")
+        return event
+
+    @property
+    def state(self) -> str:
+        """Zustand dieses Hops (Timeline-Codes)"""
+        if self.confirmed:
+            return "CHECKING_STOP" if self.quiet_streak_start is not None else "CRYING"
+        return "ANALYZING" if self.is_crying_now else "QUIET"
+
+    def status_text(self, now: float) -> str:
+        """Statuszeile für das Log (alle 10 Sekunden)"""
+        if self.confirmed:
+            if self.quiet_streak_start is not None:
+                remaining = self.stop_delay - (now - self.quiet_streak_start)
+                return f"CHECKING_STOP ({remaining:.1f}s)"
+            return "CRYING"
+        if self._count >= self.min_detections:
+            return f"ANALYZING ({self.crying_percentage() * 100:.1f}% crying)"
+        return "QUIET"
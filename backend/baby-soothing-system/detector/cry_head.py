@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Personalisierter Cry-Head auf YAMNet-Embeddings
+- Logistische Regression oder kleines MLP (eine versteckte Schicht) in NumPy
+- Training aus gelabelten Clips über den Embedding-Cache von corpus_scoring.py
+- Gewichte als .npz (kind, mean, std, W1, b1[, W2, b2], weight)
+- Im Service: statt des Standard-Scores (--head-mode replace) oder damit
+  gemischt (--head-mode fuse, p = weight * head + (1 - weight) * stock)
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DIM = 1024
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+class CryHead:
+    """Kleiner Klassifikator auf 1024-d YAMNet-Embeddings"""
+
+    def __init__(self, kind: str = "logistic", hidden: int = 32, weight: float = 0.5, seed: int = 0):
+        if kind not in ("logistic", "mlp"):
+            raise ValueError(f"Unbekannter Head-Typ: {kind}")
+        self.kind = kind
+        self.weight = weight  # Anteil des Heads im Fuse-Modus
+        rng = np.random.default_rng(seed)
+        self.mean = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+        self.std = np.ones(EMBEDDING_DIM, dtype=np.float32)
+        if kind == "logistic":
+            self.params = {"W1": np.zeros((EMBEDDING_DIM, 1), dtype=np.float32),
+                           "b1": np.zeros(1, dtype=np.float32)}
+        else:
+            self.params = {"W1": (rng.standard_normal((EMBEDDING_DIM, hidden)) * np.sqrt(2 / EMBEDDING_DIM)).astype(np.float32),
+                           "b1": np.zeros(hidden, dtype=np.float32),
+                           "W2": (rng.standard_normal((hidden, 1)) * np.sqrt(2 / hidden)).astype(np.float32),
+                           "b2": np.zeros(1, dtype=np.float32)}
+
+    # ---------- Inferenz ----------
+
+    def _forward(self, x: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        x = (x - self.mean) / self.std
+        if self.kind == "logistic":
+            return (x @ self.params["W1"] + self.params["b1"])[:, 0], None
+        hidden = np.maximum(x @ self.params["W1"] + self.params["b1"], 0)
+        return (hidden @ self.params["W2"] + self.params["b2"])[:, 0], hidden
+
+    def predict(self, embeddings: np.ndarray) -> np.ndarray:
+        """[N, 1024] -> [N] Wahrscheinlichkeiten"""
+        logits, _ = self._forward(np.atleast_2d(embeddings).astype(np.float32))
+        return _sigmoid(logits)
+
+    def score_hop(self, patch_embeddings: np.ndarray) -> float:
+        """Ein Hop: Mittel der Patch-Embeddings (wie der gemittelte Standard-Score)"""
+        return float(self.predict(patch_embeddings.mean(axis=0))[0])
+
+    def combine(self, head_prob: float, stock_prob: float, mode: str) -> float:
+        if mode == "replace":
+            return head_prob
+        return self.weight * head_prob + (1 - self.weight) * stock_prob
+
+    # ---------- Training ----------
+
+    def fit(self, x: np.ndarray, y: np.ndarray, epochs: int = 300, lr: float = 0.01,
+            l2: float = 1e-3, verbose: bool = False) -> List[float]:
+        """Full-Batch Adam mit ausgeglichenen Klassengewichten; liefert Loss-Verlauf"""
+        x = x.astype(np.float32)
+        y = y.astype(np.float32)
+        self.mean = x.mean(axis=0)
+        self.std = x.std(axis=0) + 1e-6
+        positives = max(1.0, y.sum())
+        negatives = max(1.0, len(y) - y.sum())
+        sample_weight = np.where(y > 0.5, len(y) / (2 * positives), len(y) / (2 * negatives)).astype(np.float32)
+        sample_weight /= len(y)
+
+        moments = {name: (np.zeros_like(p), np.zeros_like(p)) for name, p in self.params.items()}
+        beta1, beta2 = 0.9, 0.999
+        losses = []
+        xn = (x - self.mean) / self.std
+        for step in range(1, epochs + 1):
+            logits, hidden = self._forward(x)
+            probs = _sigmoid(logits)
+            loss = -np.sum(sample_weight * (y * np.log(probs + 1e-7) + (1 - y) * np.log(1 - probs + 1e-7)))
+            losses.append(float(loss))
+            d_logits = (sample_weight * (probs - y))[:, None]
+
+            if self.kind == "logistic":
+                grads = {"W1": xn.T @ d_logits, "b1": d_logits.sum(axis=0)}
+            else:
+                d_hidden = (d_logits @ self.params["W2"].T) * (hidden > 0)
+                grads = {"W2": hidden.T @ d_logits, "b2": d_logits.sum(axis=0),
+                         "W1": xn.T @ d_hidden, "b1": d_hidden.sum(axis=0)}
+            for name, grad in grads.items():
+                if name.startswith("W"):
+                    grad = grad + l2 * self.params[name]
+                m, v = moments[name]
+                m[:] = beta1 * m + (1 - beta1) * grad
+                v[:] = beta2 * v + (1 - beta2) * grad ** 2
+                m_hat = m / (1 - beta1 ** step)
+                v_hat = v / (1 - beta2 ** step)
+                self.params[name] -= (lr * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+            if verbose and step % 50 == 0:
+                print(f"   Epoche {step}: Loss {loss:.4f}")
+        return losses
+
+    # ---------- Speichern / Laden ----------
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, kind=np.array(self.kind), weight=np.float32(self.weight),
+                 mean=self.mean, std=self.std, **self.params)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CryHead":
+        with np.load(path) as data:
+            head = cls(str(data["kind"]), weight=float(data["weight"]))
+            head.mean = data["mean"].astype(np.float32)
+            head.std = data["std"].astype(np.float32)
+            # Versteckte Größe ergibt sich aus den gespeicherten Shapes
+            head.params = {name: data[name].astype(np.float32) for name in head.params}
+        return head
+
+
+def hop_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """Hop-Embeddings wie hop_probabilities in corpus_scoring: Mittel benachbarter Patches"""
+    embeddings = embeddings.astype(np.float32)
+    if len(embeddings) < 2:
+        return embeddings
+    return (embeddings[:-1] + embeddings[1:]) / 2
+
+
+def split_clips(clips: List[Tuple[str, bool]], holdout: float, seed: int = 0):
+    """Train/Validierung nach Clips (nicht nach Hops) trennen, je Klasse geschichtet"""
+    rng = np.random.default_rng(seed)
+    train, val = [], []
+    for label in (True, False):
+        group = [clip for clip in clips if clip[1] == label]
+        rng.shuffle(group)
+        n_val = int(round(len(group) * holdout))
+        val.extend(group[:n_val])
+        train.extend(group[n_val:])
+    return train, val
+
+
+def _dataset(clips: List[Tuple[str, bool]], cache_paths: Dict[str, str]):
+    from corpus_scoring import load_cached
+    xs, ys = [], []
+    for path, label in clips:
+        if path in cache_paths:
+            emb = hop_embeddings(load_cached(cache_paths[path])["embeddings"])
+            xs.append(emb)
+            ys.append(np.full(len(emb), float(label), dtype=np.float32))
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def evaluate_head(head: CryHead, mode: str, clips: List[Tuple[str, bool]],
+                  cache_paths: Dict[str, str], threshold: float) -> Tuple[dict, dict]:
+    """Clip-Level-Metriken (Service-Bestätigung) für Standard-Score und Head"""
+    from corpus_scoring import aggregate, first_confirmation, hop_probabilities, load_cached
+    labels, stock_pred, head_pred = [], [], []
+    for path, label in clips:
+        if path not in cache_paths:
+            continue
+        cached = load_cached(cache_paths[path])
+        stock = hop_probabilities(cached["scores"], int(cached["cry_index"]))
+        head_probs = head.predict(hop_embeddings(cached["embeddings"]))
+        combined = head_probs if mode == "replace" else head.weight * head_probs + (1 - head.weight) * stock
+        labels.append(label)
+        stock_pred.append(first_confirmation(stock, threshold) is not None)
+        head_pred.append(first_confirmation(combined, threshold) is not None)
+    labels = np.array(labels, dtype=bool)
+    return aggregate(labels, np.array(stock_pred, dtype=bool)), aggregate(labels, np.array(head_pred, dtype=bool))
+
+
+def _selftest():
+    """Trennbare Fake-Embeddings: beide Head-Typen lernen, Speichern/Laden ist verlustfrei"""
+    import tempfile
+    rng = np.random.default_rng(1)
+    direction = rng.standard_normal(EMBEDDING_DIM)
+    x = rng.standard_normal((3000, EMBEDDING_DIM)).astype(np.float32)
+    y = (x @ direction > 0).astype(np.float32)
+    for kind in ("logistic", "mlp"):
+        head = CryHead(kind)
+        losses = head.fit(x[:2500], y[:2500], epochs=150)
+        accuracy = ((head.predict(x[2500:]) > 0.5) == (y[2500:] > 0.5)).mean()
+        assert losses[-1] < losses[0] and accuracy > 0.8, (kind, losses[-1], accuracy)
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "head.npz")
+            head.save(path)
+            assert np.allclose(CryHead.load(path).predict(x[:5]), head.predict(x[:5]))
+        print(f"✅ {kind}: Validierungs-Accuracy {accuracy:.2f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Personalisierten Cry-Head auf YAMNet-Embeddings trainieren")
+    parser.add_argument("root", nargs="?", help="Korpus-Ordner mit Unterordnern cry/ und no_cry/")
+    parser.add_argument("--manifest", type=str, default=None, help="CSV mit Spalten path,label")
+    parser.add_argument("--out", type=str, default="cry_head.npz", help="Gewichte-Datei")
+    parser.add_argument("--kind", choices=["logistic", "mlp"], default="logistic", help="Head-Typ")
+    parser.add_argument("--hidden", type=int, default=32, help="Versteckte Einheiten (nur mlp)")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--l2", type=float, default=1e-3)
+    parser.add_argument("--weight", type=float, default=0.5, help="Head-Anteil im Fuse-Modus")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Anteil Validierungs-Clips")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Threshold für den Vergleich")
+    parser.add_argument("--cache-dir", type=str, default=".score_cache", help="Cache von corpus_scoring.py")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--selftest", action="store_true", help="Training auf Fake-Embeddings prüfen")
+    args = parser.parse_args()
+
+    if args.selftest:
+        _selftest()
+        return
+    if not args.root and not args.manifest:
+        parser.error("Korpus-Ordner oder --manifest angeben")
+
+    from corpus_scoring import CorpusScorer, discover
+    clips = discover(args.root, args.manifest)
+    cache_paths = CorpusScorer(args.cache_dir, args.workers).ensure_scored([path for path, _ in clips])
+    train, val = split_clips(clips, args.holdout)
+    x, y = _dataset(train, cache_paths)
+    print(f"🧠 Trainiere {args.kind}-Head: {len(train)} Clips, {len(x)} Hops ({int(y.sum())} positiv)")
+
+    head = CryHead(args.kind, args.hidden, args.weight)
+    losses = head.fit(x, y, args.epochs, args.lr, args.l2, verbose=True)
+    print(f"   Loss {losses[0]:.4f} -> {losses[-1]:.4f}")
+
+    if val:
+        for mode in ("replace", "fuse"):
+            stock, tuned = evaluate_head(head, mode, val, cache_paths, args.threshold)
+            print(f"📊 Validierung ({len(val)} Clips, {mode}): "
+                  f"Standard P {stock['precision']:.3f} R {stock['recall']:.3f} F1 {stock['f1']:.3f} | "
+                  f"Head P {tuned['precision']:.3f} R {tuned['recall']:.3f} F1 {tuned['f1']:.3f}")
+    head.save(args.out)
+    print(f"💾 Gewichte gespeichert: {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
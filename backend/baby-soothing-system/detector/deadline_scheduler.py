@@ -0,0 +1,183 @@
+"""
+Deadline-Tracking für den Detection Loop mit Degradationsleiter
+- Jeder Hop hat ein Budget von hop_length Sekunden Rechenzeit; der Rückstand (Lag) ist das
+  Audio, das beim Entscheiden schon gepuffert, aber noch nicht analysiert ist
+- Harte Grenze in jedem Modus: Rückstand über max_lag wird verworfen, die Entscheidung
+  liegt nie weiter als max_lag + ein Fenster hinter der Echtzeit
+- Bei anhaltender Überlast eine Stufe höher, bei Entlastung (mit Hysterese) eine Stufe zurück:
+    normal    volle Verarbeitung, kurzer Rückstand wird aufgeholt
+    catch_up  veraltete Hops überspringen: nur das neueste Fenster analysieren
+    lite      günstigere Inferenz: nur der neueste YAMNet-Patch, keine Viz-Frames
+    wide_hop  Hop = Fensterlänge: halb so viele Inferenzen pro Sekunde
+"""
+
+from typing import Optional
+
+MODES = ["normal", "catch_up", "lite", "wide_hop"]
+MODE_CODES = {name: code for code, name in enumerate(MODES)}
+
+
+class HopScheduler:
+    """Misst Rechenzeit und Rückstand pro Hop und wählt die Degradationsstufe"""
+
+    def __init__(self,
+                 hop_length: float = 0.5,
+                 frame_length: float = 1.0,
+                 sample_rate: int = 16000,
+                 max_lag: float = 1.5,
+                 degrade: bool = True,
+                 escalate_after: int = 3,
+                 recover_after: int = 20,
+                 min_dwell: float = 5.0,
+                 smoothing: float = 0.3):
+        self.base_hop = hop_length
+        self.frame_length = frame_length
+        self.sample_rate = sample_rate
+        self.max_lag = max_lag                  # Sekunden Rückstand, darüber wird verworfen
+        self.degrade = degrade                  # False = nur die harte Lag-Grenze
+        self.escalate_after = escalate_after    # Hops in Folge über Budget -> Stufe höher
+        self.recover_after = recover_after      # Hops in Folge mit Reserve -> Stufe zurück
+        self.min_dwell = min_dwell              # Sekunden mindestens in einer Stufe
+        self.smoothing = smoothing              # EWMA-Gewicht des neuesten Hops
+
+        self.level = 0
+        self._changed_at = 0.0
+        self._bad_streak = 0
+        self._good_streak = 0
+        self._cost: Optional[float] = None      # geglättete Rechenzeit in der aktuellen Stufe
+        self.load = 0.0
+        self.lag = 0.0
+        self.stats = {"hops": 0, "deadline_misses": 0, "skipped_seconds": 0.0, "mode_changes": 0,
+                      "max_lag_ms": 0.0}
+
+    @property
+    def mode(self) -> str:
+        return MODES[self.level]
+
+    @property
+    def hop_length(self) -> float:
+        return self.frame_length if self.level >= MODE_CODES["wide_hop"] else self.base_hop
+
+    @property
+    def lite(self) -> bool:
+        return self.level >= MODE_CODES["lite"]
+
+    @property
+    def behind(self) -> bool:
+        """Rückstand vorhanden - keine Pause vor dem nächsten Hop"""
+        return self.lag > 0.5 * self.hop_length
+
+    def stale_samples(self, backlog_samples: int) -> int:
+        """Wie viele der ältesten gepufferten Samples vor dem nächsten Lesen zu verwerfen sind;
+        übrig bleibt genau ein Fenster (der nächste Block ersetzt den Puffer komplett)"""
+        limit = self.max_lag if self.level == 0 else self.hop_length
+        frame_samples = int(self.frame_length * self.sample_rate)
+        if backlog_samples <= max(limit * self.sample_rate, frame_samples):
+            return 0
+        stale = backlog_samples - frame_samples
+        self.stats["skipped_seconds"] += stale / self.sample_rate
+        return stale
+
+    def record(self, now: float, processing: float, lag: float) -> Optional[dict]:
+        """Nach jedem Hop: Rechenzeit und Rückstand (Sekunden); liefert den Moduswechsel oder None"""
+        hop = self.hop_length
+        stats = self.stats
+        stats["hops"] += 1
+        cost = self._cost
+        self._cost = cost = processing if cost is None else cost + self.smoothing * (processing - cost)
+        self.load = cost / hop
+        self.lag = lag
+        stats["max_lag_ms"] = max(stats["max_lag_ms"], lag * 1000)
+        overrun = processing > hop
+        if overrun:
+            stats["deadline_misses"] += 1
+
+        if overrun or self.load > 0.9 or lag > 0.5 * self.max_lag:
+            self._bad_streak += 1
+            self._good_streak = 0
+        elif self.load < 0.6 and lag < hop:
+            self._good_streak += 1
+            self._bad_streak = 0
+        else:
+            self._bad_streak = self._good_streak = 0
+
+        if not self.degrade or now - self._changed_at < self.min_dwell:
+            return None
+        if self._bad_streak >= self.escalate_after and self.level < len(MODES) - 1:
+            reason = "deadline" if overrun or self.load > 0.9 else "lag"
+            return self._change(now, self.level + 1, reason)
+        if self._good_streak >= self.recover_after and self.level > 0:
+            # Schritt zurück nur, wenn die aktuelle Rechenzeit auch ins kürzere Budget passt
+            lower = self.level - 1
+            lower_hop = self.frame_length if lower >= MODE_CODES["wide_hop"] else self.base_hop
+            if cost / lower_hop < 0.6:
+                return self._change(now, lower, "recovered")
+            self._good_streak = 0
+        return None
+
+    def _change(self, now: float, level: int, reason: str) -> dict:
+        previous = self.mode
+        self.level = level
+        change = {"mode": self.mode, "previous": previous, "level": level, "reason": reason,
+                  "load": round(self.load, 3), "lag_ms": round(self.lag * 1000, 1),
+                  "hop_length": self.hop_length}
+        self._changed_at = now
+        self._bad_streak = self._good_streak = 0
+        self._cost = None   # Rechenzeit der neuen Stufe neu messen
+        self.stats["mode_changes"] += 1
+        return change
+
+    def reset(self, now: float, reason: str = "config") -> Optional[dict]:
+        """Zurück auf normal (z.B. wenn die Degradation per Konfiguration abgeschaltet wird)"""
+        return self._change(now, 0, reason) if self.level else None
+
+    def metrics(self) -> dict:
+        """Für das status-Event"""
+        return {"mode": self.mode, "hop_load": round(self.load, 3), "lag_ms": round(self.lag * 1000, 1),
+                **self.stats, "skipped_seconds": round(self.stats["skipped_seconds"], 1)}
+
+
+def _selftest():
+    """Simulierte Überlast: Stufen steigen, Lag bleibt begrenzt, nach Entlastung zurück auf normal"""
+    scheduler = HopScheduler(hop_length=0.5, frame_length=1.0, max_lag=1.5, min_dwell=2.0)
+    sample_rate = scheduler.sample_rate
+    now = 0.0            # Wanduhr
+    backlog = 0          # gepufferte, noch nicht analysierte Samples
+    modes, max_lag = [], 0.0
+
+    def cost_for(t: float) -> float:
+        # 20-60s: Last 3x so hoch wie das Budget für den vollen Modus
+        base = 1.5 if 20 <= t < 60 else 0.2
+        if scheduler.lite:
+            base *= 0.45
+        return base
+
+    while now < 150:
+        stale = scheduler.stale_samples(backlog)
+        backlog -= stale
+        block = int(scheduler.hop_length * sample_rate) if not stale else int(scheduler.frame_length * sample_rate)
+        if backlog < block:
+            # Warten bis der Block da ist (Echtzeit)
+            now += (block - backlog) / sample_rate
+            backlog = block
+        backlog -= block
+        processing = cost_for(now)
+        now += processing
+        backlog += int(processing * sample_rate)
+        lag = backlog / sample_rate
+        max_lag = max(max_lag, lag)
+        change = scheduler.record(now, processing, lag)
+        if change:
+            modes.append((round(now, 1), change["previous"], change["mode"], change["reason"]))
+    for entry in modes:
+        print(f"   {entry[0]:>6}s  {entry[1]} -> {entry[2]} ({entry[3]})")
+    print(f"   max Lag {max_lag:.2f}s | {scheduler.metrics()}")
+    bound = scheduler.max_lag + scheduler.frame_length + 1.5
+    assert max_lag <= bound, f"Lag {max_lag:.2f}s über der Grenze {bound:.2f}s"
+    assert any(m[2] != "normal" for m in modes), "keine Degradation unter Überlast"
+    assert scheduler.mode == "normal", f"nicht erholt: {scheduler.mode}"
+    print("✅ Selbsttest bestanden")
+
+
+if __name__ == "__main__":
+    _selftest()
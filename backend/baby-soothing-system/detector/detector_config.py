@@ -0,0 +1,94 @@
+"""
+Laufzeit-Konfiguration des Detektors
+- Unveränderliche Parameter-Sätze: ein Update erzeugt einen neuen, validierten Satz,
+  der Detection Loop tauscht ihn zwischen zwei Hops als Ganzes aus
+- Quelle: JSON-Datei (--config, neu gelesen bei SIGHUP) oder Control-Message
+  {"type": "set_config", "data": {...}} auf dem Event-Socket
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_WINDOW_SECONDS = 30.0   # CryConfirmation-Ring hat 64 Plätze bei 0.5s Hop
+
+
+@dataclass(frozen=True)
+class DetectorConfig:
+    threshold: float = 0.3
+    cry_window: float = 5.0               # Beobachtungsfenster für Cry-Start
+    cry_required_percentage: float = 0.6  # Anteil Weinen im Fenster
+    cry_min_seconds: float = 3.0          # mindestens so viele Sekunden Daten im Fenster
+    stop_delay: float = 8.0               # Sekunden kontinuierlich still für Stop
+    status_interval: float = 10.0         # Status-Event + Logzeile
+    viz_max_fps: float = 4.0              # Live-Spektrogramm
+    head_mode: str = "fuse"               # Cry-Head: fuse oder replace
+    head_weight: Optional[float] = None   # Head-Anteil im Fuse-Modus (None = Wert aus der Head-Datei)
+    max_lag: float = 1.5                  # Sekunden Rückstand, darüber wird veraltetes Audio verworfen
+    degrade: str = "auto"                 # Degradationsleiter bei Überlast: auto oder off
+
+    def validate(self) -> List[str]:
+        """Liste der Fehler (leer = gültig)"""
+        errors = []
+        if not 0.0 < self.threshold < 1.0:
+            errors.append("threshold muss zwischen 0 und 1 liegen")
+        if not 0.5 <= self.cry_window <= MAX_WINDOW_SECONDS:
+            errors.append(f"cry_window muss zwischen 0.5 und {MAX_WINDOW_SECONDS}s liegen")
+        if not 0.0 < self.cry_required_percentage <= 1.0:
+            errors.append("cry_required_percentage muss in (0, 1] liegen")
+        if not 0.0 <= self.cry_min_seconds <= self.cry_window:
+            errors.append("cry_min_seconds muss zwischen 0 und cry_window liegen")
+        if not 0.0 < self.stop_delay <= 600:
+            errors.append("stop_delay muss zwischen 0 und 600s liegen")
+        if not 1.0 <= self.status_interval <= 3600:
+            errors.append("status_interval muss zwischen 1 und 3600s liegen")
+        if not 0.0 <= self.viz_max_fps <= 30:
+            errors.append("viz_max_fps muss zwischen 0 und 30 liegen")
+        if self.head_mode not in ("fuse", "replace"):
+            errors.append("head_mode muss 'fuse' oder 'replace' sein")
+        if self.head_weight is not None and not 0.0 <= self.head_weight <= 1.0:
+            errors.append("head_weight muss zwischen 0 und 1 liegen")
+        if not 1.0 <= self.max_lag <= 10.0:
+            errors.append("max_lag muss zwischen 1 und 10s liegen")
+        if self.degrade not in ("auto", "off"):
+            errors.append("degrade muss 'auto' oder 'off' sein")
+        return errors
+
+    def updated(self, changes: Dict[str, Any]) -> Tuple["DetectorConfig", List[str]]:
+        """Neuer Satz mit Änderungen; (self, Fehler) wenn ungültig"""
+        known = {f.name: f.type for f in fields(self)}
+        errors = [f"unbekannter Parameter: {key}" for key in changes if key not in known]
+        if errors:
+            return self, errors
+        try:
+            typed = {key: None if value is None and key == "head_weight"
+                     else (str(value) if known[key] is str else float(value))
+                     for key, value in changes.items()}
+        except (TypeError, ValueError) as e:
+            return self, [f"ungültiger Wert: {e}"]
+        candidate = replace(self, **typed)
+        errors = candidate.validate()
+        return (self, errors) if errors else (candidate, [])
+
+    def diff(self, other: "DetectorConfig") -> Dict[str, list]:
+        """{name: [alt, neu]} für geänderte Parameter"""
+        mine, theirs = asdict(self), asdict(other)
+        return {key: [mine[key], theirs[key]] for key in mine if mine[key] != theirs[key]}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_config_file(path: str, base: DetectorConfig) -> Tuple[DetectorConfig, List[str]]:
+    """JSON-Datei über `base` legen; fehlende Datei = keine Änderung"""
+    if not os.path.exists(path):
+        return base, []
+    try:
+        with open(path) as f:
+            changes = json.load(f)
+    except (OSError, ValueError) as e:
+        return base, [f"{path}: {e}"]
+    if not isinstance(changes, dict):
+        return base, [f"{path}: JSON-Objekt erwartet"]
+    return base.updated(changes)
@@ -0,0 +1,39 @@
+"""
+Lokale Fake-Komponenten zum Testen des Detektors ohne TensorFlow
+"""
+
+import time
+
+import numpy as np
+
+PATCH_SAMPLES = 15360   # YAMNet: 0.96s Patch
+PATCH_HOP = 7680        # YAMNet: 0.48s Hop
+MIN_SAMPLES = 15600     # YAMNet: kürzere Eingaben werden auf 0.975s aufgefüllt
+
+
+class FakeYamnet:
+    """YAMNet-Stand-in: Cry-Score = Pegel des Patches, gleiche Ausgabe-Shapes wie das echte Modell"""
+    CRY_INDEX = 20
+    N_CLASSES = 521
+
+    def __init__(self, gain: float = 4.0, latency: float = 0.0):
+        self.gain = gain
+        self.latency = latency   # simulierte Rechenzeit pro Patch (Sekunden) für Lasttests
+        self.class_names = [f"class_{i}" for i in range(self.N_CLASSES)]
+        self.class_names[self.CRY_INDEX] = "Baby cry, infant cry"
+        self.calls = 0
+
+    def __call__(self, waveform: np.ndarray):
+        self.calls += 1
+        # Wie YAMNet: ein Patch bis 0.975s, danach einer pro angefangenem 0.48s-Hop
+        n_patches = 1 + -(-max(0, len(waveform) - MIN_SAMPLES) // PATCH_HOP)
+        if self.latency:
+            time.sleep(self.latency * n_patches)
+        scores = np.zeros((n_patches, self.N_CLASSES), dtype=np.float32)
+        embeddings = np.zeros((n_patches, 1024), dtype=np.float32)
+        for i in range(n_patches):
+            patch = waveform[i * PATCH_HOP:i * PATCH_HOP + PATCH_SAMPLES]
+            scores[i, self.CRY_INDEX] = min(1.0, float(np.abs(patch).mean()) * self.gain) if len(patch) else 0.0
+            embeddings[i, :8] = scores[i, self.CRY_INDEX]
+        spectrogram = np.zeros((max(1, len(waveform) // 160), 64), dtype=np.float32)
+        return scores, embeddings, spectrogram
@@ -0,0 +1,165 @@
+"""
+Profiling auf Abruf für den laufenden Detektor (kein Neustart unter einem Profiler)
+- cProfile: zeitlich begrenzt, nur der Detection-Loop-Thread, plus Zeit pro Stage
+  (capture, inference, confirmation, record, publish)
+- Stack-Sampler: alle N ms die Stacks aller Threads (Folded-Format für Flamegraphs)
+- Ausgabe: <name>-<zeit>.prof (pstats), .txt (Stages + Top-Funktionen), .folded (Sampler)
+
+Ohne laufende Session existiert kein Profiler-Objekt; der Loop prüft nur eine None-Referenz.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+MODES = ("cprofile", "sample")
+
+
+class StageClock:
+    """Summiert Zeit pro Stage; lap() rechnet die Zeit seit dem letzten Aufruf einer Stage zu"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._last = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.add(stage, now - self._last)
+        self._last = now
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def report(self, wall: float) -> str:
+        lines = [f"{'Stage':<14} {'gesamt ms':>10} {'n':>7} {'ms/Aufruf':>10} {'% Wall':>7}"]
+        for stage, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+            count = self.counts[stage]
+            lines.append(f"{stage:<14} {total * 1000:>10.1f} {count:>7} {total * 1000 / count:>10.2f} "
+                         f"{100 * total / max(wall, 1e-9):>6.1f}%")
+        return "\n".join(lines)
+
+
+class StackSampler:
+    """Sampelt periodisch die Stacks aller Threads (außer dem eigenen)"""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        """Folded-Stacks (flamegraph.pl, speedscope)"""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n: int = 15) -> str:
+        """Häufigste innerste Frames (Self-Time) als Text"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = max(1, sum(leaves.values()))
+        return "\n".join(f"{100 * count / total:6.1f}%  {frame}" for frame, count in leaves.most_common(n))
+
+
+class ProfileSession:
+    """Ein zeitlich begrenzter Profiling-Lauf; start() im zu profilierenden Thread aufrufen"""
+
+    def __init__(self, out_dir: str, name: str, mode: str = "cprofile", seconds: float = 30.0,
+                 sample_interval: float = 0.01):
+        if mode not in MODES:
+            raise ValueError(f"mode muss einer von {MODES} sein")
+        self.out_dir = out_dir
+        self.name = name
+        self.mode = mode
+        self.seconds = seconds
+        self.stages = StageClock()
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[StackSampler] = None
+        self.sample_interval = sample_interval
+        self.started = 0.0
+
+    def start(self):
+        self.started = time.monotonic()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(self.sample_interval)
+            self.sampler.start()
+        self.stages.start()
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.started >= self.seconds
+
+    def finish(self, extra: str = "") -> List[str]:
+        """Profiler stoppen und Dateien schreiben; liefert die Pfade"""
+        if self.profile:
+            self.profile.disable()
+        if self.sampler:
+            self.sampler.stop()
+        wall = time.monotonic() - self.started
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.mode}")
+        paths = []
+
+        sections = [f"{self.name}: {self.mode}, {wall:.1f}s", "", self.stages.report(wall)]
+        if extra:
+            sections += ["", extra]
+        if self.profile:
+            self.profile.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(40)
+            sections += ["", text.getvalue()]
+        if self.sampler:
+            self.sampler.write(base + ".folded")
+            paths.append(base + ".folded")
+            sections += ["", f"{self.sampler.samples} Samples à {self.sample_interval * 1000:.0f}ms, "
+                             f"häufigste Frames:", self.sampler.top()]
+        with open(base + ".txt", "w") as f:
+            f.write("\n".join(sections) + "\n")
+        paths.insert(0, base + ".txt")
+        return paths
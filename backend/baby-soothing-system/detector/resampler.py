@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Streaming-Polyphasen-Resampler (nur NumPy) für Aufnahme mit nativer Geräterate
+- Rationales Verhältnis out/in = L/M (gekürzt), Kaiser-gefensterter Sinc-Tiefpass als Prototyp,
+  zerlegt in L Phasen mit je K Taps; pro Ausgabe-Sample genau ein Skalarprodukt der Länge K
+- Zustand über Blöcke hinweg: die letzten K-1 Eingangs-Samples und die Position des nächsten
+  Ausgabe-Samples - Blockgrenzen ändern das Ergebnis nicht (bitgleich zur Verarbeitung am Stück)
+- Feste Verzögerung (Gruppenlaufzeit des Filters), unabhängig von der Blockgröße
+- Downmix auf Mono vor dem Filter (Mittelwert der Kanäle)
+
+python resampler.py --selftest     Block-Invarianz, Durchlass, Alias-Dämpfung
+python resampler.py --benchmark    Rechenzeit pro Sekunde Audio für gängige Geräteraten
+"""
+
+import time
+from math import gcd
+
+import numpy as np
+
+TARGET_RATE = 16000
+
+
+def design_filter(up: int, down: int, half_width: int = 8, rolloff: float = 0.9,
+                  beta: float = 8.0) -> np.ndarray:
+    """Tiefpass-Prototyp auf der Rate up * in_rate, DC-Verstärkung up (gleicht das Hochtasten aus);
+    Grenzfrequenz rolloff * halbe kleinere Rate, half_width Nulldurchgänge pro Seite"""
+    cutoff = rolloff * 0.5 / max(up, down)           # relativ zur Prototyp-Rate
+    taps_per_phase = int(np.ceil(2 * half_width / (2 * cutoff * up)))
+    n_taps = taps_per_phase * up
+    n = np.arange(n_taps) - (n_taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(n_taps, beta)
+    return h * (up / h.sum())
+
+
+class PolyphaseResampler:
+    """Streaming-Resampler in_rate -> out_rate für Mono- oder Mehrkanal-Blöcke (float32)"""
+
+    def __init__(self, in_rate: int, out_rate: int = TARGET_RATE, channels: int = 1,
+                 half_width: int = 8, rolloff: float = 0.9, beta: float = 8.0):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = channels
+        divisor = gcd(self.in_rate, self.out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+        self.passthrough = self.up == self.down
+        # Downmix als Matrixprodukt (ein Durchlauf, kein Zwischenarray pro Kanal)
+        self._mix = np.full(channels, 1.0 / channels, dtype=np.float32)
+
+        if self.passthrough:
+            self.taps = 1
+            self._phases = None
+            self._history = np.zeros(0, dtype=np.float32)
+        else:
+            h = design_filter(self.up, self.down, half_width, rolloff, beta)
+            self.taps = len(h) // self.up
+            # phases[p, k] = h[p + k * up], umgedreht: Fenster x[b .. b+K-1] mal phases[p]
+            self._phases = np.ascontiguousarray(h.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+            self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._position = 0        # Position des nächsten Ausgabe-Samples in 1/up Eingangs-Samples
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    @property
+    def delay(self) -> float:
+        """Gruppenlaufzeit des Filters in Sekunden (feste Zusatzlatenz)"""
+        if self.passthrough:
+            return 0.0
+        return (self.taps * self.up - 1) / 2 / (self.up * self.in_rate)
+
+    def output_length(self, n_input: int) -> int:
+        """Wie viele Ausgabe-Samples der nächste Block mit n_input Samples liefert"""
+        if self.passthrough:
+            return n_input
+        end = n_input * self.up
+        return max(0, -(-(end - self._position) // self.down))
+
+    def reset(self):
+        self._history[:] = 0
+        self._position = 0
+
+    def downmix(self, block: np.ndarray) -> np.ndarray:
+        """(n, channels) -> (n,) float32; Mono-Blöcke unverändert"""
+        if block.ndim == 1:
+            return block.astype(np.float32, copy=False)
+        if block.shape[1] == 1:
+            return block[:, 0].astype(np.float32, copy=False)
+        return block.astype(np.float32, copy=False) @ self._mix
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Nächster Block in nativer Rate (Mono oder (n, channels)) -> Block in out_rate"""
+        x = self.downmix(block)
+        if self.passthrough:
+            return x.copy()
+        n_input = len(x)
+        history = len(self._history)
+        needed = history + n_input
+        if len(self._buffer) < needed:
+            self._buffer = np.empty(needed, dtype=np.float32)
+        buffer = self._buffer[:needed]
+        buffer[:history] = self._history
+        buffer[history:] = x
+
+        n_out = self.output_length(n_input)
+        positions = self._position + self.down * np.arange(n_out)
+        # Ausgabe an Position pos nutzt Eingang bis Index pos // up (relativ zum Blockanfang)
+        # und die Phase pos % up; im Puffer liegt das Fenster bei base .. base + K - 1
+        base, phase = np.divmod(positions, self.up)
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps)
+        out = np.einsum("nk,nk->n", windows[base], self._phases[phase])
+
+        self._position += self.down * n_out - n_input * self.up
+        self._history[:] = buffer[n_input:]
+        return out
+
+
+def _tone(rate: int, seconds: float, freq: float, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    x = (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return x if channels == 1 else np.repeat(x[:, None], channels, axis=1)
+
+
+def _level_db(x: np.ndarray) -> float:
+    return 20 * np.log10(np.sqrt(np.mean(np.square(x, dtype=np.float64))) + 1e-12)
+
+
+def _selftest():
+    """Blockgrenzen egal, 1-kHz-Ton unverändert, Töne über 8 kHz gedämpft"""
+    rng = np.random.default_rng(0)
+    for in_rate, channels in ((48000, 2), (44100, 1), (32000, 1), (22050, 2), (16000, 1)):
+        signal = rng.standard_normal((in_rate * 2, channels)).astype(np.float32) * 0.1
+        whole = PolyphaseResampler(in_rate, channels=channels).process(signal)
+        streaming = PolyphaseResampler(in_rate, channels=channels)
+        parts, start = [], 0
+        while start < len(signal):
+            size = int(rng.integers(1, 2000))
+            parts.append(streaming.process(signal[start:start + size]))
+            start += size
+        pieces = np.concatenate(parts)
+        assert len(pieces) == len(whole), (in_rate, len(pieces), len(whole))
+        assert np.allclose(pieces, whole, atol=1e-6), f"{in_rate}: Blockgrenzen ändern das Ergebnis"
+        assert abs(len(whole) - 2 * TARGET_RATE) <= 1, (in_rate, len(whole))
+
+        resampler = PolyphaseResampler(in_rate, channels=channels)
+        tone = resampler.process(_tone(in_rate, 1.0, 1000.0, channels))
+        skip = int(resampler.delay * TARGET_RATE) + resampler.taps
+        reference = _tone(TARGET_RATE, 1.0, 1000.0)
+        gain = _level_db(tone[skip:]) - _level_db(reference)
+        assert abs(gain) < 0.1, f"{in_rate}: Durchlass {gain:.2f} dB"
+
+        if in_rate > TARGET_RATE:
+            alias = PolyphaseResampler(in_rate, channels=channels).process(_tone(in_rate, 1.0, 10000.0, channels))
+            attenuation = _level_db(reference) - _level_db(alias[skip:])
+            assert attenuation > 60, f"{in_rate}: Alias nur {attenuation:.0f} dB gedämpft"
+        else:
+            attenuation = float("inf")
+        print(f"   {in_rate:>5} Hz x{channels}: {resampler.taps:>2} Taps/Phase, "
+              f"Verzögerung {resampler.delay * 1000:.2f}ms, Alias -{attenuation:.0f} dB")
+    print("✅ Selbsttest bestanden")
+
+
+def benchmark(seconds: float = 20.0, block_ms: float = 10.0):
+    """Rechenzeit pro Sekunde Audio bei Callback-großen Blöcken (wie vom Audiotreiber)"""
+    rng = np.random.default_rng(1)
+    print(f"{'Rate':>6} {'Kanäle':>6} {'L/M':>9} {'Taps':>5} {'Verzög.':>8} {'ms CPU/s':>9} {'Echtzeit':>9}")
+    for in_rate in (48000, 44100, 32000, 22050, 16000):
+        for channels in (1, 2):
+            resampler = PolyphaseResampler(in_rate, channels=channels)
+            block = int(in_rate * block_ms / 1000)
+            audio = rng.standard_normal((int(in_rate * seconds), channels)).astype(np.float32) * 0.1
+            started = time.process_time()
+            for start in range(0, len(audio) - block + 1, block):
+                resampler.process(audio[start:start + block])
+            cost = (time.process_time() - started) / seconds
+            print(f"{in_rate:>6} {channels:>6} {f'{resampler.up}/{resampler.down}':>9} {resampler.taps:>5} "
+                  f"{resampler.delay * 1000:>6.2f}ms {cost * 1000:>9.2f} {1 / max(cost, 1e-9):>8.0f}x")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Streaming-Polyphasen-Resampler auf 16 kHz")
+    parser.add_argument("--selftest", action="store_true", help="Korrektheit prüfen")
+    parser.add_argument("--benchmark", action="store_true", help="Rechenzeit pro Sekunde Audio messen")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Audio-Sekunden pro Benchmark-Fall")
+    parser.add_argument("--block-ms", type=float, default=10.0, help="Blockgröße im Benchmark (Callback)")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.seconds, args.block_ms)
+    else:
+        _selftest()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Weitere Alarm-Typen aus demselben YAMNet-Score-Tensor (keine zusätzliche Inferenz)
+- Taxonomie: Gruppen von YAMNet-Klassen (Name oder Index), je mit Schwelle und Bestätigungsregel
+- Pro Hop: ein Gather über alle Klassen aller Gruppen + maximum.reduceat -> ein Score pro Gruppe,
+  in vorallokierte Puffer (kein Allokieren im Hot Loop, unabhängig von der Gruppenzahl)
+- Regeln:
+    sustained  Start wie beim Weinen (Anteil über Schwelle im Fenster), Stop nach stop_delay Stille
+               -> sound_detected + sound_stopped (z.B. Rauchmelder)
+    oneshot    ein sound_detected pro Vorfall, danach cooldown Sekunden Ruhe (z.B. Glasbruch)
+- Pooling über die YAMNet-Patches eines Hops: mean (wie der Cry-Score) oder max (kurze Ereignisse)
+
+AudioSet kennt kein "Ersticken": die Gruppe choking nutzt Gasp, Wheeze und Gargling als
+nächste Klassen. Klassennamen, die die geladene Class Map nicht kennt, werden gemeldet und
+ausgelassen; eine Gruppe ohne bekannte Klasse ist ein Fehler.
+
+python sound_events.py    Selbsttest mit synthetischen Scores
+"""
+
+import json
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+POLICIES = ("sustained", "oneshot")
+POOLINGS = ("mean", "max")
+
+DEFAULT_TAXONOMY = [
+    {"name": "cough", "classes": ["Cough", "Throat clearing"], "threshold": 0.35,
+     "policy": "oneshot", "window": 3.0, "required_percentage": 0.3, "min_seconds": 1.0, "cooldown": 60.0},
+    {"name": "choking", "classes": ["Gasp", "Wheeze", "Gargling"], "threshold": 0.3,
+     "policy": "oneshot", "window": 2.0, "required_percentage": 0.5, "min_seconds": 1.0, "cooldown": 30.0},
+    {"name": "smoke_alarm", "classes": ["Smoke detector, smoke alarm", "Fire alarm"], "threshold": 0.3,
+     "policy": "sustained", "window": 4.0, "required_percentage": 0.5, "min_seconds": 2.0, "stop_delay": 10.0},
+    {"name": "glass_break", "classes": ["Shatter", "Glass"], "threshold": 0.4, "pooling": "max",
+     "policy": "oneshot", "window": 0.5, "required_percentage": 0.5, "min_seconds": 0.5, "cooldown": 30.0},
+]
+
+
+@dataclass(frozen=True)
+class EventGroup:
+    name: str
+    classes: Tuple[Union[str, int], ...]   # YAMNet-Klassennamen oder -Indizes
+    threshold: float = 0.3
+    policy: str = "oneshot"
+    pooling: str = "mean"
+    window: float = 3.0                   # Beobachtungsfenster für den Start
+    required_percentage: float = 0.5      # Anteil Hops über Schwelle im Fenster
+    min_seconds: float = 1.0              # mindestens so viele Sekunden Daten im Fenster
+    stop_delay: float = 8.0               # sustained: Sekunden unter Schwelle bis sound_stopped
+    cooldown: float = 30.0                # oneshot: Sekunden bis zum nächsten Alarm
+
+    def validate(self) -> List[str]:
+        errors = []
+        prefix = f"{self.name or '?'}: "
+        if not self.name or not isinstance(self.name, str):
+            errors.append("Gruppe ohne name")
+        if not self.classes:
+            errors.append(prefix + "classes ist leer")
+        if not 0.0 < self.threshold < 1.0:
+            errors.append(prefix + "threshold muss zwischen 0 und 1 liegen")
+        if self.policy not in POLICIES:
+            errors.append(prefix + f"policy muss einer von {POLICIES} sein")
+        if self.pooling not in POOLINGS:
+            errors.append(prefix + f"pooling muss einer von {POOLINGS} sein")
+        if not 0.5 <= self.window <= 30.0:
+            errors.append(prefix + "window muss zwischen 0.5 und 30s liegen")
+        if not 0.0 < self.required_percentage <= 1.0:
+            errors.append(prefix + "required_percentage muss in (0, 1] liegen")
+        if not 0.0 <= self.min_seconds <= self.window:
+            errors.append(prefix + "min_seconds muss zwischen 0 und window liegen")
+        if not 0.0 < self.stop_delay <= 600:
+            errors.append(prefix + "stop_delay muss zwischen 0 und 600s liegen")
+        if not 0.0 <= self.cooldown <= 3600:
+            errors.append(prefix + "cooldown muss zwischen 0 und 3600s liegen")
+        return errors
+
+
+def parse_taxonomy(entries) -> Tuple[List[EventGroup], List[str]]:
+    """JSON-Liste -> Gruppen; (Gruppen, Fehler)"""
+    if not isinstance(entries, list):
+        return [], ["Taxonomie: JSON-Liste von Gruppen erwartet"]
+    known = {f.name for f in fields(EventGroup)}
+    groups, errors, names = [], [], set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            errors.append(f"Gruppe muss ein Objekt sein: {entry!r}")
+            continue
+        unknown = [key for key in entry if key not in known]
+        if unknown:
+            errors.append(f"{entry.get('name', '?')}: unbekannte Felder {unknown}")
+            continue
+        try:
+            group = EventGroup(**{**entry, "classes": tuple(entry.get("classes") or ())})
+        except TypeError as e:
+            errors.append(f"{entry.get('name', '?')}: {e}")
+            continue
+        errors.extend(group.validate())
+        if group.name in names:
+            errors.append(f"{group.name}: doppelter Name")
+        names.add(group.name)
+        groups.append(group)
+    return groups, errors
+
+
+def load_taxonomy(spec: str) -> Tuple[List[EventGroup], List[str]]:
+    """"default" = eingebaute Taxonomie, sonst Pfad zu einer JSON-Datei"""
+    if spec == "default":
+        return parse_taxonomy(DEFAULT_TAXONOMY)
+    try:
+        with open(spec) as f:
+            return parse_taxonomy(json.load(f))
+    except (OSError, ValueError) as e:
+        return [], [f"{spec}: {e}"]
+
+
+class _GroupState:
+    """Bestätigung einer Gruppe auf einem Ringpuffer (wie CryConfirmation, ohne Logausgaben)"""
+
+    def __init__(self, group: EventGroup, hop_length: float, capacity: int = 64):
+        self.group = group
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._hit = np.zeros(capacity, dtype=np.bool_)
+        self._start = self._count = self._hits = 0
+        self.min_detections = 1
+        self.set_hop(hop_length)
+        self.active = False              # sustained: Alarm läuft
+        self.quiet_since: Optional[float] = None
+        self.blocked_until = 0.0         # oneshot: Cooldown
+        self.peak = 0.0                  # höchster Score seit Beginn des Vorfalls
+        self.count = 0                   # Alarme insgesamt
+
+    def set_hop(self, hop_length: float):
+        self.min_detections = max(1, round(self.group.min_seconds / hop_length))
+
+    def _clear(self):
+        self._start = self._count = self._hits = 0
+
+    def update(self, now: float, score: float) -> str:
+        group = self.group
+        hit = score > group.threshold
+        capacity = len(self._ts)
+        if self._count == capacity:
+            self._hits -= bool(self._hit[self._start])
+            self._start = (self._start + 1) % capacity
+            self._count -= 1
+        index = (self._start + self._count) % capacity
+        self._ts[index] = now
+        self._hit[index] = hit
+        self._count += 1
+        self._hits += hit
+        while self._count and now - self._ts[self._start] > group.window:
+            self._hits -= bool(self._hit[self._start])
+            self._start = (self._start + 1) % capacity
+            self._count -= 1
+        if hit:
+            self.peak = max(self.peak, score)
+
+        if self.active:
+            # sustained: Stop nach kontinuierlicher Ruhe
+            if hit:
+                self.quiet_since = None
+            elif self.quiet_since is None:
+                self.quiet_since = now
+            elif now - self.quiet_since >= group.stop_delay:
+                self.active = False
+                self.quiet_since = None
+                self._clear()
+                return "sound_stopped"
+            return ""
+
+        if now < self.blocked_until:
+            return ""
+        if self._count >= self.min_detections and self._hits / self._count >= group.required_percentage:
+            self.count += 1
+            self._clear()
+            if group.policy == "sustained":
+                self.active = True
+            else:
+                self.blocked_until = now + group.cooldown
+            return "sound_detected"
+        if not self._hits:
+            self.peak = 0.0
+        return ""
+
+
+class SoundEventTaxonomy:
+    """Alle Gruppen gegen einen Score-Tensor pro Hop; liefert die Events dieses Hops"""
+
+    def __init__(self, groups: List[EventGroup], class_names: List[str], hop_length: float = 0.5):
+        self.groups = list(groups)
+        self.class_names = class_names
+        self.warnings: List[str] = []
+        lookup = {name: index for index, name in enumerate(class_names)}
+        n_classes = len(class_names)
+        indices, starts, errors = [], [], []
+        self.group_classes: List[List[int]] = []
+        for group in self.groups:
+            resolved = []
+            for cls in group.classes:
+                if isinstance(cls, int) and not isinstance(cls, bool):
+                    index = cls if 0 <= cls < n_classes else None
+                else:
+                    index = lookup.get(cls)
+                if index is None:
+                    self.warnings.append(f"{group.name}: Klasse {cls!r} nicht in der Class Map")
+                    continue
+                resolved.append(index)
+            if not resolved:
+                errors.append(f"{group.name}: keine bekannte Klasse")
+                continue
+            starts.append(len(indices))
+            # max-Pooling-Gruppen lesen aus der zweiten Hälfte des Pooling-Puffers
+            offset = n_classes if group.pooling == "max" else 0
+            indices.extend(index + offset for index in resolved)
+            self.group_classes.append(resolved)
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        self.n_classes = n_classes
+        self.uses_max = any(group.pooling == "max" for group in self.groups)
+        self._indices = np.asarray(indices, dtype=np.intp)
+        self._starts = np.asarray(starts, dtype=np.intp)
+        self._pooled = np.zeros(2 * n_classes if self.uses_max else n_classes, dtype=np.float32)
+        self._gathered = np.zeros(len(indices), dtype=np.float32)
+        self.scores = np.zeros(len(self.groups), dtype=np.float32)
+        self.states = [_GroupState(group, hop_length) for group in self.groups]
+
+    def set_hop(self, hop_length: float):
+        for state in self.states:
+            state.set_hop(hop_length)
+
+    def score(self, mean_scores: np.ndarray, patch_scores: Optional[np.ndarray] = None) -> np.ndarray:
+        """Gruppen-Scores (max über die Klassen einer Gruppe) in den wiederverwendeten Puffer"""
+        pooled = self._pooled
+        pooled[:self.n_classes] = mean_scores
+        if self.uses_max:
+            np.max(patch_scores, axis=0, out=pooled[self.n_classes:])
+        np.take(pooled, self._indices, out=self._gathered)
+        np.maximum.reduceat(self._gathered, self._starts, out=self.scores)
+        return self.scores
+
+    def update(self, now: float, mean_scores: np.ndarray,
+               patch_scores: Optional[np.ndarray] = None) -> List[Tuple[str, dict]]:
+        """Ein Hop; liefert [(event_type, data)] (meist leer)"""
+        scores = self.score(mean_scores, patch_scores)
+        events = []
+        for i, state in enumerate(self.states):
+            event = state.update(now, float(scores[i]))
+            if event:
+                events.append((event, self._event_data(i, state, event)))
+                if event == "sound_stopped" or state.group.policy == "oneshot":
+                    state.peak = 0.0
+        return events
+
+    def _event_data(self, i: int, state: _GroupState, event: str) -> dict:
+        group = state.group
+        data = {"kind": group.name, "policy": group.policy, "probability": float(self.scores[i]),
+                "peak": float(state.peak), "count": state.count}
+        if event == "sound_detected":
+            # Welche Klasse der Gruppe den Ausschlag gab
+            pooled = self._pooled[self.n_classes:] if group.pooling == "max" else self._pooled
+            top = max(self.group_classes[i], key=lambda index: pooled[index])
+            data["class"] = self.class_names[top]
+        return data
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Für das status-Event"""
+        return {state.group.name: {"score": round(float(self.scores[i]), 3), "active": state.active,
+                                   "count": state.count}
+                for i, state in enumerate(self.states)}
+
+    def describe(self) -> str:
+        return ", ".join(f"{state.group.name} ({len(classes)} Klassen, {state.group.policy})"
+                         for state, classes in zip(self.states, self.group_classes))
+
+
+def _selftest():
+    """Synthetische Score-Tensoren: Typen, Regeln, Cooldown und allokationsfreier Hop"""
+    import sys
+    names = [f"class_{i}" for i in range(521)]
+    for index, name in ((42, "Cough"), (39, "Gasp"), (393, "Smoke detector, smoke alarm"),
+                        (394, "Fire alarm"), (437, "Shatter"), (435, "Glass")):
+        names[index] = name
+    groups, errors = load_taxonomy("default")
+    assert not errors, errors
+    taxonomy = SoundEventTaxonomy(groups, names, hop_length=0.5)
+    assert any("Throat clearing" in w for w in taxonomy.warnings), taxonomy.warnings
+
+    patches = np.zeros((2, 521), dtype=np.float32)
+    mean = np.zeros(521, dtype=np.float32)
+    timeline = []
+    for hop in range(160):
+        now = hop * 0.5
+        patches[:] = 0.01
+        if 10 <= hop < 40:
+            patches[:, 394] = 0.8                 # Alarm 15s lang
+        if hop in (60, 62, 64, 90):
+            patches[:, 42] = 0.7                  # Husten
+        if hop == 120:
+            patches[1, 437] = 0.9                 # Glasbruch nur im zweiten Patch
+        np.mean(patches, axis=0, out=mean)
+        if hop == 140:
+            blocks = sys.getallocatedblocks()
+        for event, data in taxonomy.update(now, mean, patches):
+            timeline.append((now, event, data["kind"], data.get("class")))
+        if hop == 150:
+            growth = sys.getallocatedblocks() - blocks
+    for entry in timeline:
+        print(f"   {entry[0]:>5.1f}s  {entry[1]:<15} {entry[2]:<12} {entry[3] or ''}")
+    kinds = [(event, kind) for _, event, kind, _ in timeline]
+    assert kinds.count(("sound_detected", "smoke_alarm")) == 1 and ("sound_stopped", "smoke_alarm") in kinds, kinds
+    assert kinds.count(("sound_detected", "cough")) == 1, "Cooldown greift nicht"
+    assert ("sound_detected", "glass_break") in kinds, "max-Pooling verpasst kurzen Glasbruch"
+    assert timeline[0][3] == "Fire alarm", timeline[0]
+    assert growth <= 2, f"{growth} Speicherblöcke in 10 ruhigen Hops"
+    print(f"✅ Selbsttest bestanden ({taxonomy.describe()})")
+
+
+if __name__ == "__main__":
+    _selftest()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Abonnements auf dem Event-Socket des Detektors (Control-Protokoll pro Verbindung)
+- Ohne Abo bekommt jede Verbindung alle normalen Events (wie bisher); Streams mit hoher Rate
+  (STREAM_TYPES, pro Hop) nur auf ausdrücklichen Wunsch
+- subscribe / unsubscribe pro Event-Typ, pro Typ Dezimierung (jede n-te Nachricht) oder
+  Höchstrate (Nachrichten pro Sekunde)
+- Der Detektor serialisiert eine Nachricht nur, wenn mindestens eine Verbindung sie will;
+  Streams ohne Abonnenten werden gar nicht erst gebaut (wanted_streams)
+
+Control-Messages (eine JSON-Zeile):
+  {"type": "subscribe", "data": {"types": ["probability"], "every": 2}}      jede 2. Nachricht
+  {"type": "subscribe", "data": {"types": ["diagnostics"], "rate": 0.5}}     höchstens 0.5/s
+  {"type": "unsubscribe", "data": {"types": ["status"]}}                     "*" = alle normalen
+  {"type": "ping", "data": {"id": 1, "client_time": 1712345678.9}}           -> pong
+
+python subscriptions.py                                         Selbsttest der Abo-Logik
+python subscriptions.py --watch probability --rate 2 --ping 5   an laufendem Detektor
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Pro Hop veröffentlichte Streams - nur für Verbindungen, die sie abonniert haben
+STREAM_TYPES = {
+    "probability": "Wahrscheinlichkeit + Zustand der Bestätigungslogik pro Hop",
+    "diagnostics": "Rechenzeit, Rückstand, Last und Modus pro Hop",
+}
+ALL_EVENTS = "*"
+
+
+class Subscription:
+    """Abo-Zustand einer Verbindung; accepts() entscheidet pro Nachricht (inkl. Dezimierung)"""
+
+    def __init__(self):
+        self.all_events = True                 # alle normalen Events (nicht STREAM_TYPES)
+        self.types: Set[str] = set()           # zusätzlich abonniert (v.a. Streams)
+        self.muted: Set[str] = set()           # trotz all_events abbestellt
+        self.every: Dict[str, int] = {}        # Typ -> nur jede n-te Nachricht
+        self.min_interval: Dict[str, float] = {}   # Typ -> Mindestabstand in Sekunden
+        self._counter: Dict[str, int] = {}
+        self._last_sent: Dict[str, float] = {}
+
+    def wants(self, event_type: str) -> bool:
+        """Typ abonniert (ohne Dezimierung)"""
+        if event_type in self.muted:
+            return False
+        return event_type in self.types or (self.all_events and event_type not in STREAM_TYPES)
+
+    def accepts(self, event_type: str, now: float) -> bool:
+        """Diese Nachricht senden? Zählt für die Dezimierung mit"""
+        if not self.wants(event_type):
+            return False
+        every = self.every.get(event_type)
+        if every:
+            count = self._counter.get(event_type, 0)
+            self._counter[event_type] = count + 1
+            if count % every:
+                return False
+        interval = self.min_interval.get(event_type)
+        if interval:
+            if now - self._last_sent.get(event_type, float("-inf")) < interval:
+                return False
+            self._last_sent[event_type] = now
+        return True
+
+    def subscribe(self, data: dict) -> List[str]:
+        """Typen abonnieren, optional mit every/rate; liefert Fehler (leer = übernommen)"""
+        types, errors = _parse_types(data)
+        every, rate = data.get("every"), data.get("rate")
+        if every is not None and (not isinstance(every, int) or isinstance(every, bool) or every < 1):
+            errors.append("every muss eine ganze Zahl >= 1 sein")
+        if rate is not None and (not isinstance(rate, (int, float)) or isinstance(rate, bool) or rate <= 0):
+            errors.append("rate muss > 0 sein (Nachrichten pro Sekunde)")
+        if errors:
+            return errors
+        for event_type in types:
+            if event_type == ALL_EVENTS:
+                self.all_events = True
+                self.muted.clear()
+                continue
+            self.types.add(event_type)
+            self.muted.discard(event_type)
+            # Ohne Angabe gilt wieder die volle Rate
+            self._set(self.every, event_type, every)
+            self._set(self.min_interval, event_type, 1.0 / rate if rate else None)
+            self._counter.pop(event_type, None)
+            self._last_sent.pop(event_type, None)
+        return []
+
+    def unsubscribe(self, data: dict) -> List[str]:
+        types, errors = _parse_types(data)
+        if errors:
+            return errors
+        for event_type in types:
+            if event_type == ALL_EVENTS:
+                self.all_events = False
+                self.muted.clear()
+                continue
+            self.types.discard(event_type)
+            if self.all_events and event_type not in STREAM_TYPES:
+                self.muted.add(event_type)
+            for table in (self.every, self.min_interval, self._counter, self._last_sent):
+                table.pop(event_type, None)
+        return []
+
+    def describe(self) -> dict:
+        """Aktueller Stand (Antwort auf subscribe/unsubscribe)"""
+        return {
+            "all_events": self.all_events,
+            "types": sorted(self.types),
+            "muted": sorted(self.muted),
+            "every": dict(self.every),
+            "rate": {t: round(1.0 / i, 3) for t, i in self.min_interval.items()},
+            "streams": sorted(STREAM_TYPES),
+        }
+
+    @staticmethod
+    def _set(table: dict, key: str, value):
+        if value:
+            table[key] = value
+        else:
+            table.pop(key, None)
+
+
+def _parse_types(data: dict) -> Tuple[List[str], List[str]]:
+    types = data.get("types")
+    if isinstance(types, str):
+        types = [types]
+    if not isinstance(types, list) or not types or not all(isinstance(t, str) and t for t in types):
+        return [], ["types muss eine Liste von Event-Typen sein"]
+    return types, []
+
+
+def wanted_streams(subscriptions: Iterable[Subscription]) -> frozenset:
+    """Streams mit mindestens einem Abonnenten (nach jeder Abo-Änderung neu berechnen)"""
+    return frozenset(t for t in STREAM_TYPES if any(s.wants(t) for s in subscriptions))
+
+
+def _selftest():
+    sub = Subscription()
+    assert sub.accepts("cry_detected", 0.0) and sub.accepts("status", 0.0)
+    assert not sub.accepts("probability", 0.0), "Streams nur auf Wunsch"
+    assert wanted_streams([sub]) == frozenset()
+
+    assert sub.subscribe({"types": ["probability"], "every": 3}) == []
+    sent = [sub.accepts("probability", hop * 0.5) for hop in range(9)]
+    assert sent == [True, False, False] * 3, sent
+    assert wanted_streams([Subscription(), sub]) == {"probability"}
+
+    assert sub.subscribe({"types": "diagnostics", "rate": 1.0}) == []
+    sent = [sub.accepts("diagnostics", hop * 0.5) for hop in range(6)]
+    assert sent == [True, False] * 3, sent
+
+    assert sub.unsubscribe({"types": ["status", "probability"]}) == []
+    assert not sub.accepts("status", 0.0) and not sub.accepts("probability", 0.0)
+    assert sub.accepts("cry_detected", 0.0)
+    assert sub.subscribe({"types": ["status"]}) == [] and sub.accepts("status", 0.0)
+
+    assert sub.unsubscribe({"types": ["*"]}) == []
+    assert not sub.accepts("cry_detected", 0.0) and sub.accepts("diagnostics", 10.0)
+    assert sub.subscribe({"types": ["cry_detected"]}) == [] and sub.accepts("cry_detected", 0.0)
+    assert not sub.accepts("cry_stopped", 0.0)
+
+    assert sub.subscribe({"types": []}) and sub.subscribe({"types": ["x"], "every": 0})
+    assert sub.subscribe({"types": ["x"], "rate": "fast"})
+    print(f"✅ Selbsttest bestanden: {sub.describe()}")
+
+
+def watch(host: str, port: int, types: List[str], every: Optional[int], rate: Optional[float],
+          pings: int, seconds: float):
+    """Test-Client: Streams abonnieren, Latenz per ping messen, Nachrichten pro Typ zählen"""
+    import json
+    import socket
+
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(message_type: str, data: dict):
+        sock.sendall((json.dumps({"type": message_type, "data": data}) + "\n").encode("utf-8"))
+
+    if types:
+        subscription = {"types": types}
+        if every:
+            subscription["every"] = every
+        if rate:
+            subscription["rate"] = rate
+        send("subscribe", subscription)
+    counts: Dict[str, int] = {}
+    round_trips: List[float] = []
+    next_ping, ping_id = time.monotonic(), 0
+    sock.settimeout(0.2)
+    buffer = b""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if ping_id < pings and time.monotonic() >= next_ping:
+            ping_id += 1
+            send("ping", {"id": ping_id, "client_time": time.monotonic()})
+            next_ping += 1.0
+        if b"\n" not in buffer:
+            try:
+                chunk = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not chunk:
+                print("📡 Verbindung getrennt")
+                break
+            buffer += chunk
+            continue
+        line, buffer = buffer.split(b"\n", 1)
+        message = json.loads(line)
+        message_type = message.get("type")
+        counts[message_type] = counts.get(message_type, 0) + 1
+        data = message.get("data") or {}
+        if message_type == "pong":
+            round_trip = (time.monotonic() - data["client_time"]) * 1000
+            round_trips.append(round_trip)
+            print(f"🏓 pong {data.get('id')}: {round_trip:.2f}ms (letzter Hop vor {data.get('hop_age_ms')}ms)")
+        elif message_type in ("subscribed", "subscribe_rejected") or message_type in types:
+            print(f"📨 {message_type} seq={message.get('seq')} {json.dumps(data)[:120]}")
+    sock.close()
+    print("📊 Nachrichten: " + ", ".join(f"{t} {n}" for t, n in sorted(counts.items())))
+    if round_trips:
+        print(f"🏓 Round Trip: min {min(round_trips):.2f}ms | max {max(round_trips):.2f}ms")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Abos auf dem Detektor-Event-Socket (Selbsttest/Test-Client)")
+    parser.add_argument("--watch", nargs="*", default=None, metavar="TYPE",
+                        help=f"Mit laufendem Detektor verbinden und Typen abonnieren ({', '.join(STREAM_TYPES)}, ...)")
+    parser.add_argument("--host", type=str, default="localhost", help="Detektor-Host")
+    parser.add_argument("--port", type=int, default=9999, help="Detektor-Port")
+    parser.add_argument("--every", type=int, default=None, help="Nur jede n-te Nachricht pro Typ")
+    parser.add_argument("--rate", type=float, default=None, help="Höchstens so viele Nachrichten pro Sekunde")
+    parser.add_argument("--ping", type=int, default=3, help="Anzahl pings (eine pro Sekunde)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Laufzeit des Test-Clients")
+    args = parser.parse_args()
+    if args.watch is None:
+        _selftest()
+    else:
+        watch(args.host, args.port, args.watch, args.every, args.rate, args.ping, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
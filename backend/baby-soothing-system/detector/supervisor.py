@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Detector Supervisor mit Warm-Standby
+- Hält den TCP-Listening-Socket selbst offen und vererbt ihn an die Detector-Prozesse:
+  Agent/Gateway verbinden sich nach einem Absturz sofort neu, Verbindungen warten im Backlog
+- Besitzt die Audio-Quelle (Mikrofon, natives Mikrofon oder UDP vom Capture-Client) und verteilt jeden Frame
+  an aktiven Detector und Standby - der Standby hat bei der Übernahme die letzte Sekunde Audio
+- Ein zweiter Detector läuft als Warm-Standby (YAMNet geladen, erste Inferenz erledigt)
+- Health-Check über eine Heartbeat-Pipe: Prozessende sofort, Hänger nach --health-timeout
+- Bei Ausfall: alten Prozess killen, Standby übernehmen lassen, neuen Standby aufwärmen;
+  Erkennungs-, Übernahme- und Lückendauer werden gemessen und ausgegeben
+- Zur Laufzeit geänderte Konfiguration (set_config, SIGHUP) meldet der Detector über die
+  Heartbeat-Pipe; der übernehmende Prozess bekommt sie mit "promote"
+
+Aufruf: python supervisor.py [Supervisor-Optionen] -- [Service-Optionen]
+(nur POSIX: vererbte Sockets und AF_UNIX-Socketpaare)
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+SERVICE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baby_cry_detector_service.py")
+
+
+class AudioHub:
+    """Liest Audio-Frames (UDP oder Mikrofon) und verteilt sie an alle Detector-Prozesse"""
+
+    def __init__(self, source: str, audio_port: int, sample_rate: int = 16000, frame_ms: int = 20,
+                 device=None, channels: Optional[int] = None):
+        self.source = source
+        self.audio_port = audio_port
+        self.device = device
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.targets: List[socket.socket] = []
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.stats = {"frames": 0, "dropped": 0}
+        self._sock: Optional[socket.socket] = None
+        self._stream = None
+        self._native = None
+        self._seq = 0
+
+    def start(self):
+        self.is_running = True
+        if self.source == "net":
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            self._sock.bind(("0.0.0.0", self.audio_port))
+            threading.Thread(target=self._receive_loop, daemon=True).start()
+            print(f"🛰️ Supervisor empfängt Audio auf UDP :{self.audio_port}")
+        elif self.source == "native":
+            from audio_sources import NativeMicrophoneSource, pack_frame
+            self._pack_frame = pack_frame
+            self._native = NativeMicrophoneSource(self.sample_rate, self.device, channels=self.channels)
+            self._native.__enter__()
+            threading.Thread(target=self._native_loop, daemon=True).start()
+            print("🎙️ Supervisor nimmt das Mikrofon mit nativer Rate auf")
+        else:
+            import sounddevice as sd
+            from audio_sources import pack_frame
+            self._pack_frame = pack_frame
+            self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32',
+                                          blocksize=self.frame_samples, callback=self._on_audio)
+            self._stream.start()
+            print("🎙️ Supervisor nimmt das Mikrofon auf")
+
+    def _receive_loop(self):
+        while self.is_running:
+            try:
+                datagram = self._sock.recv(65536)
+            except OSError:
+                break
+            self._fan_out(datagram)
+
+    def _native_loop(self):
+        # Resampelte 16-kHz-Frames in fester Größe aus dem Ringpuffer
+        while self.is_running:
+            pcm = self._native.read_block(self.frame_samples)
+            if pcm is not None:
+                self._fan_out(self._pack_frame(self._seq, time.time(), pcm))
+                self._seq += 1
+
+    def _on_audio(self, indata, n_frames, time_info, status):
+        self._fan_out(self._pack_frame(self._seq, time.time(), indata[:, 0]))
+        self._seq += 1
+
+    def _fan_out(self, datagram: bytes):
+        self.stats["frames"] += 1
+        with self.lock:
+            for target in self.targets:
+                try:
+                    target.send(datagram)
+                except OSError:
+                    # Empfänger liest (noch) nicht, z.B. während des Modell-Ladens
+                    self.stats["dropped"] += 1
+
+    def attach(self) -> Tuple[socket.socket, socket.socket]:
+        """Neuer Empfänger; liefert (Supervisor-Ende, Kind-Ende - fd wird an den Prozess vererbt)"""
+        parent_end, child_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        parent_end.setblocking(False)
+        parent_end.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        with self.lock:
+            self.targets.append(parent_end)
+        return parent_end, child_end
+
+    def detach(self, parent_end: socket.socket):
+        with self.lock:
+            if parent_end in self.targets:
+                self.targets.remove(parent_end)
+        parent_end.close()
+
+    def stop(self):
+        self.is_running = False
+        if self._stream:
+            self._stream.stop()
+            self._stream.close()
+        if self._native:
+            self._native.__exit__(None, None, None)
+        if self._sock:
+            self._sock.close()
+
+
+class DetectorProcess:
+    """Ein Detector-Kindprozess im Standby-Modus mit Heartbeat-Pipe"""
+
+    def __init__(self, name: str, service_args: List[str], listen_sock: socket.socket, hub: AudioHub):
+        self.name = name
+        self.hub = hub
+        self.hub_end, audio_end = hub.attach()
+        read_fd, write_fd = os.pipe()
+        fds = [listen_sock.fileno(), write_fd, audio_end.fileno()]
+        command = [sys.executable, SERVICE_PATH, *service_args, "--standby",
+                   "--listen-fd", str(listen_sock.fileno()), "--heartbeat-fd", str(write_fd),
+                   "--audio-fd", str(audio_end.fileno())]
+        # Eigene Session: Ctrl+C im Terminal trifft nur den Supervisor
+        self.proc = subprocess.Popen(command, pass_fds=fds, stdin=subprocess.PIPE, start_new_session=True)
+        os.close(write_fd)
+        audio_end.close()   # gehört jetzt dem Kind
+
+        self.state = "starting"
+        self.spawned_at = time.monotonic()
+        self.warm_at: Optional[float] = None
+        self.promoted_at: Optional[float] = None
+        self.active_at: Optional[float] = None
+        self.first_hop_at: Optional[float] = None
+        self.last_beat: Optional[float] = None
+        self.last_hop_at: Optional[float] = None
+        self.exited_at: Optional[float] = None
+        self.config: Optional[dict] = None   # zuletzt übernommene Konfiguration
+        self.changed = threading.Event()
+        threading.Thread(target=self._read_heartbeats, args=(read_fd,), daemon=True).start()
+
+    def _read_heartbeats(self, read_fd: int):
+        with os.fdopen(read_fd, "rb") as pipe:
+            for line in pipe:
+                now = time.monotonic()
+                kind = line.strip()
+                if kind == b"hop":
+                    self.last_beat = self.last_hop_at = now
+                    if self.first_hop_at is None:
+                        self.first_hop_at = now
+                        self.changed.set()
+                elif kind == b"idle":
+                    self.last_beat = now
+                elif kind == b"warm":
+                    self.state = "warm"
+                    self.warm_at = now
+                    self.changed.set()
+                elif kind == b"active":
+                    self.state = "active"
+                    self.active_at = self.last_beat = now
+                    self.changed.set()
+                elif kind.startswith(b"config "):
+                    self.config = json.loads(kind[len(b"config "):])
+        # EOF: Prozess ist beendet (alle Schreib-Enden zu)
+        self.exited_at = time.monotonic()
+        self.state = "exited"
+        self.hub.detach(self.hub_end)
+        self.changed.set()
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def is_warm(self) -> bool:
+        return self.state == "warm"
+
+    def has_failed(self, health_timeout: float) -> Optional[str]:
+        if self.exited_at is not None or self.proc.poll() is not None:
+            return f"Prozess beendet (Exit {self.proc.poll()})"
+        if self.last_beat is not None and time.monotonic() - self.last_beat > health_timeout:
+            return f"kein Heartbeat seit {time.monotonic() - self.last_beat:.1f}s"
+        return None
+
+    def wait_for(self, condition, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.exited_at is not None:
+                return condition()
+            self.changed.wait(min(remaining, 0.05))
+            self.changed.clear()
+        return True
+
+    def promote(self, config: Optional[dict] = None):
+        self.promoted_at = time.monotonic()
+        payload = b" " + json.dumps(config).encode() if config else b""
+        self.proc.stdin.write(b"promote" + payload + b"\n")
+        self.proc.stdin.flush()
+
+    def terminate(self, timeout: float = 5.0):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdin.close()
+
+
+class DetectorSupervisor:
+    """Aktiver Detector + Warm-Standby, Failover mit gemessener Lücke"""
+
+    def __init__(self, service_args: List[str], health_timeout: float = 3.0, warm_timeout: float = 120.0):
+        from baby_cry_detector_service import build_parser
+        options = build_parser().parse_args(service_args)
+        self.service_args = service_args
+        self.hop_length = 0.5
+        self.health_timeout = health_timeout
+        self.warm_timeout = warm_timeout
+
+        self.listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen_sock.bind((options.host, options.port))
+        self.listen_sock.listen(16)
+        print(f"📡 Supervisor hält TCP {options.host}:{options.port}")
+
+        self.hub = AudioHub(options.audio_source, options.audio_port,
+                            device=options.audio_device, channels=options.audio_channels)
+
+        self.active: Optional[DetectorProcess] = None
+        self.standby: Optional[DetectorProcess] = None
+        self.failovers: List[dict] = []
+        self.runtime_config: Optional[dict] = None   # Laufzeit-Konfiguration über Failover hinweg
+        self.is_running = False
+        self._generation = 0
+
+    def _spawn(self) -> DetectorProcess:
+        self._generation += 1
+        process = DetectorProcess(f"detector-{self._generation}", self.service_args,
+                                  self.listen_sock, self.hub)
+        print(f"🧊 Starte Standby {process.name} (PID {process.pid})")
+        return process
+
+    def start(self):
+        self.is_running = True
+        self.hub.start()
+        first = self._spawn()
+        if not first.wait_for(first.is_warm, self.warm_timeout):
+            raise RuntimeError("Erster Detector wurde nicht warm")
+        first.promote()
+        first.wait_for(lambda: first.active_at is not None, 10.0)
+        self.active = first
+        print(f"✅ {first.name} aktiv (Start bis warm: {first.warm_at - first.spawned_at:.1f}s)")
+        self.standby = self._spawn()
+
+    def failover(self, reason: str) -> dict:
+        detected_at = time.monotonic()
+        old, new = self.active, self.standby
+        print(f"💥 {old.name} ausgefallen: {reason}")
+        old.kill()
+        if old.config is not None:
+            self.runtime_config = old.config
+
+        if new is None or not new.wait_for(new.is_warm, self.warm_timeout):
+            # Standby nicht bereit - beenden und einsammeln, dann neuen kalten Start abwarten
+            if new is not None:
+                print(f"⚠️ Standby {new.name} nicht warm - beende PID {new.pid}")
+                new.kill()
+            new = self._spawn()
+            new.wait_for(new.is_warm, self.warm_timeout)
+        new.promote(self.runtime_config)
+        new.wait_for(lambda: new.first_hop_at is not None, 10.0)
+        self.active = new
+        self.standby = self._spawn()
+
+        # Zeitpunkte auf der Supervisor-Uhr (monotonic)
+        failed_at = old.exited_at if old.exited_at is not None else detected_at
+        last_hop = old.last_hop_at or old.last_beat or failed_at
+        record = {
+            "reason": reason,
+            "detection_ms": max(0.0, detected_at - failed_at) * 1000,
+            "takeover_ms": ((new.active_at or detected_at) - new.promoted_at) * 1000,
+            "first_hop_ms": ((new.first_hop_at or detected_at) - new.promoted_at) * 1000,
+            "gap_ms": ((new.first_hop_at or detected_at) - last_hop) * 1000,
+        }
+        # Ausfall bis zum ersten Hop des neuen Detectors (Zielgröße: deutlich unter einem Hop)
+        record["outage_ms"] = ((new.first_hop_at or detected_at) - failed_at) * 1000
+        self.failovers.append(record)
+        print(f"🔁 Failover auf {new.name}: Erkennung {record['detection_ms']:.0f}ms | "
+              f"Übernahme {record['takeover_ms']:.0f}ms | erster Hop nach {record['first_hop_ms']:.0f}ms | "
+              f"Ausfall bis erster Hop {record['outage_ms']:.0f}ms | Lücke zwischen Hops {record['gap_ms']:.0f}ms "
+              f"(Hop {self.hop_length * 1000:.0f}ms)")
+        return record
+
+    def run(self, test_failovers: int = 0, failover_interval: float = 10.0, poll_interval: float = 0.01):
+        """Überwachungsschleife; test_failovers > 0 killt den aktiven Detector zum Messen"""
+        self.start()
+        next_kill = time.monotonic() + failover_interval
+        while self.is_running and not (test_failovers and len(self.failovers) >= test_failovers):
+            time.sleep(poll_interval)
+            reason = self.active.has_failed(self.health_timeout)
+            if reason:
+                self.failover(reason)
+                next_kill = time.monotonic() + failover_interval
+                continue
+            if self.standby and self.standby.exited_at is not None:
+                print(f"⚠️ Standby {self.standby.name} beendet - starte neu")
+                self.standby.kill()
+                self.standby = self._spawn()
+            if test_failovers and time.monotonic() >= next_kill and self.standby.is_warm():
+                print(f"🧪 Test-Failover: SIGKILL an {self.active.name}")
+                os.kill(self.active.pid, signal.SIGKILL)
+                next_kill = float("inf")  # nächster Termin nach dem Failover
+
+    def report(self) -> str:
+        if not self.failovers:
+            return "📊 Keine Failover"
+        outages = sorted(record["outage_ms"] for record in self.failovers)
+        lines = [f"📊 {len(self.failovers)} Failover | Ausfall bis erster Hop: "
+                 f"min {outages[0]:.0f}ms / median {outages[len(outages) // 2]:.0f}ms / max {outages[-1]:.0f}ms "
+                 f"(Hop {self.hop_length * 1000:.0f}ms)"]
+        for record in self.failovers:
+            lines.append(f"   {record['reason']}: Erkennung {record['detection_ms']:.0f}ms, "
+                         f"Ausfall bis erster Hop {record['outage_ms']:.0f}ms, Lücke zwischen Hops {record['gap_ms']:.0f}ms")
+        return "\n".join(lines)
+
+    def forward_signal(self, sig):
+        if self.active and self.active.proc.poll() is None:
+            os.kill(self.active.pid, sig)
+
+    def stop(self):
+        self.is_running = False
+        for process in (self.standby, self.active):
+            if process:
+                process.terminate()
+        self.hub.stop()
+        self.listen_sock.close()
+
+
+def main():
+    import argparse
+
+    argv = sys.argv[1:]
+    service_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    own_args = argv[:argv.index("--")] if "--" in argv else argv
+
+    parser = argparse.ArgumentParser(description="Detector Supervisor mit Warm-Standby",
+                                     usage="%(prog)s [Optionen] -- [Service-Optionen]")
+    parser.add_argument("--health-timeout", type=float, default=3.0,
+                        help="Sekunden ohne Heartbeat bis Failover (Hänger)")
+    parser.add_argument("--test-failover", type=int, default=0, metavar="N",
+                        help="N-mal den aktiven Detector killen, Lücken messen und beenden")
+    parser.add_argument("--failover-interval", type=float, default=10.0,
+                        help="Sekunden zwischen Test-Failovers")
+    args = parser.parse_args(own_args)
+
+    supervisor = DetectorSupervisor(service_args, args.health_timeout)
+
+    def shutdown(sig, frame):
+        # Nur den Hauptthread unterbrechen - aufgeräumt wird einmal im finally unten
+        print(f"\n📡 Signal {sig} empfangen. Stoppe Supervisor...")
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    if hasattr(signal, "SIGHUP"):
+        # Konfiguration neu laden bzw. Profiling (USR1/USR2): an den aktiven Detector weiterreichen
+        for forwarded in (signal.SIGHUP, signal.SIGUSR1, signal.SIGUSR2):
+            signal.signal(forwarded, lambda sig, frame: supervisor.forward_signal(sig))
+
+    try:
+        supervisor.run(args.test_failover, args.failover_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+        print(supervisor.report())
+
+
+if __name__ == "__main__":
+    main()
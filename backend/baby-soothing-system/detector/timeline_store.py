@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Append-only Timeline-Store für Wahrscheinlichkeiten, Zustände und Events
+Ein Record pro Hop mit fester Breite (16 Bytes) in memory-mapped Segmentdateien,
+eine Datei pro Tag. Das Commit-Byte wird als letztes geschrieben, beim Öffnen
+findet eine binäre Suche das Ende der gültigen Records (Crash-Recovery).
+Abfragen liefern min/max/mean pro Zeit-Bucket direkt aus dem Memory-Map.
+"""
+
+import glob
+import mmap
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("prob", "<f4"),
+    ("state", "u1"),
+    ("event", "u1"),
+    ("mode", "u1"),     # Degradationsstufe des Hops (deadline_scheduler.MODES, 0 = normal)
+    ("commit", "u1"),   # COMMIT_MARK sobald der Record vollständig ist
+])
+COMMIT_MARK = 0xA5
+
+STATES = ["QUIET", "ANALYZING", "CRYING", "CHECKING_STOP"]
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+EVENTS = ["", "cry_detected", "cry_stopped"]
+EVENT_CODES = {name: code for code, name in enumerate(EVENTS)}
+
+
+def _day_key(timestamp: float) -> str:
+    return time.strftime("%Y%m%d", time.localtime(timestamp))
+
+
+def _committed_count(records: np.ndarray) -> int:
+    """Binäre Suche nach dem ersten nicht committeten Record"""
+    lo, hi = 0, len(records)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if records[mid]["commit"] == COMMIT_MARK:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class TimelineWriter:
+    """Schreibt einen Record pro Hop in das Segment des aktuellen Tages"""
+
+    def __init__(self, store_dir: str, initial_records: int = 2 * 86400):
+        self.store_dir = store_dir
+        self.initial_records = initial_records   # 2 Hops/s * 1 Tag
+        os.makedirs(store_dir, exist_ok=True)
+        self.day: Optional[str] = None
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.records: Optional[np.ndarray] = None
+        self.count = 0
+
+    def _open_segment(self, day: str):
+        self.close()
+        path = os.path.join(self.store_dir, f"timeline_{day}.seg")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.truncate(self.initial_records * RECORD_DTYPE.itemsize)
+        self._file = open(path, "r+b")
+        self._map_file()
+        # Tail-Recovery: halb geschriebene Records nach einem Absturz verwerfen
+        self.count = _committed_count(self.records)
+        self.records[self.count:]["commit"] = 0
+        self.day = day
+
+    def _map_file(self):
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE)
+
+    def _grow(self):
+        """Segment verdoppeln (selten - nur wenn mehr Hops als geplant)"""
+        size = len(self.records) * 2 * RECORD_DTYPE.itemsize
+        self.records = None
+        self._mmap.close()
+        self._file.truncate(size)
+        self._map_file()
+
+    def append(self, ts: float, prob: float, state: int, event: int = 0, mode: int = 0):
+        """Ein Record - keine Python-Listen, nur ein Slot im Memory-Map"""
+        day = _day_key(ts)
+        if day != self.day:
+            self._open_segment(day)
+        if self.count >= len(self.records):
+            self._grow()
+        record = self.records[self.count]
+        record["ts"] = ts
+        record["prob"] = prob
+        record["state"] = state
+        record["event"] = event
+        record["mode"] = mode
+        record["commit"] = COMMIT_MARK
+        self.count += 1
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        if self._mmap is not None:
+            self.flush()
+            self.records = None
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+
+class TimelineReader:
+    """Abfragen über alle Tagessegmente (read-only Memory-Maps)"""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+
+    def _segments(self, start: float, end: float):
+        first, last = _day_key(start) if start > 0 else "", _day_key(min(end, time.time() + 86400))
+        for path in sorted(glob.glob(os.path.join(self.store_dir, "timeline_*.seg"))):
+            day = os.path.basename(path)[9:17]
+            if first <= day <= last and os.path.getsize(path) > 0:
+                records = np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+                records = records[:_committed_count(records)]
+                lo = np.searchsorted(records["ts"], start, side="left")
+                hi = np.searchsorted(records["ts"], end, side="left")
+                if hi > lo:
+                    yield records[lo:hi]
+
+    def records(self, start: float, end: float) -> np.ndarray:
+        parts = list(self._segments(start, end))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+
+    def query(self, start: float, end: float, bucket_seconds: float) -> Dict[str, np.ndarray]:
+        """Downsampling: min/max/mean der Wahrscheinlichkeit und dominanter Zustand pro Bucket"""
+        records = self.records(start, end)
+        if len(records) == 0:
+            empty = np.zeros(0)
+            return {"t": empty, "min": empty, "max": empty, "mean": empty, "count": empty, "state": empty,
+                    "mode": empty}
+        buckets = ((records["ts"] - start) // bucket_seconds).astype(np.int64)
+        # Records sind zeitlich sortiert -> Bucket-Grenzen per reduceat
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        prob = records["prob"]
+        counts = np.diff(np.r_[starts, len(records)])
+        return {
+            "t": start + buckets[starts] * bucket_seconds,
+            "min": np.minimum.reduceat(prob, starts),
+            "max": np.maximum.reduceat(prob, starts),
+            "mean": np.add.reduceat(prob.astype(np.float64), starts) / counts,
+            "count": counts,
+            "state": np.maximum.reduceat(records["state"], starts),  # höchster Alarmzustand
+            "mode": np.maximum.reduceat(records["mode"], starts),    # stärkste Degradation
+        }
+
+    def events(self, start: float, end: float) -> List[dict]:
+        records = self.records(start, end)
+        hits = records[records["event"] != 0]
+        return [{"ts": float(r["ts"]), "type": EVENTS[r["event"]], "probability": float(r["prob"])}
+                for r in hits]
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Timeline-Store abfragen")
+    parser.add_argument("--dir", type=str, default="timeline")
+    parser.add_argument("--hours", type=float, default=8.0, help="Zeitraum bis jetzt")
+    parser.add_argument("--bucket", type=float, default=60.0, help="Sekunden pro Bucket")
+    parser.add_argument("--json", action="store_true", help="Ausgabe als JSON")
+    args = parser.parse_args()
+
+    end = time.time()
+    start = end - args.hours * 3600
+    reader = TimelineReader(args.dir)
+    result = reader.query(start, end, args.bucket)
+    events = reader.events(start, end)
+    if args.json:
+        print(json.dumps({"buckets": {k: v.tolist() for k, v in result.items()}, "events": events}))
+        return
+    for i in range(len(result["t"])):
+        stamp = time.strftime("%H:%M:%S", time.localtime(result["t"][i]))
+        print(f"{stamp}  min {result['min'][i]:.3f}  max {result['max'][i]:.3f}  "
+              f"mean {result['mean'][i]:.3f}  {STATES[result['state'][i]]}")
+    for event in events:
+        stamp = time.strftime("%H:%M:%S", time.localtime(event["ts"]))
+        print(f"{stamp}  {event['type']} ({event['probability']:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Live-Visualisierungs-Stream für das Monitor-UI
+Nutzt die Tensoren, die YAMNet ohnehin berechnet (Log-Mel-Spektrogramm und Scores):
+keine zusätzliche Inferenz. Frames werden nur erzeugt, wenn mindestens ein Client
+verbunden ist, sind ratenbegrenzt und auf uint8 quantisiert.
+
+Protokoll (TCP, Little Endian): jede Nachricht = uint32 Länge + Payload
+  Payload[0] = 0x01 HELLO  -> UTF-8 JSON {"labels": [...], "bins": n, "frame_seconds": s}
+  Payload[0] = 0x02 FRAME  -> FRAME_HEADER, danach n_frames*n_bins uint8 Spektrogramm
+                              (zeitlich geordnet), danach top_k * (uint16 Klasse, uint8 Score)
+"""
+
+import json
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+MSG_HELLO = 0x01
+MSG_FRAME = 0x02
+FRAME_HEADER = struct.Struct("<BIdHBBB")  # typ, seq, ts, n_frames, n_bins, top_k, cry_prob (uint8)
+
+# Wertebereich des YAMNet Log-Mel-Spektrogramms für die Quantisierung
+LOG_MEL_MIN = -12.0
+LOG_MEL_MAX = 4.0
+
+
+def encode_frame(seq: int, ts: float, spectrogram: np.ndarray, mean_scores: np.ndarray,
+                 cry_index: int, time_factor: int, bin_factor: int, top_k: int) -> bytes:
+    """Spektrogramm (frames x 64) verkleinern, quantisieren und mit Top-k Scores packen"""
+    frames = spectrogram.shape[0] // time_factor * time_factor
+    bins = spectrogram.shape[1] // bin_factor * bin_factor
+    small = spectrogram[:frames, :bins].reshape(frames // time_factor, time_factor,
+                                                bins // bin_factor, bin_factor).mean(axis=(1, 3))
+    scaled = (small - LOG_MEL_MIN) * (255.0 / (LOG_MEL_MAX - LOG_MEL_MIN))
+    quantized = np.clip(scaled, 0, 255).astype(np.uint8)
+
+    top = np.argpartition(mean_scores, -top_k)[-top_k:]
+    top = top[np.argsort(mean_scores[top])[::-1]]
+    top_packed = np.zeros(top_k, dtype=[("cls", "<u2"), ("score", "u1")])
+    top_packed["cls"] = top
+    top_packed["score"] = np.clip(mean_scores[top] * 255, 0, 255).astype(np.uint8)
+
+    cry_q = int(min(max(mean_scores[cry_index], 0.0), 1.0) * 255)
+    header = FRAME_HEADER.pack(MSG_FRAME, seq & 0xFFFFFFFF, ts, quantized.shape[0],
+                               quantized.shape[1], top_k, cry_q)
+    return header + quantized.tobytes() + top_packed.tobytes()
+
+
+def decode_frame(payload: bytes) -> dict:
+    """Gegenstück zu encode_frame (für Test-Clients und Gateway)"""
+    _, seq, ts, n_frames, n_bins, top_k, cry_q = FRAME_HEADER.unpack_from(payload)
+    offset = FRAME_HEADER.size
+    spec = np.frombuffer(payload, dtype=np.uint8, count=n_frames * n_bins, offset=offset)
+    offset += n_frames * n_bins
+    top = np.frombuffer(payload, dtype=[("cls", "<u2"), ("score", "u1")], count=top_k, offset=offset)
+    return {
+        "seq": seq,
+        "ts": ts,
+        "cry_probability": cry_q / 255.0,
+        "spectrogram": spec.reshape(n_frames, n_bins),
+        "top_k": [(int(c), s / 255.0) for c, s in zip(top["cls"], top["score"])],
+    }
+
+
+class VizStreamServer:
+    """Eigener Port für Binär-Frames; ohne Clients kostet der Stream nichts"""
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 labels: List[str],
+                 cry_index: int,
+                 hop_seconds: float = 0.5,
+                 max_fps: float = 4.0,
+                 time_factor: int = 4,
+                 bin_factor: int = 2,
+                 top_k: int = 5):
+        self.labels = labels
+        self.cry_index = cry_index
+        self.hop_seconds = hop_seconds
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.time_factor = time_factor
+        self.bin_factor = bin_factor
+        self.top_k = top_k
+
+        self.clients: List[list] = []     # [socket, ausstehende Bytes]
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.last_frame_time = 0.0
+        self.stats = {"frames": 0, "dropped": 0}
+
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((host, port))
+        self.server_socket.listen(5)
+        self.is_running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"🎨 Viz-Stream auf {host}:{port}")
+
+    def _accept_loop(self):
+        hello = json.dumps({
+            "labels": self.labels,
+            "bins": 64 // self.bin_factor,
+            "frame_seconds": 0.01 * self.time_factor,   # YAMNet: 10ms pro Spektrogramm-Frame
+        }).encode("utf-8")
+        while self.is_running:
+            try:
+                client, address = self.server_socket.accept()
+            except OSError:
+                break
+            try:
+                client.sendall(struct.pack("<I", len(hello) + 1) + bytes([MSG_HELLO]) + hello)
+                client.setblocking(False)
+            except OSError:
+                client.close()
+                continue
+            with self.lock:
+                self.clients.append([client, b""])
+            print(f"🎨 Viz-Client verbunden: {address}")
+
+    def wants_frame(self) -> bool:
+        """Billiger Check im Hot Loop: Clients vorhanden und Rate-Limit frei?"""
+        return bool(self.clients) and time.monotonic() - self.last_frame_time >= self.min_interval
+
+    def publish(self, spectrogram: np.ndarray, mean_scores: np.ndarray):
+        """Neuesten Hop des Spektrogramms senden (nur die neuen Frames)"""
+        self.last_frame_time = time.monotonic()
+        new_frames = min(int(self.hop_seconds / 0.01), spectrogram.shape[0])
+        payload = encode_frame(self.seq, time.time(), spectrogram[-new_frames:], mean_scores,
+                               self.cry_index, self.time_factor, self.bin_factor, self.top_k)
+        self.seq += 1
+        message = struct.pack("<I", len(payload)) + payload
+        with self.lock:
+            for client in list(self.clients):
+                self._send(client, message)
+        self.stats["frames"] += 1
+
+    def _send(self, client: list, message: bytes):
+        """Nicht-blockierend; langsame Clients verlieren Frames statt den Loop zu bremsen"""
+        sock, pending = client
+        try:
+            if pending:
+                sent = sock.send(pending)
+                client[1] = pending = pending[sent:]
+            if pending:
+                self.stats["dropped"] += 1
+                return
+            sent = sock.send(message)
+            client[1] = message[sent:]
+        except BlockingIOError:
+            self.stats["dropped"] += 1
+        except OSError:
+            sock.close()
+            self.clients.remove(client)
+            print("🎨 Viz-Client getrennt")
+
+    def close(self):
+        self.is_running = False
+        with self.lock:
+            for sock, _ in self.clients:
+                sock.close()
+            self.clients.clear()
+        self.server_socket.close()
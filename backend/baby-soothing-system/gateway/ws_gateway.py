@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+WebSocket Gateway zwischen Backend und Frontend
+Abonniert die Events des Detektors (TCP, newline JSON) und den Zustand des Agents
+(der Agent pusht auf einen eigenen TCP-Port) und verteilt beides per WebSocket.
+
+- Per-Hop-Updates (status, probability, agent_status) werden zusammengefasst und
+  höchstens mit der UI-Refresh-Rate gesendet
+- Diskrete Events (cry_detected, agent_state, ...) gehen sofort raus und landen in
+  einem begrenzten Replay-Puffer; ein Client, der mit ?since=<seq> neu verbindet,
+  bekommt Snapshot + verpasste Events
+- Jeder Client hat eine begrenzte Queue: langsame Clients verlieren Zwischenstände,
+  bei verpassten Events werden sie getrennt und holen per Replay auf
+
+Endpunkte:  GET /ws/live?since=<seq>   GET /api/status   GET /api/events?since=<seq>
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Dict, Optional, Set, Tuple
+
+from aiohttp import WSCloseCode, WSMsgType, web
+
+# Nachrichtentypen, bei denen nur der neueste Stand zählt
+COALESCED_TYPES = {"status", "probability", "agent_status", "snapshot"}
+# Höchstlänge einer JSON-Zeile von Detektor/Agent (replay/resync-Antworten sind groß)
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class ClientConnection:
+    """Ein WebSocket-Client mit eigener, begrenzter Sende-Queue"""
+
+    def __init__(self, ws: web.WebSocketResponse, max_queue: int):
+        self.ws = ws
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self.dropped = 0
+
+    def offer(self, message: str, droppable: bool):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if droppable:
+                self.dropped += 1
+            else:
+                # Event verpasst: trennen, der Client holt per Replay auf
+                self.overflowed = True
+                asyncio.ensure_future(self.ws.close(code=WSCloseCode.TRY_AGAIN_LATER,
+                                                    message=b"backpressure"))
+
+    async def writer(self):
+        while not self.ws.closed:
+            message = await self.queue.get()
+            await self.ws.send_str(message)
+
+
+class GatewayHub:
+    """Zustand, Replay-Puffer und Verteilung an alle Clients"""
+
+    def __init__(self, refresh_hz: float = 5.0, replay_size: int = 500, client_queue: int = 64):
+        self.refresh_interval = 1.0 / refresh_hz
+        self.replay: deque = deque(maxlen=replay_size)
+        self.client_queue = client_queue
+        self.clients: Set[ClientConnection] = set()
+        self.seq = 0
+        self.evicted_seq = 0    # höchste seq, die aus dem Replay-Puffer gefallen ist
+        self.latest: Dict[Tuple[str, str], dict] = {}   # (source, type) -> letzte Nachricht
+        self.dirty: Set[Tuple[str, str]] = set()
+        self.stats = {"ingested": 0, "batches": 0, "coalesced": 0}
+
+    def ingest(self, source: str, event: dict):
+        """Event aus Detektor oder Agent übernehmen"""
+        self.seq += 1
+        message = {
+            "seq": self.seq,
+            "source": source,
+            "type": event.get("type", "unknown"),
+            "ts": event.get("timestamp", time.time()),
+            "data": event.get("data", {}),
+        }
+        key = (source, message["type"])
+        self.stats["ingested"] += 1
+        if key in self.dirty:
+            self.stats["coalesced"] += 1
+        self.latest[key] = message
+        if message["type"] in COALESCED_TYPES:
+            self.dirty.add(key)
+        else:
+            if len(self.replay) == self.replay.maxlen:
+                self.evicted_seq = self.replay[0]["seq"]
+            self.replay.append(message)
+            self._broadcast(json.dumps(message), droppable=False)
+
+    def _broadcast(self, text: str, droppable: bool):
+        for client in list(self.clients):
+            client.offer(text, droppable)
+
+    def snapshot(self) -> dict:
+        return {"type": "snapshot", "seq": self.seq,
+                "state": {f"{source}.{kind}": msg for (source, kind), msg in self.latest.items()}}
+
+    def events_since(self, since: int) -> Tuple[list, bool]:
+        """Verpasste Events; truncated=True wenn der Puffer nicht weit genug zurückreicht"""
+        events = [m for m in self.replay if m["seq"] > since]
+        return events, since < self.evicted_seq
+
+    async def flush_loop(self):
+        """Zusammengefasste Updates mit der UI-Refresh-Rate senden"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if not self.dirty:
+                continue
+            batch = {"type": "batch", "seq": self.seq,
+                     "items": [self.latest[key] for key in self.dirty]}
+            self.dirty.clear()
+            self.stats["batches"] += 1
+            self._broadcast(json.dumps(batch), droppable=True)
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        since = _parse_since(request, -1)
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        client = ClientConnection(ws, self.client_queue)
+
+        # Snapshot + Replay berechnen, Client registrieren und alles in seine Queue legen -
+        # ohne await dazwischen, sonst fehlen Events, die in der Zwischenzeit ankommen
+        client.offer(json.dumps(self.snapshot()), droppable=False)
+        if since >= 0:
+            events, truncated = self.events_since(since)
+            client.offer(json.dumps({"type": "replay", "since": since,
+                                     "truncated": truncated, "events": events}), droppable=False)
+        self.clients.add(client)
+        writer = asyncio.create_task(client.writer())
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT and msg.data == "ping":
+                    client.offer(json.dumps({"type": "pong", "ts": time.time()}), droppable=True)
+        finally:
+            self.clients.discard(client)
+            writer.cancel()
+        return ws
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        return web.json_response(self.snapshot())
+
+    async def handle_events(self, request: web.Request) -> web.Response:
+        events, truncated = self.events_since(_parse_since(request, 0))
+        return web.json_response({"events": events, "truncated": truncated})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/ws/live", self.handle_ws)
+        app.router.add_get("/api/status", self.handle_status)
+        app.router.add_get("/api/events", self.handle_events)
+        return app
+
+
+def _parse_since(request: web.Request, default: int) -> int:
+    """Query-Parameter since als Ganzzahl; sonst 400 statt 500"""
+    value = request.query.get("since")
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text="since muss eine ganze Zahl sein")
+
+
+async def detector_link(hub: GatewayHub, host: str, port: int):
+    """Liest den Event-Stream des Detektors, verbindet bei Abbruch neu und holt
+    verpasste Detektor-Events per resync nach"""
+    last_seq, instance = 0, None
+    while True:
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+            print(f"🔗 Gateway mit Detektor verbunden ({host}:{port})")
+            hub.ingest("gateway", {"type": "detector_link", "data": {"connected": True}})
+            # Wahrscheinlichkeit pro Hop, höchstens so oft wie das UI aktualisiert wird
+            subscribe = {"type": "subscribe", "data": {"types": ["probability"], "rate": 1.0 / hub.refresh_interval}}
+            writer.write((json.dumps(subscribe) + "\n").encode())
+            if last_seq:
+                resync = {"type": "resync", "data": {"since": last_seq, "instance": instance}}
+                writer.write((json.dumps(resync) + "\n").encode())
+            while line := await reader.readline():
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                if event.get("type") == "replay":
+                    # Verpasste Events einzeln übernehmen (landen im Replay-Puffer des Gateways)
+                    data = event.get("data")
+                    missed_events = data.get("events") if isinstance(data, dict) else None
+                    for missed in missed_events if isinstance(missed_events, list) else []:
+                        if isinstance(missed, dict):
+                            hub.ingest("detector", missed)
+                    continue
+                if event.get("type") in ("subscribed", "subscribe_rejected"):
+                    # Antwort auf das eigene Abo, kein Detektor-Zustand
+                    if event["type"] == "subscribe_rejected":
+                        print(f"⚠️ Detektor lehnt Abo ab: {event.get('data')}")
+                    continue
+                if event.get("type") == "snapshot" and isinstance(event.get("data"), dict):
+                    instance = event["data"].get("instance")
+                if isinstance(event.get("seq"), int):
+                    last_seq = event["seq"]
+                hub.ingest("detector", event)
+            writer.close()
+        except OSError as e:
+            print(f"⏳ Detektor nicht erreichbar: {e}")
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            # Zeile über STREAM_LIMIT: Verbindung verwerfen und neu verbinden (resync holt auf)
+            print(f"⚠️ Ungültiger Detektor-Stream, verbinde neu: {e}")
+            if writer is not None:
+                writer.close()
+        hub.ingest("gateway", {"type": "detector_link", "data": {"connected": False}})
+        await asyncio.sleep(3)
+
+
+async def handle_agent(hub: GatewayHub, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Agent pusht Zustände als newline JSON"""
+    print("🔗 Agent mit Gateway verbunden")
+    try:
+        while line := await reader.readline():
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(event, dict):
+                hub.ingest("agent", event)
+    except (OSError, ValueError, asyncio.LimitOverrunError) as e:
+        print(f"⚠️ Agent-Verbindung abgebrochen: {e}")
+    writer.close()
+    print("📡 Agent getrennt")
+
+
+async def run_gateway(args):
+    hub = GatewayHub(args.refresh_hz, args.replay_size, args.client_queue)
+    runner = web.AppRunner(hub.make_app())
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    agent_server = await asyncio.start_server(lambda r, w: handle_agent(hub, r, w),
+                                              args.host, args.agent_port, limit=STREAM_LIMIT)
+    print(f"🌐 Gateway: ws://{args.host}:{args.port}/ws/live | Agent-Port {args.agent_port}")
+    await asyncio.gather(hub.flush_loop(),
+                         detector_link(hub, args.detector_host, args.detector_port),
+                         agent_server.serve_forever())
+
+
+async def _selftest():
+    """Stand-in Client: Coalescing, Snapshot und Replay nach Reconnect"""
+    import aiohttp
+
+    hub = GatewayHub(refresh_hz=20, replay_size=10, client_queue=8)
+    runner = web.AppRunner(hub.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    flush = asyncio.create_task(hub.flush_loop())
+
+    async with aiohttp.ClientSession() as http:
+        async with http.ws_connect(f"http://127.0.0.1:{port}/ws/live?since=0") as ws:
+            assert (await ws.receive_json())["type"] == "snapshot"
+            assert (await ws.receive_json())["type"] == "replay"
+            for i in range(200):   # 200 Per-Hop-Updates -> wenige Batches
+                hub.ingest("detector", {"type": "status", "data": {"probability": i / 200}})
+            hub.ingest("detector", {"type": "cry_detected", "data": {"probability": 0.8}})
+            first = await ws.receive_json()
+            assert first["type"] == "cry_detected", first
+            batch = await ws.receive_json()
+            assert batch["type"] == "batch" and batch["items"][0]["data"]["probability"] == 0.995
+            last_seq = first["seq"]
+
+        # Während der Client weg ist
+        hub.ingest("detector", {"type": "cry_stopped", "data": {}})
+        hub.ingest("agent", {"type": "agent_state", "data": {"state": "cooldown"}})
+        async with http.ws_connect(f"http://127.0.0.1:{port}/ws/live?since={last_seq}") as ws:
+            snapshot = await ws.receive_json()
+            replay = await ws.receive_json()
+            assert [e["type"] for e in replay["events"]] == ["cry_stopped", "agent_state"], replay
+            assert not replay["truncated"]
+            assert snapshot["state"]["agent.agent_state"]["data"]["state"] == "cooldown"
+
+        for path in ("/ws/live?since=abc", "/api/events?since=abc"):
+            async with http.get(f"http://127.0.0.1:{port}{path}") as response:
+                assert response.status == 400, (path, response.status)
+    flush.cancel()
+    await runner.cleanup()
+    print(f"📊 {hub.stats}")
+    print("✅ Gateway Selbsttest bestanden")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket Gateway (Detektor + Agent -> Frontend)")
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP/WebSocket Port")
+    parser.add_argument("--agent-port", type=int, default=9998, help="TCP Port für Agent-Zustände")
+    parser.add_argument("--detector-host", type=str, default="localhost")
+    parser.add_argument("--detector-port", type=int, default=9999)
+    parser.add_argument("--refresh-hz", type=float, default=5.0, help="UI-Refresh-Rate für Per-Hop-Updates")
+    parser.add_argument("--replay-size", type=int, default=500, help="Events im Replay-Puffer")
+    parser.add_argument("--client-queue", type=int, default=64, help="Nachrichten pro Client-Queue")
+    parser.add_argument("--selftest", action="store_true", help="Selbsttest mit Stand-in Client")
+    args = parser.parse_args()
+
+    if args.selftest:
+        asyncio.run(_selftest())
+        return
+    try:
+        asyncio.run(run_gateway(args))
+    except KeyboardInterrupt:
+        print("\n👋 Gateway beendet")
+
+
+if __name__ == "__main__":
+    main()